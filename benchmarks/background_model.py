@@ -0,0 +1,117 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensors.vision import BackgroundModel, DetectionGeometry, blur_reference, decimate_gray, object_detected_contiguous
+
+
+FULL_SIZE = (3840, 2160)
+
+
+def _to_gray(frame, size):
+    if frame.ndim == 3:
+        return decimate_gray(frame, size)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def load_frames(path, size):
+    """Loads a recorded sequence from a .npy stack, a video file or a directory of images."""
+    path = Path(path)
+    if path.suffix == ".npy":
+        return [_to_gray(f, size) for f in np.load(path)]
+
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        return [_to_gray(cv2.imread(str(p)), size) for p in files]
+
+    frames = []
+    cap = cv2.VideoCapture(str(path))
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(_to_gray(frame, size))
+    cap.release()
+    return frames
+
+
+def synthetic_frames(count, size, seed=0):
+    """Slow lighting ramp with an object passing every 50 frames; returns (frames, labels)."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    texture = rng.integers(0, 12, size=(height, width), dtype=np.uint8)
+    frames, labels = [], []
+    for i in range(count):
+        level = 70 + 60.0 * i / max(1, count - 1)
+        frame = np.clip(texture.astype(np.float32) + level, 0, 255).astype(np.uint8)
+        has_object = i % 50 in range(20, 26)
+        if has_object:
+            y = height // 4 + (i % 50 - 20) * height // 12
+            frame[y:y + height // 8, width // 2 - width // 20:width // 2 + width // 20] = 240
+        frames.append(frame)
+        labels.append(has_object)
+    return frames, labels
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Static reference vs adaptive background model")
+    p.add_argument("--frames", type=str, default=None, help=".npy stack, video file or image directory")
+    p.add_argument("--count", type=int, default=500, help="synthetic frame count when --frames is not given")
+    p.add_argument("--detect-width", type=int, default=640)
+    p.add_argument("--detect-height", type=int, default=360)
+    p.add_argument("--alpha", type=float, default=0.05)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    size = (args.detect_width, args.detect_height)
+    geometry = DetectionGeometry(full_size=FULL_SIZE, detect_size=size)
+    if args.frames:
+        frames, labels = load_frames(args.frames, size), None
+    else:
+        frames, labels = synthetic_frames(args.count, size)
+    if not frames:
+        print("No frames loaded")
+        return 2
+
+    static_ref = blur_reference(frames[0], geometry)
+    model = BackgroundModel(geometry, alpha=args.alpha)
+    model.seed(frames[0])
+
+    static_hits, adaptive_hits = [], []
+    update_s = 0.0
+    for frame in frames:
+        static_hits.append(object_detected_contiguous(frame, static_ref, geometry))
+        adaptive_hits.append(object_detected_contiguous(frame, model.reference, geometry))
+        t0 = time.perf_counter()
+        model.update(frame)
+        update_s += time.perf_counter() - t0
+
+    results = {
+        "frames": len(frames),
+        "update_us_per_frame": 1e6 * update_s / len(frames),
+        "static_detections": sum(static_hits),
+        "adaptive_detections": sum(adaptive_hits),
+    }
+    if labels is not None:
+        results["static_false_positives"] = sum(h and not l for h, l in zip(static_hits, labels))
+        results["adaptive_false_positives"] = sum(h and not l for h, l in zip(adaptive_hits, labels))
+        results["static_misses"] = sum(l and not h for h, l in zip(static_hits, labels))
+        results["adaptive_misses"] = sum(l and not h for h, l in zip(adaptive_hits, labels))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>26}: {value:.1f}" if isinstance(value, float) else f"{key:>26}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensors.vision import DetectionGeometry, blur_reference, decimate_gray, object_detected_contiguous
+
+
+FULL_SIZE = (3840, 2160)
+
+
+def _synthetic_rgb_frames(count, size, seed=0):
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = np.full((height, width, 3), 90, dtype=np.uint8)
+    background += rng.integers(0, 8, size=background.shape, dtype=np.uint8)
+
+    frames = [background.copy()]
+    obj_w, obj_h = width // 10, height // 8
+    for i in range(1, count):
+        frame = background.copy()
+        y = int((height - obj_h) * i / count)
+        x = width // 2 - obj_w // 2
+        frame[y:y + obj_h, x:x + obj_w] = (230, 230, 230)
+        frames.append(frame)
+    return frames
+
+
+def _lores_yuv(rgb_frame, size):
+    small = cv2.resize(rgb_frame, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_RGB2YUV_I420)
+
+
+def _bench(frames, iterations, step):
+    detections = 0
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    for i in range(iterations):
+        if step(frames[i % len(frames)]):
+            detections += 1
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    return {"fps": iterations / wall, "cpu_ms_per_frame": 1000.0 * cpu / iterations, "detections": detections}
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Synthetic-frame camera detection throughput")
+    p.add_argument("--frames", type=int, default=16)
+    p.add_argument("--iterations", type=int, default=60)
+    p.add_argument("--detect-width", type=int, default=640)
+    p.add_argument("--detect-height", type=int, default=360)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    detect_size = (args.detect_width, args.detect_height)
+    rgb_frames = _synthetic_rgb_frames(args.frames, FULL_SIZE)
+    yuv_frames = [_lores_yuv(f, detect_size) for f in rgb_frames]
+
+    full = DetectionGeometry(full_size=FULL_SIZE, detect_size=FULL_SIZE)
+    small = DetectionGeometry(full_size=FULL_SIZE, detect_size=detect_size)
+
+    ref_full = blur_reference(decimate_gray(cv2.cvtColor(rgb_frames[0], cv2.COLOR_RGB2BGR), FULL_SIZE), full)
+    ref_small = blur_reference(yuv_frames[0][:detect_size[1], :detect_size[0]], small)
+
+    def main_step(rgb):
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        return object_detected_contiguous(decimate_gray(bgr, FULL_SIZE), ref_full, full)
+
+    def decimate_step(rgb):
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        return object_detected_contiguous(decimate_gray(bgr, detect_size), ref_small, small)
+
+    def lores_step(yuv):
+        return object_detected_contiguous(yuv[:detect_size[1], :detect_size[0]], ref_small, small)
+
+    results = {
+        "main": _bench(rgb_frames, args.iterations, main_step),
+        "decimate": _bench(rgb_frames, args.iterations, decimate_step),
+        "lores": _bench(yuv_frames, args.iterations, lores_step),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for mode, r in results.items():
+            print(f"{mode:>9}: {r['fps']:8.1f} fps  {r['cpu_ms_per_frame']:7.2f} ms cpu/frame  "
+                  f"detections={r['detections']}/{args.iterations}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensors.weight_sensor.errors import HX711NotReadyError, HX711ReadError
+from sensors.weight_sensor.hx711 import HX711, HX711Config, HX711Pigpio
+
+
+def _run(hx, seconds):
+    attempts = valid = 0
+    errors = Counter()
+    wall0 = time.monotonic()
+    cpu0 = time.process_time()
+    while time.monotonic() - wall0 < seconds:
+        attempts += 1
+        try:
+            hx.read_raw()
+            valid += 1
+        except (HX711NotReadyError, HX711ReadError) as e:
+            errors[type(e).__name__] += 1
+    wall = time.monotonic() - wall0
+    cpu = time.process_time() - cpu0
+    return {
+        "attempts": attempts,
+        "valid": valid,
+        "valid_fraction": valid / attempts if attempts else 0.0,
+        "valid_per_s": valid / wall,
+        "cpu_percent": 100.0 * cpu / wall,
+        "cpu_ms_per_valid": 1000.0 * cpu / valid if valid else None,
+        "errors": dict(errors),
+    }
+
+
+def _open(backend, config, sim):
+    if backend == "gpio":
+        return HX711(config)
+    if sim:
+        from sim import FakePi, HX711Device
+        from sim import pigpio as sim_pigpio
+
+        pi = FakePi()
+        pi.attach_hx711(config.dt_gpio, config.sck_gpio, HX711Device(lambda t: 142000, rate_hz=80.0))
+        return HX711Pigpio(config, pigpio=sim_pigpio, pi=pi)
+    return HX711Pigpio(config)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Valid-sample rate and CPU cost of the HX711 backends")
+    p.add_argument("--dt", type=int, default=5)
+    p.add_argument("--sck", type=int, default=6)
+    p.add_argument("--gain", type=int, default=128)
+    p.add_argument("--seconds", type=float, default=10.0)
+    p.add_argument("--backend", choices=("gpio", "pigpio", "both"), default="both")
+    p.add_argument("--sim", action="store_true", help="run the pigpio backend against the simulated daemon")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    config = HX711Config(dt_gpio=args.dt, sck_gpio=args.sck, gain=args.gain)
+    backends = ("gpio", "pigpio") if args.backend == "both" else (args.backend,)
+    if args.sim:
+        backends = tuple(b for b in backends if b == "pigpio")
+
+    results = {}
+    for backend in backends:
+        hx = _open(backend, config, args.sim)
+        try:
+            results[backend] = _run(hx, args.seconds)
+        finally:
+            hx.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for backend, r in results.items():
+            print(f"{backend:>7}: {r['valid']}/{r['attempts']} valid ({r['valid_fraction']:.1%}), "
+                  f"{r['valid_per_s']:.1f}/s, cpu {r['cpu_percent']:.1f}%, errors {r['errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensors.vision import ImageSequence
+
+
+def _populate(directory: Path, count: int):
+    for i in range(1, count + 1):
+        (directory / f"image_{i}.jpg").touch()
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Directory-scan vs persistent sequence image naming")
+    p.add_argument("--files", type=int, default=10000, help="images already waiting in the tmp directory")
+    p.add_argument("--saves", type=int, default=200)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        _populate(directory, args.files)
+
+        t0 = time.perf_counter()
+        for _ in range(args.saves):
+            img_id = ImageSequence.scan_max(directory) + 1
+        scan_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sequence = ImageSequence(directory)
+        startup_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(args.saves):
+            seq_id = sequence.next_ids(1)[0]
+        seq_s = time.perf_counter() - t0
+
+        assert seq_id > img_id - 1
+
+    results = {
+        "files": args.files,
+        "saves": args.saves,
+        "scan_us_per_save": 1e6 * scan_s / args.saves,
+        "sequence_us_per_save": 1e6 * seq_s / args.saves,
+        "sequence_first_start_ms": 1e3 * startup_s,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>24}: {value:.1f}" if isinstance(value, float) else f"{key:>24}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
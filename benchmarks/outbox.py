@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client.client import ClientSender
+from client.uploader import Uploader
+from data.data_queue import UPLOAD_DONE, UPLOAD_GAVE_UP, DataQueue
+from sim.api import StubApi
+
+
+def _fill(queue, records, image_kb):
+    image = Path(queue.image_dir) / "image.jpg"
+    image.write_bytes(b"\xff" * (image_kb * 1024))
+    for i in range(records):
+        queue._insert_record(f"2026-01-01T00:00:{i % 60:02d}", float(i), float(i), str(image))
+
+
+def _max_rate(times, window=1.0):
+    best = 0
+    start = 0
+    for end in range(len(times)):
+        while times[end] - times[start] > window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best / window
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Outbox drain after an outage, against the stub API")
+    p.add_argument("--records", type=int, default=50, help="records stored before and during the outage")
+    p.add_argument("--outage", type=float, default=10.0, help="seconds the API drops connections")
+    p.add_argument("--outage-mode", choices=("drop", "error"), default="drop")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests failing after the outage")
+    p.add_argument("--rate", type=float, default=5.0, help="uploader rate limit (uploads/s)")
+    p.add_argument("--burst", type=int, default=5)
+    p.add_argument("--retry-delay", type=float, default=0.5)
+    p.add_argument("--max-delay", type=float, default=4.0)
+    p.add_argument("--max-attempts", type=int, default=8)
+    p.add_argument("--latency", type=float, default=0.02, help="stub API response time in seconds")
+    p.add_argument("--image-kb", type=int, default=64)
+    p.add_argument("--timeout", type=float, default=120.0)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    api = StubApi(latency=args.latency, fail_rate=args.fail_rate)
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        queue = DataQueue(db_path=str(Path(directory) / "data.db"), image_dir=str(Path(directory) / "images"))
+        _fill(queue, args.records, args.image_kb)
+        uploader = Uploader(queue, ClientSender(frontend_api_url=api.url), poll_interval=0.5,
+                            retry_delay=args.retry_delay, max_delay=args.max_delay,
+                            max_attempts=args.max_attempts, rate=args.rate, burst=args.burst)
+
+        api.set_mode(args.outage_mode)
+        uploader.start()
+        time.sleep(args.outage)
+        requests_in_outage = api.requests
+        api.set_mode("ok")
+        recovered = time.monotonic()
+
+        while queue.upload_backlog()[0] and time.monotonic() - recovered < args.timeout:
+            time.sleep(0.05)
+        drained = time.monotonic() - recovered
+        uploader.stop()
+
+        conn = queue._connection()
+        done = conn.execute("SELECT COUNT(*) FROM sensor_data WHERE uploaded = ?", (UPLOAD_DONE,)).fetchone()[0]
+        gave_up = conn.execute("SELECT COUNT(*) FROM sensor_data WHERE uploaded = ?", (UPLOAD_GAVE_UP,)).fetchone()[0]
+        attempts = conn.execute("SELECT SUM(upload_attempts) FROM sensor_data").fetchone()[0]
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM sensor_data WHERE uploaded = 0 "
+                            "AND next_attempt_at <= 0 AND (claimed_at IS NULL OR claimed_at <= 0) "
+                            "ORDER BY id LIMIT 10").fetchall()
+        queue.close()
+    api.close()
+
+    after = [t for t in api.request_times if t >= recovered]
+    result = {
+        "records": args.records,
+        "outage_s": args.outage,
+        "requests_during_outage": requests_in_outage,
+        "drain_s": drained,
+        "uploaded": done,
+        "gave_up": gave_up,
+        "pending": args.records - done - gave_up,
+        "attempts": attempts,
+        "accepted_by_api": api.accepted,
+        "mean_rate_per_s": len(after) / drained if drained else None,
+        "max_rate_per_s": _max_rate(after),
+        "rate_limit_per_s": args.rate,
+        "claim_query_plan": " / ".join(row[-1] for row in plan),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{args.records} records, {args.outage:.0f}s outage ({requests_in_outage} requests during it)")
+        print(f"drained in {drained:.1f}s: {done} uploaded, {gave_up} given up, {result['pending']} pending, "
+              f"{attempts} attempts, {api.accepted} accepted by the API")
+        print(f"rate after recovery: mean {result['mean_rate_per_s']:.1f}/s, max {result['max_rate_per_s']:.1f}/s "
+              f"over 1s (limit {args.rate}/s, burst {args.burst})")
+        print(f"claim query plan: {result['claim_query_plan']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
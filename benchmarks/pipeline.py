@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sim.api import StubApi
+from sim.scenario import WORKLOADS, SimScenario
+
+REPORTED_SPANS = ("trigger_to_store", "trigger_to_upload", "trigger_to_join", "ir_to_camera",
+                  "camera_detect", "camera_encode", "ultrasonic", "weight", "store", "upload")
+
+
+def _read_snapshot(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _track(peaks, cpu, snapshot):
+    for key, value in snapshot["gauges"].items():
+        kind, _, name = key.partition(".")
+        if kind in ("rss_bytes", "queue_depth"):
+            peaks.setdefault(kind, {})
+            peaks[kind][name] = max(peaks[kind].get(name, 0), value)
+        elif kind == "cpu_percent" and value:
+            cpu.setdefault(name, []).append(value)
+
+
+def _run(workload, args, api):
+    scenario = SimScenario.workload(workload, args.disposals, args.interval)
+    work_dir = Path(tempfile.mkdtemp(prefix=f"zotbins-bench-{workload}-"))
+    metrics_json = work_dir / "metrics.json"
+    cmd = [sys.executable, str(ROOT / "main.py"), "--sim",
+           "--sim-workload", workload,
+           "--sim-disposals", str(args.disposals),
+           "--sim-interval", str(args.interval),
+           "--api-url", api.url,
+           "--data-dir", str(work_dir),
+           "--metrics-json", str(metrics_json),
+           "--metrics-port", "0",
+           "--metrics-interval", str(args.sample_interval)]
+    if args.replay:
+        cmd += ["--sim-replay", args.replay]
+
+    peaks, cpu = {}, {}
+    snapshot = None
+    requests_before = api.requests
+    with open(work_dir / "main.log", "w") as log:
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        deadline = time.monotonic() + scenario.end + args.timeout
+        try:
+            while proc.poll() is None and time.monotonic() < deadline:
+                time.sleep(args.sample_interval)
+                latest = _read_snapshot(metrics_json)
+                if latest is None or (snapshot is not None and latest["time"] == snapshot["time"]):
+                    continue
+                snapshot = latest
+                _track(peaks, cpu, snapshot)
+                gauges = snapshot["gauges"]
+                if (snapshot["uptime_s"] >= scenario.end + args.settle
+                        and gauges.get("joiner_pending", 1) == 0 and gauges.get("upload_pending", 1) == 0):
+                    break
+        finally:
+            # Ctrl-C for the whole process group, like stopping the bin by hand
+            if proc.poll() is None:
+                os.killpg(proc.pid, signal.SIGINT)
+            try:
+                proc.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+
+    final = _read_snapshot(metrics_json) or snapshot
+    if final is None:
+        raise RuntimeError(f"{workload}: no metrics were written, see {work_dir / 'main.log'}")
+
+    counters = final["counters"]
+    latency = final["latency"]
+    # Trigger numbers come from the IR stage, so the highest one seen is its trigger count
+    ir_triggers = int(final["gauges"].get("ir_triggers", 0))
+    joined = counters.get("triggers", 0)
+    times = [d.at for d in scenario.disposals]
+    span = max(times) - min(times)
+    return {
+        "workload": workload,
+        "disposals": len(times),
+        "offered_per_min": 60.0 * (len(times) - 1) / span if span > 0 else None,
+        "ir_triggers": ir_triggers,
+        "joined": joined,
+        # Beam breaks the IR stage missed or debounced into an earlier trigger
+        "missed_disposals": len(times) - ir_triggers,
+        # Triggers the joiner never released, e.g. still pending at shutdown
+        "unjoined_triggers": ir_triggers - joined,
+        "missing": {k[len("missing_"):]: v for k, v in counters.items() if k.startswith("missing_")},
+        "stored": counters.get("records_stored", 0),
+        "uploaded": latency.get("upload", {}).get("count", 0),
+        "api_requests": api.requests - requests_before,
+        "latency_s": {
+            name: {q: latency[name][q] for q in ("count", "p50", "p95", "p99", "max")}
+            for name in REPORTED_SPANS if name in latency
+        },
+        "peak_rss_mb": {name: round(v / 2**20, 1) for name, v in sorted(peaks.get("rss_bytes", {}).items())},
+        "cpu_percent": {
+            name: {"mean": round(sum(v) / len(v), 1), "peak": round(max(v), 1)}
+            for name, v in sorted(cpu.items())
+        },
+        "peak_queue_depth": dict(sorted(peaks.get("queue_depth", {}).items())),
+        "log": str(work_dir / "main.log"),
+    }
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def _print(result):
+    print(f"{result['workload']}: {result['disposals']} disposals, {result['ir_triggers']} triggers "
+          f"({result['missed_disposals']} disposals missed), {result['joined']} joined "
+          f"({result['unjoined_triggers']} not), {result['stored']} stored, {result['uploaded']} uploaded, "
+          f"missing {result['missing'] or '-'}")
+    for name in ("trigger_to_store", "trigger_to_upload"):
+        s = result["latency_s"].get(name)
+        if s:
+            print(f"  {name:>18}: p50 {_fmt(s['p50'])}  p95 {_fmt(s['p95'])}  p99 {_fmt(s['p99'])}")
+    for name, mb in result["peak_rss_mb"].items():
+        c = result["cpu_percent"].get(name, {})
+        print(f"  {name:>18}: peak rss {mb:.1f} MB, cpu mean {c.get('mean', 0):.1f}% peak {c.get('peak', 0):.1f}%")
+    print(f"  {'peak queue depth':>18}: {result['peak_queue_depth']}")
+
+
+def _compare(results, baseline_path):
+    baseline = {r["workload"]: r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    for result in results:
+        old = baseline.get(result["workload"])
+        if old is None:
+            continue
+        print(f"{result['workload']} vs {baseline_path}: "
+              f"missed {old.get('missed_disposals', '-')} -> {result['missed_disposals']}, "
+              f"unjoined {old.get('unjoined_triggers', '-')} -> {result['unjoined_triggers']}")
+        for name in ("trigger_to_store", "trigger_to_upload"):
+            a, b = old["latency_s"].get(name, {}), result["latency_s"].get(name, {})
+            print(f"  {name:>18}: " + "  ".join(
+                f"{q} {_fmt(a.get(q))} -> {_fmt(b.get(q))}" for q in ("p50", "p95", "p99")))
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="End-to-end latency, drops and resource use of the main.py pipeline "
+                                            "on simulated sensors")
+    p.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+    p.add_argument("--disposals", type=int, default=8)
+    p.add_argument("--interval", type=float, default=8.0, help="seconds between disposals (or bursts/pairs)")
+    p.add_argument("--replay", default=None, help="camera frames to loop instead of synthetic ones")
+    p.add_argument("--upload-latency", type=float, default=0.05, help="stub API response time in seconds")
+    p.add_argument("--upload-fail-rate", type=float, default=0.0, help="fraction of uploads the stub API rejects")
+    p.add_argument("--settle", type=float, default=5.0, help="seconds after the last disposal before stopping")
+    p.add_argument("--timeout", type=float, default=120.0, help="give up this long after the last disposal")
+    p.add_argument("--sample-interval", type=float, default=0.5)
+    p.add_argument("--output", default=None, help="write the results to this JSON file")
+    p.add_argument("--compare", default=None, help="print changes against an earlier --output file")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    api = StubApi(args.upload_latency, args.upload_fail_rate)
+    try:
+        results = [_run(w, args, api) for w in workloads]
+    finally:
+        api.close()
+
+    report = {
+        "time": time.time(),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": vars(args),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for result in results:
+            _print(result)
+    if args.compare:
+        _compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+import argparse
+import json
+import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensors.weight_sensor.estimator import RobustWindow
+
+
+def _readings(n, seed, outlier_rate=0.05):
+    rng = random.Random(seed)
+    base = 142000
+    for i in range(n):
+        if i and i % 200 == 0:
+            base += rng.randint(-20000, 20000)
+        if rng.random() < outlier_rate:
+            yield base + rng.choice((-1, 1)) * rng.randint(5000, 200000)
+        else:
+            yield base + int(rng.gauss(0, 150))
+
+
+def _check(window_size, readings):
+    """Compares the sliding window against the sort-based mean recomputed over the same values."""
+    window = RobustWindow(window_size)
+    recent = deque(maxlen=window_size)
+    worst = 0.0
+    for raw in readings:
+        window.push(raw)
+        recent.append(float(raw))
+        diff = abs(window.robust_mean() - _legacy_robust_mean(list(recent)))
+        worst = max(worst, diff)
+    return worst
+
+
+def _legacy_robust_mean(values):
+    # The sort-per-call WeightSensor._robust_mean that RobustWindow replaced
+    if len(values) < 4:
+        return float(median(values))
+    s = sorted(values)
+    n = len(s)
+    q1 = s[n // 4]
+    q3 = s[(3 * n) // 4]
+    iqr = q3 - q1
+    if iqr == 0:
+        return float(median(s))
+    lo = q1 - 1.5 * iqr
+    hi = q3 + 1.5 * iqr
+    filtered = [v for v in s if lo <= v <= hi]
+    if len(filtered) < 3:
+        return float(median(s))
+    return sum(filtered) / len(filtered)
+
+
+def _time_legacy(window_size, readings):
+    recent = deque(maxlen=window_size)
+    start = time.perf_counter()
+    for raw in readings:
+        recent.append(float(raw))
+        _legacy_robust_mean(list(recent))
+    return time.perf_counter() - start
+
+
+def _time_window(window_size, readings):
+    window = RobustWindow(window_size)
+    start = time.perf_counter()
+    for raw in readings:
+        window.push(raw)
+        window.robust_mean()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Sliding robust mean vs re-sorting the window on every sample")
+    p.add_argument("--samples", type=int, default=20000)
+    p.add_argument("--windows", type=int, nargs="+", default=[12, 30, 40, 128])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    readings = list(_readings(args.samples, args.seed))
+    results = {}
+    for size in args.windows:
+        legacy = _time_legacy(size, readings)
+        sliding = _time_window(size, readings)
+        results[size] = {
+            "legacy_us_per_sample": 1e6 * legacy / len(readings),
+            "sliding_us_per_sample": 1e6 * sliding / len(readings),
+            "speedup": legacy / sliding if sliding else None,
+            "max_abs_diff": _check(size, readings[:2000]),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for size, r in results.items():
+            print(f"window {size:>4}: legacy {r['legacy_us_per_sample']:.2f} us, "
+                  f"sliding {r['sliding_us_per_sample']:.2f} us ({r['speedup']:.1f}x), "
+                  f"max diff {r['max_abs_diff']:.3g}")
+
+    ok = all(r["max_abs_diff"] <= 1e-6 for r in results.values())
+    if not ok:
+        print("Mismatch against the sort-based robust mean", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.data_queue import PRAGMAS, DataQueue
+from data.retention import Retention
+
+
+def _legacy_insert(queue, timestamp, fullness, weight, image_path):
+    """DataQueue.add_record's database work before the persistent connection and Retention."""
+    with sqlite3.connect(queue.db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO sensor_data (timestamp, fullness, weight, image_path, extra_images)
+            VALUES (?, ?, ?, ?, ?)
+        """, (timestamp, fullness, weight, image_path, None))
+        record_id = cursor.lastrowid
+
+        cursor.execute("SELECT COUNT(*) FROM sensor_data")
+        excess = cursor.fetchone()[0] - queue.max_records
+        if excess > 0:
+            cursor.execute("SELECT id, image_path, extra_images FROM sensor_data ORDER BY timestamp ASC LIMIT ?",
+                           (excess,))
+            records = cursor.fetchall()
+            queue._delete_image_files(records)
+            cursor.execute(f"DELETE FROM sensor_data WHERE id IN ({','.join('?' * len(records))})",
+                           [r[0] for r in records])
+        conn.commit()
+    return record_id
+
+
+def _reader(db_path, stop, counts):
+    """Polls the backlog like the uploader would, from another process."""
+    queue = DataQueue(db_path=db_path, image_dir=str(Path(db_path).parent / "images"))
+    while not stop.is_set():
+        try:
+            queue.upload_backlog()
+            queue.row_count()
+            counts[0] += 1
+        except sqlite3.OperationalError:
+            counts[1] += 1
+        time.sleep(0.01)
+    queue.close()
+
+
+def _run(variant, records, max_records, directory, with_reader):
+    db_path = str(Path(directory) / f"{variant}.db")
+    pragmas = {} if variant == "legacy" else dict(PRAGMAS, synchronous=variant.split("-")[1].upper())
+    queue = DataQueue(db_path=db_path, image_dir=str(Path(directory) / "images"),
+                      max_records=max_records, pragmas=pragmas)
+    # Retention runs inline here, so its amortized cost shows up in the latencies
+    retention = Retention(queue, delete_unuploaded=True)
+
+    stop = mp.Event()
+    counts = mp.Array("i", 2)
+    reader = None
+    if with_reader:
+        reader = mp.Process(target=_reader, args=(db_path, stop, counts), daemon=True)
+        reader.start()
+        time.sleep(0.5)
+
+    latencies = []
+    start = time.perf_counter()
+    # Keep the cleanup messages out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(records):
+            timestamp = datetime.now().isoformat()
+            t0 = time.perf_counter()
+            if variant == "legacy":
+                _legacy_insert(queue, timestamp, 50.0, 100.0, f"img_{i}.jpg")
+            else:
+                queue._insert_record(timestamp, 50.0, 100.0, f"img_{i}.jpg")
+                retention.run_once()
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    if reader:
+        stop.set()
+        reader.join(5)
+    queue.close()
+
+    latencies.sort()
+
+    def q(p):
+        return 1000.0 * latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    return {
+        "records": records,
+        "inserts_per_s": records / elapsed,
+        "p50_ms": q(0.50),
+        "p95_ms": q(0.95),
+        "p99_ms": q(0.99),
+        "max_ms": 1000.0 * latencies[-1],
+        "reader_polls": counts[0] if with_reader else None,
+        "reader_errors": counts[1] if with_reader else None,
+    }
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="DataQueue insert throughput and latency: a connection per record "
+                                            "in rollback-journal mode vs the persistent WAL connection")
+    p.add_argument("--records", type=int, default=2000)
+    p.add_argument("--max-records", type=int, default=1000, help="retention limit, as in DataStore")
+    p.add_argument("--dir", default=None, help="directory for the test databases (put it on the SD card)")
+    p.add_argument("--variants", nargs="+", default=["legacy", "wal-normal", "wal-full"],
+                   choices=["legacy", "wal-normal", "wal-full"])
+    p.add_argument("--reader", action="store_true", help="poll the database from a second process meanwhile")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        results = {v: _run(v, args.records, args.max_records, directory, args.reader) for v in args.variants}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for variant, r in results.items():
+            line = (f"{variant:>10}: {r['inserts_per_s']:8.0f} inserts/s, p50 {r['p50_ms']:.2f} ms, "
+                    f"p95 {r['p95_ms']:.2f} ms, p99 {r['p99_ms']:.2f} ms, max {r['max_ms']:.2f} ms")
+            if args.reader:
+                line += f", reader {r['reader_polls']} polls / {r['reader_errors']} errors"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
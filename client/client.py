@@ -1,5 +1,5 @@
 import requests
-import os
+from typing import Optional
 from datetime import datetime, timezone
 
 class ClientSender:
@@ -9,42 +9,69 @@ class ClientSender:
         self.sensor_lambda_url = sensor_lambda_url
         self.bin_id = bin_id
     
-    def send(self, fullness: float, weight: float, image_path: str) -> dict:
+    def send(self, fullness: Optional[float], weight: float, image_path: str = None) -> dict:
+        # The image file belongs to the data store and is left in place
+        success = False
+        result = None
+        status = None
+        error = None
+        reachable = True
+        local = False
         
         # Send to Front-End API (WasteRec)
         try:
-            data = {'weight': weight, 'fullness': fullness}
-            files = { 'image': ('image.jpg', open(image_path, 'rb'), 'image/jpeg')}
-            
-            response = requests.post(
-                f"{self.frontend_api_url}/record",
-                data=data,
-                files=files,
-                timeout=30
-            )
-            
-            files['image'][1].close()  
+            data = {'weight': weight}
+            if fullness is not None:
+                # Unknown when the ultrasonic reading failed; left out rather than sent as 0 (full)
+                data['fullness'] = fullness
+            if image_path:
+                try:
+                    image = open(image_path, 'rb')
+                except OSError:
+                    # Nothing was sent: the fault is this record's file, not the API
+                    local = True
+                    raise
+                with image:
+                    response = self._post(data, { 'image': ('image.jpg', image, 'image/jpeg')})
+            else:
+                # The image was dropped to free disk space; send the telemetry alone
+                response = self._post(data, None)
             
+            status = response.status_code
             if response.status_code == 200 or response.status_code == 201:
+                success = True
                 result = response.json()
                 print(f"[API] Sent to Front-End API successfully")
                 if result.get('inference_triggered'):
                     print(f"  Inference triggered: {result.get('inference_count')} total")
             else:
+                error = f"HTTP {response.status_code}"
                 print(f"[API] Front-End API returned status {response.status_code}")
                 
-        except requests.exceptions.ConnectionError as e:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = "connection error"
+            reachable = False
             print(f"[API] Connection error: Cannot reach {self.frontend_api_url}")
         except Exception as e:
-            print(f"[API] Send error to Front-End API: {e}")
-        
-        try:
-            os.remove(image_path)
-        except Exception as e:
-            print(f"[DATA] Failed to remove image file {image_path}: {e}")
+            error = str(e)
+            if local:
+                print(f"[API] Cannot read image {image_path}: {e}")
+            else:
+                print(f"[API] Send error to Front-End API: {e}")
         
         return {
-            'success': True,
-            'response': None
+            'success': success,
+            'response': result,
+            'status': status,
+            'error': error,
+            'reachable': reachable,
+            'local': local
         }
-
+    
+    def _post(self, data: dict, files) -> requests.Response:
+        return requests.post(
+            f"{self.frontend_api_url}/record",
+            data=data,
+            files=files,
+            timeout=30
+        )
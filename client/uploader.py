@@ -0,0 +1,193 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+# Rejections that will not succeed on a retry (everything else 4xx except timeouts and rate limits)
+RETRYABLE_STATUSES = (408, 425, 429)
+
+
+class Backoff:
+    """Exponential backoff with jitter.
+
+    Attempt n (from 0) waits between half and all of min(cap, base * 2**n),
+    so bins that lost Wi-Fi together do not all retry at the same moment.
+    """
+
+    def __init__(self, base: float = 10.0, cap: float = 900.0, rng=None):
+        self.base = base
+        self.cap = cap
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.cap, self.base * 2 ** min(attempt, 32))
+        return delay / 2 + self._rng.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    """Allows `rate` events per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Blocks until an event is allowed; False if `stop` was set meanwhile."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            if stop.wait((1.0 - self._tokens) / self.rate):
+                return False
+
+
+class Uploader:
+    """Uploads stored records from a background thread.
+
+    The store is a durable outbox: the main loop only stores records and
+    calls `notify()`, and this thread claims due records oldest first and
+    acks or nacks each one. A failed record is retried with exponential
+    backoff and jitter until `max_attempts`, and the uploader moves on to
+    the next one. Only a failure of the API itself pauses the whole
+    uploader with the same backoff: a 5xx or 429 answer, or no answer at
+    all, in which case no attempt is counted, so an outage of any length
+    never gives up on a record. Uploads are paced to `rate` per second
+    (bursts of `burst`), so a backlog from a Wi-Fi outage drains at a
+    controlled rate.
+    """
+
+    def __init__(self, store, sender, batch_size: int = 10,
+                 poll_interval: float = 5.0, retry_delay: float = 10.0, on_uploaded=None,
+                 max_delay: float = 900.0, max_attempts: int = 8, rate: float = 1.0, burst: int = 5,
+                 lease_s: float = 120.0):
+        self.store = store
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay  # First backoff step
+        self.on_uploaded = on_uploaded  # Called with (record_id, upload seconds)
+        self.max_attempts = max_attempts
+        self.lease_s = lease_s
+        self._backoff = Backoff(retry_delay, max_delay)
+        self._bucket = TokenBucket(rate, burst)
+
+        self.uploaded = 0
+        self.failed = 0
+        self.gave_up = 0
+        self.consecutive_failures = 0
+        self.last_upload_s = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        # Start with whatever was left over from the last run
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="uploader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self):
+        """Wakes the uploader after a new record was stored."""
+        self._wake.set()
+
+    def stats(self) -> dict:
+        pending, oldest = self.store.upload_backlog()
+        lag = (datetime.now() - datetime.fromisoformat(oldest)).total_seconds() if oldest else 0.0
+        return {
+            'pending': pending,
+            'lag_s': lag,
+            'uploaded': self.uploaded,
+            'failed': self.failed,
+            'gave_up': self.gave_up,
+            'consecutive_failures': self.consecutive_failures,
+            'last_upload_s': self.last_upload_s,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                ok = self.drain()
+            except Exception as e:
+                print(f"[Uploader] Error: {e}")
+                ok = False
+            if ok:
+                self.consecutive_failures = 0
+                continue
+            self.consecutive_failures += 1
+            pause = self._backoff.delay(self.consecutive_failures - 1)
+            print(f"[Uploader] Upload failed {self.consecutive_failures} time(s) in a row, "
+                  f"retrying in {pause:.0f}s")
+            self._stop.wait(pause)
+            self._wake.set()
+
+    def drain(self) -> bool:
+        """Uploads due records until none are left; False if the API failed or could not be reached."""
+        while not self._stop.is_set():
+            records = self.store.claim(self.batch_size, self.lease_s)
+            if not records:
+                return True
+            for i, record in enumerate(records):
+                if not self._bucket.wait(self._stop):
+                    self.store.release([r[0] for r in records[i:]])
+                    return True
+                if not self._upload(*record):
+                    self.store.release([r[0] for r in records[i + 1:]])
+                    return False
+        return True
+
+    def _upload(self, record_id, timestamp, fullness, weight, image_path, attempts) -> bool:
+        """Sends one claimed record and settles it; False on a failure worth pausing for."""
+        start = time.monotonic()
+        result = self.sender.send(fullness=fullness, weight=weight, image_path=image_path)
+        self.last_upload_s = time.monotonic() - start
+
+        if result['success']:
+            self.store.ack(record_id)
+            self.uploaded += 1
+            self.consecutive_failures = 0
+            if self.on_uploaded:
+                self.on_uploaded(record_id, self.last_upload_s)
+            lag = (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds()
+            print(f"[Uploader] Uploaded record {record_id} ({lag:.1f}s after capture)")
+            return True
+
+        self.failed += 1
+        if not result.get('reachable', True):
+            # The network is down, not this record: retry it after the pause
+            # without spending one of its attempts
+            self.store.release([record_id])
+            return False
+
+        attempts += 1
+        status = result.get('status')
+        if result.get('local'):
+            # This record's image could not be read; a file that is gone will not come back
+            give_up = not os.path.exists(image_path) or attempts >= self.max_attempts
+        else:
+            rejected = status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUSES
+            give_up = rejected or attempts >= self.max_attempts
+        self.store.nack(record_id, time.time() + self._backoff.delay(attempts - 1),
+                        result.get('error'), give_up=give_up)
+        if give_up:
+            self.gave_up += 1
+            print(f"[Uploader] Giving up on record {record_id} after {attempts} attempt(s): {result.get('error')}")
+        # Anything but a server error or rate limit is down to this record; keep going with the rest
+        return status is None or not (status >= 500 or status == 429)
@@ -1,19 +1,118 @@
+import errno
 import sqlite3
 import os
+import json
+import re
 import shutil
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
+
+from data.image_transport import ImageRef
+
+
+# Applied to every connection. WAL lets the uploader or another process read
+# while a record is written; synchronous=NORMAL only fsyncs at checkpoints,
+# which in WAL mode can lose the last commits on power loss but never corrupts.
+# auto_vacuum=INCREMENTAL lets retention give deleted rows' pages back to the
+# filesystem; it only takes on a new database, older ones are converted once.
+PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -8192,  # KiB
+    "mmap_size": 64 << 20,
+    "temp_store": "MEMORY",
+}
+
+# Values of the `uploaded` column
+UPLOAD_PENDING = 0
+UPLOAD_DONE = 1
+UPLOAD_GAVE_UP = 2  # Hit the attempt cap or was rejected; kept until requeued
+
+# Values of the `image_level` column, as disk pressure degrades a record's images
+IMAGE_FULL = 0
+IMAGE_DOWNSCALED = 1
+IMAGE_DROPPED = 2  # Only the telemetry is left
+
+INSERT_RECORD = """
+    INSERT INTO sensor_data (timestamp, fullness, weight, image_path, extra_images, image_bytes)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+COPY_CHUNK = 1 << 20
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _file_bytes(paths) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def _ingest_file(source, dest) -> str:
+    """Moves `source` into the store as `dest`, leaving exactly one copy.
+    
+    On the same filesystem the file is fsynced and renamed, so the image
+    data is never written again. Across filesystems it is streamed to a
+    temporary name, fsynced and renamed into place before the source is
+    removed. Returns "rename" or "copy".
+    """
+    source, dest = str(source), str(dest)
+    with open(source, "rb") as f:
+        os.fsync(f.fileno())
+    try:
+        os.replace(source, dest)
+        method = "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        part = f"{dest}.part"
+        with open(source, "rb") as src, open(part, "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(part, dest)
+        os.remove(source)
+        method = "copy"
+    # Make the new name itself survive a power cut
+    _fsync_dir(os.path.dirname(os.path.abspath(dest)))
+    return method
 
 
 class DataQueue:
     def __init__(self, db_path: str = "data.db", 
                  image_dir: str = "images",
-                 max_records: int = 1000):
+                 max_records: int = 1000,
+                 transport=None,
+                 pragmas: Optional[dict] = None):
         script_dir = Path(__file__).parent
         self.db_path = str(script_dir / db_path)
         self.image_dir = script_dir / Path(image_dir)
         self.max_records = max_records
+        self.transport = transport
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        
+        # One connection per process, shared by its threads (the uploader
+        # runs on its own) under a lock; reopened after a fork
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.RLock()
         
         self._setup_storage()
         self._init_database()
@@ -22,15 +121,34 @@ class DataQueue:
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         self.image_dir.mkdir(parents=True, exist_ok=True)
     
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._conn_pid != os.getpid():
+            # IMMEDIATE takes the write lock up front, so two writers wait on
+            # busy_timeout instead of failing to upgrade a read lock
+            conn = sqlite3.connect(self.db_path, timeout=self.pragmas.get("busy_timeout", 5000) / 1000,
+                                   isolation_level="IMMEDIATE", check_same_thread=False,
+                                   cached_statements=64)
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+    
     def _init_database(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sensor_data (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT NOT NULL,
-                    fullness REAL NOT NULL,
+                    fullness REAL,
                     weight REAL NOT NULL,
                     image_path TEXT NOT NULL,
                     uploaded INTEGER DEFAULT 0,
@@ -38,81 +156,366 @@ class DataQueue:
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # NULL when the ultrasonic stage had no valid reading
+            self._drop_not_null(cursor, "fullness")
             
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
                 ON sensor_data(timestamp DESC)
             """)
             
-            conn.commit()
+            self._ensure_column(cursor, "extra_images", "TEXT")
+            # Outbox state: when a pending record may be tried again and when
+            # an uploader claimed it
+            self._ensure_column(cursor, "next_attempt_at", "REAL DEFAULT 0")
+            self._ensure_column(cursor, "claimed_at", "REAL")
+            self._ensure_column(cursor, "last_error", "TEXT")
+            # Bytes of the record's image files on disk, so the store's size is known without walking it
+            if self._ensure_column(cursor, "image_bytes", "INTEGER DEFAULT 0"):
+                self._backfill_image_bytes(cursor)
+            self._ensure_column(cursor, "image_level", f"INTEGER DEFAULT {IMAGE_FULL}")
+            
+            # Only pending records are indexed, so the outbox stays small to scan
+            # however many uploaded records the store keeps
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_upload_pending
+                ON sensor_data(id, next_attempt_at, claimed_at) WHERE uploaded = 0
+            """)
+            
+            # Row count and image bytes kept by triggers, so retention never
+            # needs COUNT(*) or SUM()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sensor_data_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    row_count INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO sensor_data_stats (id, row_count)
+                SELECT 0, COUNT(*) FROM sensor_data
+            """)
+            if self._ensure_column(cursor, "image_bytes", "INTEGER NOT NULL DEFAULT 0", table="sensor_data_stats"):
+                cursor.execute("""
+                    UPDATE sensor_data_stats
+                    SET image_bytes = (SELECT COALESCE(SUM(image_bytes), 0) FROM sensor_data)
+                    WHERE id = 0
+                """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS sensor_data_count_insert AFTER INSERT ON sensor_data
+                BEGIN
+                    UPDATE sensor_data_stats SET row_count = row_count + 1 WHERE id = 0;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS sensor_data_count_delete AFTER DELETE ON sensor_data
+                BEGIN
+                    UPDATE sensor_data_stats SET row_count = row_count - 1 WHERE id = 0;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS sensor_data_bytes_insert AFTER INSERT ON sensor_data
+                BEGIN
+                    UPDATE sensor_data_stats SET image_bytes = image_bytes + NEW.image_bytes WHERE id = 0;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS sensor_data_bytes_delete AFTER DELETE ON sensor_data
+                BEGIN
+                    UPDATE sensor_data_stats SET image_bytes = image_bytes - OLD.image_bytes WHERE id = 0;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS sensor_data_bytes_update AFTER UPDATE OF image_bytes ON sensor_data
+                BEGIN
+                    UPDATE sensor_data_stats SET image_bytes = image_bytes + NEW.image_bytes - OLD.image_bytes
+                    WHERE id = 0;
+                END
+            """)
+        
+        if str(self.pragmas.get("auto_vacuum", "")).upper() == "INCREMENTAL":
+            with self._lock:
+                conn = self._connection()
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    print("[DataQueue] Enabling incremental vacuum, rewriting the database once")
+                    conn.execute("VACUUM")
+    
+    @staticmethod
+    def _ensure_column(cursor, name: str, declaration: str, table: str = "sensor_data") -> bool:
+        """Adds the column if it is missing; True if it was added."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        if name in {row[1] for row in cursor.fetchall()}:
+            return False
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+        return True
+    
+    @staticmethod
+    def _drop_not_null(cursor, name: str, table: str = "sensor_data") -> bool:
+        """Lets the column hold NULL if it is declared NOT NULL; True if the table was rebuilt.
+        
+        SQLite cannot alter a column's constraints, so the table is copied
+        into a new one and renamed back. Its indexes and triggers go with
+        the old table; run this before creating them.
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        if not any(row[1] == name and row[3] for row in cursor.fetchall()):
+            return False
+        print(f"[DataQueue] Allowing NULL in {table}.{name}, rebuilding the table once")
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        sql = cursor.fetchone()[0]
+        sql = re.sub(rf"(\b{name}\s+\w+)\s+NOT NULL", r"\1", sql, count=1)
+        sql = re.sub(r"^CREATE TABLE\s+\S+", f"CREATE TABLE {table}_rebuild", sql, count=1)
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        sequence = cursor.fetchone()
+        cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {table}_rebuild SELECT * FROM {table}")
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+        if sequence is not None:
+            # Ids of deleted records are not handed out again
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+        return True
+    
+    @staticmethod
+    def _backfill_image_bytes(cursor):
+        # One-off for databases from before image sizes were recorded
+        cursor.execute("SELECT id, image_path, extra_images FROM sensor_data")
+        sizes = [(_file_bytes([image_path] + (json.loads(extra_images) if extra_images else [])), record_id)
+                 for record_id, image_path, extra_images in cursor.fetchall()]
+        cursor.executemany("UPDATE sensor_data SET image_bytes = ? WHERE id = ?", sizes)
     
-    def add_record(self, fullness: float, weight: float, 
-                   image_path: str, timestamp: Optional[str] = None) -> int:
+    def add_record(self, fullness: Optional[float], weight: float, 
+                   image_path, timestamp: Optional[str] = None,
+                   extra_image_paths: Sequence[str] = ()) -> int:
         if timestamp is None:
             timestamp = datetime.now().isoformat()
         
         dest_image_path = self._save_image(image_path, timestamp)
+        extra_images = self._save_extra_images(extra_image_paths, timestamp)
         
-        with sqlite3.connect(self.db_path) as conn:
+        image_bytes = _file_bytes([dest_image_path, *extra_images])
+        return self._insert_record(timestamp, fullness, weight, str(dest_image_path), extra_images, image_bytes)
+    
+    def _insert_record(self, timestamp: str, fullness: Optional[float], weight: float,
+                       image_path: str, extra_images: Sequence[str] = (), image_bytes: int = 0) -> int:
+        with self._lock, self._connection() as conn:
             cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO sensor_data (timestamp, fullness, weight, image_path)
-                VALUES (?, ?, ?, ?)
-            """, (timestamp, fullness, weight, str(dest_image_path)))
-            
+            cursor.execute(INSERT_RECORD, (timestamp, fullness, weight, image_path,
+                                           json.dumps(extra_images) if extra_images else None, image_bytes))
             record_id = cursor.lastrowid
-            
-            self._cleanup_old_records(cursor)
-            conn.commit()
         
         return record_id
     
-    def _save_image(self, source_path: str, timestamp: str) -> Path:
+    def _save_image(self, source, timestamp: str, suffix: str = "") -> Path:
+        """`source` is a file path, or an ImageRef whose bytes are written straight from shared memory."""
         safe_timestamp = timestamp.replace(':', '-').replace('.', '_')
-        image_filename = f"img_{safe_timestamp}.jpg"
+        image_filename = f"img_{safe_timestamp}{suffix}.jpg"
         dest_path = self.image_dir / image_filename
         
-        shutil.copy2(source_path, dest_path)
+        if isinstance(source, ImageRef):
+            self.transport.write_to(source, dest_path)
+        else:
+            _ingest_file(source, dest_path)
         
         return dest_path
     
-    def _cleanup_old_records(self, cursor):
-        cursor.execute("SELECT COUNT(*) FROM sensor_data")
-        count = cursor.fetchone()[0]
+    def _save_extra_images(self, source_paths: Sequence[str], timestamp: str) -> list:
+        saved = []
+        for i, source_path in enumerate(source_paths, start=1):
+            try:
+                saved.append(str(self._save_image(source_path, timestamp, suffix=f"_{i}")))
+            except Exception as e:
+                print(f"[DataQueue] Warning: Could not store image {source_path}: {e}")
+        return saved
+    
+    def upload_backlog(self) -> tuple:
+        """Number of records waiting for upload and the timestamp of the oldest one."""
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT COUNT(*), MIN(timestamp) FROM sensor_data WHERE uploaded = 0")
+            return cursor.fetchall()[0]
+    
+    def claim(self, limit: int = 10, lease_s: float = 120.0) -> list:
+        """Claims up to `limit` pending records that are due, oldest first.
         
-        if count <= self.max_records:
-            return
+        Returns (id, timestamp, fullness, weight, image_path, upload_attempts)
+        rows. Each must be settled with `ack`, `nack` or `release`; a claim
+        left unsettled expires after `lease_s`, so a crashed uploader's
+        records are picked up again.
+        """
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT id, timestamp, fullness, weight, image_path, upload_attempts FROM sensor_data
+                WHERE uploaded = 0 AND next_attempt_at <= ?
+                AND (claimed_at IS NULL OR claimed_at <= ?)
+                ORDER BY id ASC
+                LIMIT ?
+            """, (now, now - lease_s, limit))
+            records = cursor.fetchall()
+            cursor.executemany("UPDATE sensor_data SET claimed_at = ? WHERE id = ?",
+                               [(now, record[0]) for record in records])
+        return records
+    
+    def ack(self, record_id: int):
+        """Marks a claimed record as uploaded."""
+        with self._lock, self._connection() as conn:
+            conn.execute("""
+                UPDATE sensor_data
+                SET uploaded = ?, upload_attempts = upload_attempts + 1, claimed_at = NULL, last_error = NULL
+                WHERE id = ?
+            """, (UPLOAD_DONE, record_id))
+    
+    def nack(self, record_id: int, retry_at: float, error: Optional[str] = None, give_up: bool = False):
+        """Records a failed attempt; the record is due again at `retry_at` (time.time())."""
+        with self._lock, self._connection() as conn:
+            conn.execute("""
+                UPDATE sensor_data
+                SET uploaded = ?, upload_attempts = upload_attempts + 1, next_attempt_at = ?,
+                    claimed_at = NULL, last_error = ?
+                WHERE id = ?
+            """, (UPLOAD_GAVE_UP if give_up else UPLOAD_PENDING, retry_at, error, record_id))
+    
+    def release(self, record_ids: Sequence[int]):
+        """Returns claimed records to the outbox without counting an attempt."""
+        with self._lock, self._connection() as conn:
+            conn.executemany("UPDATE sensor_data SET claimed_at = NULL WHERE id = ?",
+                             [(record_id,) for record_id in record_ids])
+    
+    def requeue_gave_up(self) -> int:
+        """Makes records that were given up on pending again; returns how many."""
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute("""
+                UPDATE sensor_data SET uploaded = ?, upload_attempts = 0, next_attempt_at = 0
+                WHERE uploaded = ?
+            """, (UPLOAD_PENDING, UPLOAD_GAVE_UP))
+            return cursor.rowcount
+    
+    def row_count(self) -> int:
+        """Records in the table, from the counter the insert/delete triggers keep."""
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT row_count FROM sensor_data_stats WHERE id = 0")
+            return cursor.fetchall()[0][0]
+    
+    def image_bytes(self) -> int:
+        """Bytes of all stored images, from the counter the triggers keep."""
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT image_bytes FROM sensor_data_stats WHERE id = 0")
+            return cursor.fetchall()[0][0]
+    
+    def database_bytes(self) -> int:
+        """Size of the database in pages, free ones included."""
+        with self._lock:
+            conn = self._connection()
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            return page_count * conn.execute("PRAGMA page_size").fetchone()[0]
+    
+    def reclaim(self) -> int:
+        """Gives the database's free pages back to the filesystem; returns the bytes freed.
         
-        num_to_delete = count - self.max_records
-        records_to_delete = self._get_oldest_records(cursor, num_to_delete)
+        Frees nothing unless the database uses auto_vacuum=INCREMENTAL; without
+        it the pages of deleted rows are only reused by later inserts.
+        """
+        with self._lock:
+            conn = self._connection()
+            before = self.database_bytes()
+            # executescript steps the pragma to the end; execute() frees one page per call
+            conn.executescript("PRAGMA incremental_vacuum")
+            # The file only shrinks once the WAL is checkpointed into it
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            return before - self.database_bytes()
+    
+    def degrade_candidates(self, uploaded: bool, below_level: int, limit: int = 20,
+                           lease_s: float = 120.0) -> list:
+        """Oldest records whose images are above `below_level`, as (id, image_path, extra_images).
         
-        self._delete_image_files(records_to_delete)
-        self._delete_database_records(cursor, records_to_delete)
+        `uploaded` picks uploaded records, or else those still pending or given
+        up that no uploader holds a claim on younger than `lease_s`.
+        `extra_images` is already decoded to a list.
+        """
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute(f"""
+                SELECT id, image_path, extra_images FROM sensor_data
+                WHERE uploaded {"=" if uploaded else "!="} {UPLOAD_DONE} AND image_level < ?
+                AND (claimed_at IS NULL OR claimed_at <= ?)
+                ORDER BY id ASC
+                LIMIT ?
+            """, (below_level, time.time() - lease_s, limit))
+            return [(record_id, image_path, json.loads(extra_images) if extra_images else [])
+                    for record_id, image_path, extra_images in cursor.fetchall()]
+    
+    def set_images(self, record_id: int, image_path: str, extra_images: Sequence[str], level: int,
+                   lease_s: Optional[float] = None, image_bytes: Optional[int] = None) -> bool:
+        """Points a record at its degraded images and re-reads their size.
         
-        print(f"[DataQueue] Cleaned up {num_to_delete} old records")
-    
-    def _get_oldest_records(self, cursor, num_to_delete: int) -> list:
-        cursor.execute("""
-            SELECT id, image_path FROM sensor_data 
-            ORDER BY timestamp ASC 
-            LIMIT ?
-        """, (num_to_delete,))
+        `image_bytes` overrides the size read from the files, for images that
+        are only moved into place once the record is updated. With `lease_s`,
+        a record an uploader claimed less than `lease_s` ago is left alone.
+        Returns False if the record was not updated, in which case its old
+        files are still in use and must be kept.
+        """
+        if image_bytes is None:
+            image_bytes = _file_bytes([image_path, *extra_images]) if image_path else 0
+        unclaimed = "" if lease_s is None else " AND (claimed_at IS NULL OR claimed_at <= ?)"
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute(f"""
+                UPDATE sensor_data SET image_path = ?, extra_images = ?, image_bytes = ?, image_level = ?
+                WHERE id = ?{unclaimed}
+            """, (image_path, json.dumps(list(extra_images)) if extra_images else None,
+                  image_bytes, level, record_id, *(() if lease_s is None else (time.time() - lease_s,))))
+            return cursor.rowcount > 0
+    
+    def trim(self, keep: int, batch_size: int = 50, delete_unuploaded: bool = False,
+             lease_s: float = 120.0) -> int:
+        """Deletes the oldest records and their images until at most `keep` remain.
         
-        return cursor.fetchall()
+        Works up the id range in batches of `batch_size`, each its own short
+        transaction. Records not uploaded yet are skipped unless
+        `delete_unuploaded`, and even then not while an uploader holds a
+        claim on them younger than `lease_s`. Returns the number of records
+        deleted.
+        """
+        if delete_unuploaded:
+            pending = f" AND (uploaded = {UPLOAD_DONE} OR claimed_at IS NULL OR claimed_at <= {time.time() - lease_s!r})"
+        else:
+            pending = f" AND uploaded = {UPLOAD_DONE}"
+        deleted = 0
+        after = 0
+        while True:
+            with self._lock, self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT row_count FROM sensor_data_stats WHERE id = 0")
+                excess = cursor.fetchall()[0][0] - keep
+                if excess <= 0:
+                    break
+                cursor.execute(f"""
+                    SELECT id, image_path, extra_images FROM sensor_data
+                    WHERE id > ?{pending}
+                    ORDER BY id ASC
+                    LIMIT ?
+                """, (after, min(excess, batch_size)))
+                records = cursor.fetchall()
+                if not records:
+                    break
+                after = records[-1][0]
+                cursor.execute(f"DELETE FROM sensor_data WHERE id BETWEEN ? AND ?{pending}",
+                               (records[0][0], after))
+            # Files go after the commit: a crash leaves orphaned images, never rows without them
+            self._delete_image_files(records)
+            deleted += len(records)
+        return deleted
     
     def _delete_image_files(self, records: list):
-        for record_id, image_path in records:
-            try:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            except Exception as e:
-                print(f"[DataQueue] Warning: Could not delete image {image_path}: {e}")
-    
-    def _delete_database_records(self, cursor, records: list):
-        ids_to_delete = [record[0] for record in records]
-        placeholders = ','.join('?' * len(ids_to_delete))
-        cursor.execute(
-            f"DELETE FROM sensor_data WHERE id IN ({placeholders})", 
-            ids_to_delete
-        )
\ No newline at end of file
+        for record_id, image_path, extra_images in records:
+            paths = [image_path] + (json.loads(extra_images) if extra_images else [])
+            for path in paths:
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except Exception as e:
+                    print(f"[DataQueue] Warning: Could not delete image {path}: {e}")
@@ -1,24 +1,32 @@
 from data.data_queue import DataQueue
 from datetime import datetime
+from pathlib import Path
 import json
+from typing import Optional
 
 
 class DataStore:
-    def __init__(self, max_records: int = 1000):
+    def __init__(self, max_records: int = 1000, transport=None, root=None):
+        # `root` moves the database and images out of the data/ package directory
+        root = Path(root) if root else Path()
         self.queue = DataQueue(
-            db_path="data.db",
-            image_dir="images",
-            max_records=max_records
+            db_path=str(root / "data.db"),
+            image_dir=str(root / "images"),
+            max_records=max_records,
+            transport=transport
         )
     
-    def store(self, fullness: float, weight: float, image_path: str) -> int:
+    def store(self, fullness: Optional[float], weight: float, image_path,
+              extra_image_paths: list = ()) -> int:
         record_id = self.queue.add_record(
             fullness=fullness,
             weight=weight,
-            image_path=image_path
+            image_path=image_path,
+            extra_image_paths=extra_image_paths
         )
         
         print(f"[DATA] Stored record {record_id} locally")
         return record_id
-    
-    
+
+    def close(self):
+        self.queue.close()
@@ -0,0 +1,89 @@
+import multiprocessing as mp
+import os
+import queue
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+
+class ImageRef(NamedTuple):
+    slot: int
+    size: int
+
+
+class ImageTransport:
+    """Hands encoded images between processes through shared memory.
+
+    One shared block is split into fixed-size slots; free slot numbers travel
+    on a multiprocessing queue. A producer copies an encoded image into a slot
+    and sends the small ImageRef instead of a file path. The consumer reads the
+    bytes in place and releases the slot when done. Create it in the parent
+    before starting the processes that use it.
+    """
+
+    def __init__(self, slots: int = 12, slot_bytes: int = 4 << 20):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free = mp.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._owner_pid = os.getpid()
+
+    def __getstate__(self):
+        return {
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "name": self._shm.name,
+            "free": self._free,
+            "owner_pid": self._owner_pid,
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self._free = state["free"]
+        self._owner_pid = state["owner_pid"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+
+    def put(self, data, timeout: float = 1.0) -> ImageRef | None:
+        """Copies `data` into a free slot; None if it does not fit or no slot frees up in time."""
+        view = memoryview(data).cast("B")
+        size = view.nbytes
+        if size > self.slot_bytes:
+            return None
+        try:
+            slot = self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        offset = slot * self.slot_bytes
+        self._shm.buf[offset:offset + size] = view
+        return ImageRef(slot, size)
+
+    def view(self, ref: ImageRef) -> memoryview:
+        """The image bytes in place; only valid until the slot is released."""
+        offset = ref.slot * self.slot_bytes
+        return self._shm.buf[offset:offset + ref.size]
+
+    def write_to(self, ref: ImageRef, path) -> str:
+        path = str(path)
+        part = f"{path}.part"
+        with open(part, "wb") as f:
+            f.write(self.view(ref))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(part, path)
+        return path
+
+    def release(self, ref: ImageRef):
+        self._free.put(ref.slot)
+
+    def release_all(self, items):
+        """Releases every ImageRef among `items`; anything else (e.g. file paths) is ignored."""
+        for item in items or ():
+            if isinstance(item, ImageRef):
+                self.release(item)
+
+    def close(self):
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
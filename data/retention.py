@@ -0,0 +1,278 @@
+import os
+import shutil
+import threading
+
+import cv2
+
+from data.data_queue import IMAGE_DOWNSCALED, IMAGE_DROPPED, _file_bytes
+
+
+def _downscale(path: str, max_width: int, quality: int) -> str:
+    """Re-encodes a JPEG at most `max_width` wide next to it; returns the new file.
+
+    The original is left alone until the caller moves the new file over it.
+    If anything fails, nothing new is left on disk.
+    """
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Cannot read {path}")
+    height, width = image.shape[:2]
+    if width > max_width:
+        image = cv2.resize(image, (max_width, round(height * max_width / width)), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"Cannot encode {path}")
+    part = f"{path}.part"
+    try:
+        with open(part, "wb") as f:
+            f.write(buf)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        _remove(part)
+        raise
+    return part
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"[Retention] Could not delete image {path}: {e}")
+
+
+class Retention:
+    """Keeps the store under its record and disk limits from a background thread.
+
+    Inserts never clean up after themselves. Once the store holds more than
+    `max_records`, this thread trims it back to `max_records - headroom`,
+    oldest first, so the deletes are batched across many disposals instead
+    of paid on each one. Records that have not been uploaded yet are kept,
+    even over the limit, unless `delete_unuploaded` is set.
+
+    With a `byte_budget` for the stored images and/or a `min_free_bytes`
+    watermark for the filesystem, disk pressure is relieved in stages, each
+    only until the store is back under both limits (with 10% to spare):
+    drop the images of uploaded records, downscale the images of pending
+    ones, drop those too, and only then delete uploaded records' rows, as
+    long as that gives disk space back. The telemetry of pending records is
+    never deleted without `delete_unuploaded`, and a record an uploader has
+    claimed within `lease_s` is neither degraded nor deleted, so a send in
+    flight never loses its file.
+    """
+
+    STAGES = ("drop_uploaded_images", "downscale_pending_images", "drop_pending_images", "delete_records")
+
+    def __init__(self, queue, max_records: int = None, headroom: int = None,
+                 batch_size: int = 50, interval: float = 60.0, delete_unuploaded: bool = False,
+                 byte_budget: int = None, min_free_bytes: int = None,
+                 downscale_width: int = 1280, downscale_quality: int = 75, lease_s: float = 120.0,
+                 disk_usage=None):
+        self.queue = queue
+        self.max_records = queue.max_records if max_records is None else max_records
+        self.headroom = max(1, self.max_records // 10) if headroom is None else headroom
+        self.batch_size = batch_size
+        self.interval = interval
+        self.delete_unuploaded = delete_unuploaded
+        self.byte_budget = byte_budget
+        self.min_free_bytes = min_free_bytes
+        self.downscale_width = downscale_width
+        self.downscale_quality = downscale_quality
+        self.lease_s = lease_s  # The uploader's claim lease
+        self._disk_usage = disk_usage or shutil.disk_usage
+
+        self.deleted = 0
+        self.degraded = {stage: 0 for stage in self.STAGES}
+        self.stage = None  # Deepest stage the last pass needed
+        self._held_back = False
+        self._disk_held_back = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self):
+        """Wakes the thread after a record was stored."""
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            'records': self.queue.row_count(),
+            'image_bytes': self.queue.image_bytes(),
+            'free_bytes': self._free_bytes(),
+            'deleted': self.deleted,
+            'stage': self.stage,
+            **self.degraded,
+        }
+
+    def run_once(self) -> int:
+        """Trims the store if it is over a limit; returns the records deleted."""
+        deleted = self._trim_records()
+        if self.byte_budget is not None or self.min_free_bytes is not None:
+            deleted += self._relieve_disk()
+        return deleted
+
+    def _trim_records(self) -> int:
+        if self.queue.row_count() <= self.max_records:
+            self._held_back = False
+            return 0
+
+        deleted = self.queue.trim(max(0, self.max_records - self.headroom), self.batch_size,
+                                  self.delete_unuploaded, self.lease_s)
+        self.deleted += deleted
+        if deleted:
+            print(f"[Retention] Deleted {deleted} old records")
+
+        over = self.queue.row_count() - self.max_records
+        if over > 0 and not self._held_back:
+            print(f"[Retention] {over} records over the limit are waiting for upload, keeping them")
+        self._held_back = over > 0
+        return deleted
+
+    def _free_bytes(self):
+        return self._disk_usage(self.queue.image_dir).free
+
+    def _over(self, spare: float = 1.0) -> bool:
+        """True while the images exceed the budget or the disk is below the watermark.
+
+        `spare` > 1 asks for that much room beyond the limits, so a pass
+        that started does not stop right at the edge.
+        """
+        if self.byte_budget is not None and self.queue.image_bytes() > self.byte_budget / spare:
+            return True
+        return self.min_free_bytes is not None and self._free_bytes() < self.min_free_bytes * spare
+
+    def _relieve_disk(self) -> int:
+        if not self._over():
+            self.stage = None
+            self._disk_held_back = False
+            return 0
+
+        deleted = 0
+        for stage in self.STAGES:
+            self.stage = stage
+            while self._over(spare=1.1) and not self._stop.is_set():
+                if stage == "delete_records":
+                    n, freed = self._delete_for_space()
+                    deleted += n
+                else:
+                    n = freed = self._degrade(stage)
+                self.degraded[stage] += n
+                if not freed:
+                    break
+            if not self._over(spare=1.1):
+                break
+
+        over = self._over()
+        if not self._disk_held_back:
+            print(f"[Retention] Disk pressure handled up to {self.stage}: {self.queue.image_bytes() >> 20} MiB "
+                  f"of images, {self._free_bytes() >> 20} MiB free")
+            if over:
+                print("[Retention] Still over the disk limits; nothing left to degrade or delete would free space")
+        self._disk_held_back = over
+        return deleted
+
+    def _shortfall(self) -> int:
+        """Bytes the filesystem is short of the watermark, with 10% to spare."""
+        if self.min_free_bytes is None:
+            return 0
+        return max(0, round(self.min_free_bytes * 1.1) - self._free_bytes())
+
+    def _delete_for_space(self) -> tuple:
+        """Deletes one batch of records to free disk space; returns (deleted, bytes freed).
+
+        By this stage the rows hold no image bytes, so deleting them only
+        helps the free-space watermark, by the pages the database gives
+        back. Nothing is deleted when the whole database could not cover the
+        shortfall, and the caller stops once a batch frees nothing.
+        """
+        shortfall = self._shortfall()
+        if not shortfall or shortfall > self.queue.database_bytes():
+            return 0, 0
+        n = self.queue.trim(max(0, self.queue.row_count() - self.batch_size), self.batch_size,
+                            self.delete_unuploaded, self.lease_s)
+        self.deleted += n
+        freed = self.queue.reclaim() if n else 0
+        if n and not freed:
+            print(f"[Retention] Deleting {n} records freed no disk space, keeping the rest")
+        return n, freed
+
+    def _degrade(self, stage: str) -> int:
+        """Degrades one batch of records for `stage`; returns how many."""
+        if stage == "drop_uploaded_images":
+            records = self.queue.degrade_candidates(True, IMAGE_DROPPED, self.batch_size, self.lease_s)
+        elif stage == "downscale_pending_images":
+            records = self.queue.degrade_candidates(False, IMAGE_DOWNSCALED, self.batch_size, self.lease_s)
+        else:
+            records = self.queue.degrade_candidates(False, IMAGE_DROPPED, self.batch_size, self.lease_s)
+
+        degraded = 0
+        for record_id, image_path, extra_images in records:
+            paths = [p for p in [image_path, *extra_images] if p]
+            if stage == "downscale_pending_images":
+                # A file that cannot be downscaled (say the disk is too full
+                # for the copy) stays as it is, still counted in the budget;
+                # if nothing in the batch could be, the drop stage follows
+                parts = {}
+                for path in paths:
+                    try:
+                        parts[path] = _downscale(path, self.downscale_width, self.downscale_quality)
+                    except Exception as e:
+                        print(f"[Retention] Could not downscale {path}: {e}")
+                if not parts:
+                    continue
+                image_bytes = _file_bytes(parts.get(p, p) for p in paths)
+                # The copies only replace the originals once the same update
+                # that records their size has checked no uploader claimed it
+                if not self.queue.set_images(record_id, image_path, extra_images, IMAGE_DOWNSCALED,
+                                             self.lease_s, image_bytes):
+                    for part in parts.values():
+                        _remove(part)
+                    continue
+                replaced = True
+                for path, part in parts.items():
+                    try:
+                        os.replace(part, path)
+                    except OSError as e:
+                        print(f"[Retention] Could not replace {path}: {e}")
+                        _remove(part)
+                        replaced = False
+                if not replaced:
+                    # Count the originals that are still there
+                    self.queue.set_images(record_id, image_path, extra_images, IMAGE_DOWNSCALED)
+            else:
+                # Point the record away from its files before deleting them, in
+                # the same update that checks no uploader has claimed it since
+                if not self.queue.set_images(record_id, "", [], IMAGE_DROPPED, self.lease_s):
+                    continue
+                for path in paths:
+                    _remove(path)
+            degraded += 1
+        return degraded
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[Retention] Error: {e}")
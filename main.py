@@ -1,43 +1,131 @@
+import argparse
 import multiprocessing as mp
+import queue
 import time
 import sys
 import os
 
 # Sensor Script Imports
 from sensors.ir_sensor import ir_sensor_process
-from sensors.camera import camera_process
+from sensors.camera import camera_process, frame_buffers
 from sensors.ultrasonic import ultrasonic_process
 from sensors.weight import weight_process
+from sensors.joiner import StageJoiner
 from data.data_store import DataStore
+from data.retention import Retention
+from data.image_transport import ImageTransport
 from client.client import ClientSender
+from client.uploader import Uploader
+from metrics import MetricsCollector, MetricsServer, mark
+from sensors.hal import get_backend
+from sim.scenario import WORKLOADS
 
-def main():
-	store = DataStore(max_records=100)
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description="ZotBins sensor pipeline")
+	parser.add_argument("--sim", action="store_true", help="Run on simulated sensors instead of the Pi hardware")
+	parser.add_argument("--sim-disposals", type=int, default=10, help="Simulated disposals")
+	parser.add_argument("--sim-interval", type=float, default=20.0, help="Seconds between simulated disposals")
+	parser.add_argument("--sim-workload", choices=WORKLOADS, default="steady", help="Pattern of simulated disposals")
+	parser.add_argument("--sim-replay", default=None, help=".npy stack, video or image directory to loop as camera frames")
+	parser.add_argument("--api-url", default="", help="Frontend API URL uploads are sent to")
+	parser.add_argument("--data-dir", default=None, help="Directory for the database and images (default: data/)")
+	parser.add_argument("--metrics-port", type=int, default=None, help="Override the metrics port (0 picks a free one)")
+	parser.add_argument("--metrics-json", default=None, help="Override the metrics snapshot file")
+	parser.add_argument("--metrics-interval", type=float, default=None, help="Override the seconds between metrics samples")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	args = parse_args(argv)
+
+	# Shared-memory slots carrying encoded images from the camera to the store
+	transport = ImageTransport(slots=12, slot_bytes=4 << 20)
+	store = DataStore(max_records=100, transport=transport, root=args.data_dir)
 	sender = ClientSender(
-        frontend_api_url="",
+        frontend_api_url=args.api_url,
         photo_lambda_url="",
 		sensor_lambda_url="",
         bin_id=1
     )
-
-	# Queues between sensor processing
-	ir_to_camera = mp.Queue(maxsize=5)
-	camera_to_ultrasonic = mp.Queue(maxsize=5)
-	ultrasonic_to_weight = mp.Queue(maxsize=5)
-	final_results = mp.Queue(maxsize = 5) 
+	metrics = MetricsCollector()
 
 	# Pin Configurations (subject to change)
 	config = {
 		"ir_gpio_pin": 5, # IR sensor pin
 		"debounce_time" : 3.0, # Seconds to ignore after IR trigger
+		"ir_mode": "edge", # IR detection: edge (RPi.GPIO callbacks), pigpio (tick timestamps) or poll
 		"camera_duration": 10.0, # How long the camera runs for
+		"camera_detect_mode": "lores", # Stream used for motion detection: lores, decimate or main
+		"camera_detect_size": (640, 360), # Detection resolution (lores/decimate modes)
+		"camera_images": 5, # Images kept per disposal
+		"camera_buffer_mb": 256, # Peak memory for candidate frames; each image kept costs two 4K frames (~24 MB each), or one when single-buffered
+		"camera_background_interval": 0.5, # Seconds between background updates while idle
+		"camera_background_alpha": 0.05, # Background learning rate per update
+		"camera_jpeg_quality": 90, # JPEG quality for saved images
+		"camera_encoder_workers": 2, # Threads encoding and writing images
 		"ultrasonic_trig_pin" : 23,  # Ultrasonic Trigger Pin
 		"ultrasonic_echo_pin" : 24,  # Ultrasonic Echo Pin
 		"ultrasonic_samples" : 5,  # Number of Samples from Ultrasonic
 		"weight_dout_pin" : 5, # Weight Data Out Pin
 		"weight_sck_pin" : 6, # Serial Clock Input Pin
-		"weight_samples" :  10 # Total Weight Samples
+		"weight_samples" :  10, # Total Weight Samples
+		"weight_use_pigpio": True, # Clock the HX711 with pigpio waveforms (falls back to RPi.GPIO)
+		"weight_continuous": True, # Sample continuously in the background instead of on request
+		"weight_delay_s": 3.0, # Weigh samples taken this long after the IR trigger
+		"weight_mode": "settle", # settle: read until stable, fixed: always weight_samples
+		"weight_settle_delay_s": None, # Start looking for a stable reading this long after the trigger (None: weight_delay_s)
+		"weight_settle_tolerance_g": 5.0, # Max spread of a stable window
+		"weight_max_samples": 40, # Give up waiting for stability after this many samples
+		"weight_settle_window": 5, # Consecutive samples that must agree
+		"weight_track_drift": True, # Follow zero drift while idle (needs weight_continuous)
+		"stage_queue_depth": 5, # Triggers a stage can fall behind by before it misses one
+		"stage_timeouts": { # Seconds after the trigger to wait for each stage
+			"camera": None, # None: long enough for every capture that can be queued ahead
+			"ultrasonic": 5.0,
+			"weight": 10.0,
+		},
+		"metrics_host": "127.0.0.1", # Interface serving /metrics and /metrics.json (None disables)
+		"metrics_port": 9108,
+		"metrics_json": "data/metrics.json", # Snapshot file rewritten every metrics_interval (None disables)
+		"metrics_interval": 5.0, # Seconds between queue depth / CPU / RSS samples
+		"upload_rate": 1.0, # Uploads per second when draining a backlog
+		"upload_burst": 5, # Uploads allowed back to back before upload_rate applies
+		"upload_retry_delay": 10.0, # First retry delay; doubles per failure, with jitter
+		"upload_max_delay": 900.0, # Longest retry delay
+		"upload_max_attempts": 8, # Give up on a record after this many failed attempts
+		"retention_batch": 50, # Records deleted per transaction when the store is over its limit
+		"retention_delete_unuploaded": False, # Allow deleting records that were never uploaded
+		"store_byte_budget": 4 << 30, # Most bytes of images to keep (None disables)
+		"store_min_free_bytes": 1 << 30, # Free disk space to keep (None disables)
 	}
+	for key in ("metrics_port", "metrics_json", "metrics_interval"):
+		if getattr(args, key) is not None:
+			config[key] = getattr(args, key)
+	# Fail here rather than in the camera process if the frames cannot fit
+	frame_buffers(config["camera_buffer_mb"], config["camera_images"])
+	if config["stage_timeouts"]["camera"] is None:
+		# The camera captures one trigger at a time, so a trigger queued behind
+		# others waits out each of their captures before its own, plus encoding
+		config["stage_timeouts"]["camera"] = config["camera_duration"] * (config["stage_queue_depth"] + 1) + 5.0
+
+	# The IR trigger fans out to every stage; each stage reports its partial
+	# result to one queue and the joiner merges them by trigger
+	ir_to_camera = mp.Queue(maxsize=config["stage_queue_depth"])
+	ir_to_ultrasonic = mp.Queue(maxsize=config["stage_queue_depth"])
+	ir_to_weight = mp.Queue(maxsize=config["stage_queue_depth"])
+	stage_results = mp.Queue(maxsize=3 * config["stage_queue_depth"])
+
+	# Every process gets the same backend; the sim one replays one shared scenario
+	scenario = None
+	if args.sim:
+		from sim import SimScenario
+		scenario = SimScenario.workload(args.sim_workload, args.sim_disposals, args.sim_interval,
+		                                ir_pin=config["ir_gpio_pin"],
+		                                trig_pin=config["ultrasonic_trig_pin"],
+		                                echo_pin=config["ultrasonic_echo_pin"],
+		                                replay=args.sim_replay).begin()
+		print(f"[Main] Simulating {args.sim_disposals} {args.sim_workload} disposals, interval {args.sim_interval}s")
+	backend = get_backend("sim" if args.sim else "hw", scenario)
 
 	proccesses = []
 
@@ -45,7 +133,8 @@ def main():
 	print("Creating IR Sensor Process")
 	p1 = mp.Process(
 		target = ir_sensor_process,
-		args=(ir_to_camera, config['ir_gpio_pin'], config['debounce_time']),
+		args=([ir_to_camera, ir_to_ultrasonic, ir_to_weight],
+		      config['ir_gpio_pin'], config['debounce_time'], config['ir_mode'], None, backend),
 		name="ir_sensor"		
 	)
 	proccesses.append(p1)	
@@ -54,7 +143,11 @@ def main():
 	print("Creating Camera Process")
 	p2 = mp.Process(
 		target = camera_process,
-		args=(ir_to_camera, camera_to_ultrasonic, config["camera_duration"]),
+		args=(ir_to_camera, stage_results, config["camera_duration"],
+		      config["camera_detect_mode"], config["camera_detect_size"],
+		      config["camera_images"], config["camera_buffer_mb"], config["camera_background_interval"],
+		      config["camera_background_alpha"], config["camera_jpeg_quality"],
+		      config["camera_encoder_workers"], transport, backend, args.data_dir),
 		name="camera"		
 	)
 	proccesses.append(p2)	
@@ -63,8 +156,9 @@ def main():
 	print("Creating Ultrasonic Process")
 	p3 = mp.Process(
 		target = ultrasonic_process,
-		args=(camera_to_ultrasonic, ultrasonic_to_weight,
-		      config["ultrasonic_trig_pin"], config["ultrasonic_echo_pin"], config["ultrasonic_samples"]),
+		args=(ir_to_ultrasonic, stage_results,
+		      config["ultrasonic_trig_pin"], config["ultrasonic_echo_pin"], config["ultrasonic_samples"],
+		      None, backend),
 		name = "ultrasonic"
 	)
 	proccesses.append(p3)
@@ -73,9 +167,13 @@ def main():
 	print("Creating Weight Process")
 	p4 = mp.Process(
 		target = weight_process,
-		args=(ultrasonic_to_weight, final_results, 
+		args=(ir_to_weight, stage_results,
 		      config["weight_dout_pin"], config["weight_sck_pin"],
-		      config["weight_samples"]),
+		      config["weight_samples"], config["weight_use_pigpio"],
+		      config["weight_continuous"], config["weight_delay_s"],
+		      config["weight_mode"], config["weight_settle_delay_s"],
+		      config["weight_settle_tolerance_g"], config["weight_max_samples"],
+		      config["weight_settle_window"], config["weight_track_drift"], backend),
 		name="weight"
 	)
 	proccesses.append(p4)
@@ -87,23 +185,136 @@ def main():
 		time.sleep(0.2)
 
 
+	for name, q in (("ir_to_camera", ir_to_camera), ("ir_to_ultrasonic", ir_to_ultrasonic),
+	                ("ir_to_weight", ir_to_weight), ("stage_results", stage_results)):
+		metrics.watch_queue(name, q)
+	metrics.watch_process("main", os.getpid())
+	for p in proccesses:
+		metrics.watch_process(p.name, p.pid)
+	server = None
+	if config["metrics_host"]:
+		server = MetricsServer(metrics, config["metrics_host"], config["metrics_port"])
+		server.start()
+
+	# Uploads run on their own thread from what has been stored
+	uploader = Uploader(store.queue, sender, on_uploaded=metrics.uploaded,
+	                    retry_delay=config["upload_retry_delay"], max_delay=config["upload_max_delay"],
+	                    max_attempts=config["upload_max_attempts"],
+	                    rate=config["upload_rate"], burst=config["upload_burst"])
+	uploader.start()
+	# Old records are deleted in batches from their own thread
+	retention = Retention(store.queue, batch_size=config["retention_batch"],
+	                      delete_unuploaded=config["retention_delete_unuploaded"],
+	                      byte_budget=config["store_byte_budget"], min_free_bytes=config["store_min_free_bytes"],
+	                      lease_s=uploader.lease_s)
+	retention.start()
+
 	print("All Proccesses Running!")
 	print("--------------------------------Ready--------------------------------")
 
-	while True:
-		try:
-			result = final_results.get(timeout=1.0)
-			print(result)
+	joiner = StageJoiner(config["stage_timeouts"],
+	                     on_drop=lambda partial: discard_images(transport, partial.get('images')))
+
+	metrics_json = config["metrics_json"] and os.path.join(os.path.dirname(os.path.abspath(__file__)), config["metrics_json"])
+	last_stats = last_sample = time.monotonic()
+	try:
+		while True:
+			try:
+				partial = stage_results.get(timeout=0.5)
+				completed = [joiner.add(partial)]
+			except queue.Empty:
+				completed = []
+
+			for result in completed + joiner.expire():
+				if result is None:
+					continue
+				try:
+					handle_result(store, uploader, metrics, result)
+					retention.notify()
+				finally:
+					transport.release_all(result.get('images'))
+
+			if time.monotonic() - last_sample >= config["metrics_interval"]:
+				last_sample = time.monotonic()
+				sample_metrics(metrics, joiner, uploader, retention, metrics_json)
+
+			if time.monotonic() - last_stats >= 60.0:
+				last_stats = time.monotonic()
+				stats = uploader.stats()
+				print(f"[Uploader] {stats['pending']} pending, lag {stats['lag_s']:.1f}s, "
+				      f"{stats['uploaded']} uploaded, {stats['failed']} failed, {stats['gave_up']} given up")
+	except KeyboardInterrupt:
+		print("[Main] Shutting down")
+	finally:
+		uploader.stop()
+		retention.stop()
+		metrics.gauge("ir_triggers", joiner.last_trigger)
+		if metrics_json:
+			metrics.write_json(metrics_json)
+		if server:
+			server.stop()
+		store.close()
+		transport.close()
+
+
+def discard_images(transport, images):
+	"""Frees the images of a result that will not be stored: shared-memory slots and fallback tmp files."""
+	transport.release_all(images)
+	for image in images or ():
+		if isinstance(image, (str, os.PathLike)):
+			try:
+				os.remove(image)
+			except OSError as e:
+				print(f"[Main] Could not delete dropped image {image}: {e}")
+
+
+def sample_metrics(metrics, joiner, uploader, retention, json_path):
+	metrics.sample()
+	metrics.gauge("joiner_pending", len(joiner))
+	metrics.gauge("ir_triggers", joiner.last_trigger)
+	stats = uploader.stats()
+	metrics.gauge("upload_pending", stats['pending'])
+	metrics.gauge("upload_lag_seconds", stats['lag_s'])
+	stats = retention.stats()
+	metrics.gauge("store_records", stats['records'])
+	metrics.gauge("store_image_bytes", stats['image_bytes'])
+	metrics.gauge("store_free_bytes", stats['free_bytes'])
+	if json_path:
+		metrics.write_json(json_path)
+
+
+def handle_result(store, uploader, metrics, result):
+	print(result)
+	mark(result, 'joined')
+	print(f"[Main] Trigger #{result['trigger']} joined {time.monotonic() - result['trigger_time']:.2f}s after the trigger")
+	metrics.count("triggers")
+	for stage in result.get('missing', []):
+		metrics.count(f"missing_{stage}")
 
-			record_id = store.store(fullness=result['distance'], weight=result['weight'], image_path=result['image'])
+	if not result.get('image'):
+		print("[Main] No image for this trigger, not storing")
+		metrics.record(result.get('ts', {}))
+		return
 
-			print("[API] Send to API")
-			result = sender.send(fullness=result['distance'], weight=result['weight'], image_path=result['image'])
+	# Stored as unknown unless the ultrasonic stage got a valid reading: a
+	# timeout's 0 cm would read as a full bin
+	distance = result.get('distance') if result.get('distance_status') == "ok" else None
+	if distance is None:
+		print(f"[Main] No valid distance ({result.get('distance_status', 'missing')}), fullness stored as unknown")
+		metrics.count("distance_unknown")
+	weight = result.get('weight', 0.0)
+	extra_images = [p for p in result.get('images', []) if p != result['image']]
+	record_id = store.store(fullness=distance, weight=weight, image_path=result['image'],
+	                        extra_image_paths=extra_images)
+	mark(result, 'stored')
+	metrics.record(result['ts'])
+	metrics.count("records_stored")
+	metrics.track_upload(record_id, result['trigger_time'])
+	uploader.notify()
 
-			print("--------------------------------Done Sending--------------------------------")
+	print("--------------------------------Done Storing--------------------------------")
 
-		except  mp.queues.Empty:
-			continue
 
-main()
+if __name__ == "__main__":
+	main()
 
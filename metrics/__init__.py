@@ -0,0 +1,13 @@
+from .collector import Histogram, MetricsCollector
+from .server import MetricsServer
+from .timing import BOUNDARIES, SPANS, mark, spans
+
+__all__ = [
+    "BOUNDARIES",
+    "Histogram",
+    "MetricsCollector",
+    "MetricsServer",
+    "SPANS",
+    "mark",
+    "spans",
+]
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+import psutil
+
+from .timing import spans
+
+
+class Histogram:
+    """Cumulative latency buckets plus a window of recent values for quantiles."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+    def __init__(self, buckets=BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def quantile(self, q: float) -> float | None:
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': max(self._recent) if self._recent else None,
+        }
+
+
+class MetricsCollector:
+    """Stage latencies, counters and gauges for the whole pipeline.
+
+    Lives in the main process. Stage timings arrive with each record's 'ts'
+    stamps; queue depths and per-process CPU/RSS are sampled by `sample()`.
+    """
+
+    def __init__(self, max_tracked: int = 1000):
+        self.started = time.time()
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, float] = {}
+        self.max_tracked = max_tracked
+        self._queues = {}
+        self._processes: dict[str, psutil.Process] = {}
+        self._uploads: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def record(self, ts: dict):
+        for name, seconds in spans(ts).items():
+            self.observe(name, seconds)
+
+    def track_upload(self, record_id: int, trigger_time: float):
+        """Remembers a stored record's trigger time until `uploaded` is called for it."""
+        with self._lock:
+            self._uploads[record_id] = trigger_time
+            while len(self._uploads) > self.max_tracked:
+                del self._uploads[next(iter(self._uploads))]
+
+    def uploaded(self, record_id: int, upload_s: float):
+        self.observe("upload", upload_s)
+        with self._lock:
+            trigger_time = self._uploads.pop(record_id, None)
+        if trigger_time is not None:
+            self.observe("trigger_to_upload", time.monotonic() - trigger_time)
+
+    def watch_queue(self, name: str, q):
+        self._queues[name] = q
+
+    def watch_process(self, name: str, pid: int):
+        try:
+            proc = psutil.Process(pid)
+            proc.cpu_percent(None)  # The first call only sets the baseline
+            self._processes[name] = proc
+        except psutil.Error as e:
+            print(f"[Metrics] Cannot watch {name} ({pid}): {e}")
+
+    def sample(self):
+        for name, q in self._queues.items():
+            try:
+                self.gauge(f"queue_depth.{name}", q.qsize())
+            except NotImplementedError:
+                pass
+        for name, proc in list(self._processes.items()):
+            try:
+                with proc.oneshot():
+                    self.gauge(f"cpu_percent.{name}", proc.cpu_percent(None))
+                    self.gauge(f"rss_bytes.{name}", proc.memory_info().rss)
+            except psutil.Error:
+                self.gauge(f"cpu_percent.{name}", 0.0)
+                self.gauge(f"rss_bytes.{name}", 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'time': time.time(),
+                'uptime_s': time.time() - self.started,
+                'latency': {name: h.snapshot() for name, h in self.histograms.items()},
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+            }
+
+    def prometheus(self) -> str:
+        """The metrics in Prometheus' text exposition format."""
+        lines = []
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                label = f'stage="{name}"'
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'zotbins_stage_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'zotbins_stage_seconds_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f'zotbins_stage_seconds_sum{{{label}}} {h.sum}')
+                lines.append(f'zotbins_stage_seconds_count{{{label}}} {h.count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'zotbins_{name}_total {value}')
+            for key, value in sorted(self.gauges.items()):
+                name, _, target = key.partition(".")
+                if target:
+                    lines.append(f'zotbins_{name}{{name="{target}"}} {value}')
+                else:
+                    lines.append(f'zotbins_{name} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        path = str(path)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
@@ -0,0 +1,41 @@
+import time
+
+
+# Stage boundaries stamped into a pipeline message's 'ts' dict, in order.
+# All values are time.monotonic(), which every process on the host shares.
+BOUNDARIES = (
+    "ir_edge",
+    "camera_start", "camera_enter", "camera_exit", "camera_saved",
+    "ultrasonic_start", "ultrasonic_done",
+    "weight_start", "weight_done",
+    "joined", "stored", "uploaded",
+)
+
+# Reported durations, as (from, to) boundary pairs
+SPANS = {
+    "ir_to_camera": ("ir_edge", "camera_start"),
+    "camera_detect": ("camera_start", "camera_exit"),
+    "camera_encode": ("camera_exit", "camera_saved"),
+    "ultrasonic": ("ultrasonic_start", "ultrasonic_done"),
+    "weight": ("weight_start", "weight_done"),
+    "trigger_to_join": ("ir_edge", "joined"),
+    "store": ("joined", "stored"),
+    "trigger_to_store": ("ir_edge", "stored"),
+    "trigger_to_upload": ("ir_edge", "uploaded"),
+}
+
+
+def mark(data: dict, boundary: str, t: float | None = None) -> float:
+    """Stamps `boundary` into data['ts'] (now unless `t` is given) and returns the time."""
+    t = time.monotonic() if t is None else t
+    data.setdefault('ts', {})[boundary] = t
+    return t
+
+
+def spans(ts: dict) -> dict:
+    """Durations in seconds for every span whose two boundaries are present."""
+    return {
+        name: ts[end] - ts[start]
+        for name, (start, end) in SPANS.items()
+        if start in ts and end in ts
+    }
@@ -1,49 +1,138 @@
 import time
-import cv2
-from picamera2 import Picamera2
+import queue
+from concurrent.futures import wait as wait_futures
 import numpy as np
 from pathlib import Path
-import libcamera
 
-
-def camera_process(input_queue, output_queue, duration=10):
+from metrics.timing import mark
+from sensors.hal import HardwareBackend
+from sensors.vision import (
+    BackgroundModel,
+    DetectionGeometry,
+    FrameAcquirer,
+    FrameSelector,
+    ImageEncoder,
+    ImageSequence,
+    laplacian_sharpness,
+    object_detected_contiguous,
+)
+
+
+FULL_SIZE = (3840, 2160)
+DETECT_SIZE = (640, 360)
+
+# "lores": detect on the ISP's low-res YUV stream (luminance plane only)
+# "decimate": detect on a software-downscaled copy of the main stream
+# "main": detect on the full-resolution frame
+DETECT_MODES = ("lores", "decimate", "main")
+
+
+def frame_buffers(buffer_mb, images_per_disposal, full_size=FULL_SIZE):
+    """How many selectors of `images_per_disposal` full-size frames fit in `buffer_mb`.
+
+    Two let one disposal be captured while the last one's frames are still
+    being encoded; one means each capture waits for the previous encode.
+    Raises ValueError if not even one disposal's frames fit.
+    """
+    width, height = full_size
+    needed = images_per_disposal * width * height * 3
+    buffers = min(2, buffer_mb * 1024 * 1024 // needed)
+    if buffers < 1:
+        raise ValueError(f"camera buffer of {buffer_mb} MB cannot hold {images_per_disposal} frames "
+                         f"at {width}x{height}; needs at least {-(-needed // (1024 * 1024))} MB")
+    return buffers
+
+
+def camera_process(input_queue, output_queue, duration=10,
+                   detect_mode="lores", detect_size=DETECT_SIZE, images_per_disposal=5, buffer_mb=256,
+                   background_interval=0.5, background_alpha=0.05,
+                   jpeg_quality=90, encoder_workers=2, transport=None, backend=None, data_root=None):
     print("[Camera] Starting...")
     
-    camera = _initialize_camera()
-    tmp_dir = _setup_temp_directory()
-    ref_gray = _capture_reference_background(camera)
+    if detect_mode not in DETECT_MODES:
+        raise ValueError(f"detect_mode must be one of {DETECT_MODES}")
+    buffers = frame_buffers(buffer_mb, images_per_disposal)
+    
+    geometry = DetectionGeometry(
+        full_size=FULL_SIZE,
+        detect_size=FULL_SIZE if detect_mode == "main" else tuple(detect_size),
+    )
+    camera, acquirer = _initialize_camera(detect_mode, geometry, *(backend or HardwareBackend()).camera())
+    tmp_dir = _setup_temp_directory(data_root)
+    background = _capture_reference_background(acquirer, background_alpha)
     ignore_duration = 0.1
+    print(f"[Camera] Detecting on {detect_mode} stream at {geometry.detect_size[0]}x{geometry.detect_size[1]}")
+    
+    width, height = geometry.full_size
+    # With two selectors, one is captured into while the other's frames are
+    # still being encoded; together they stay within buffer_mb
+    selectors = [FrameSelector(images_per_disposal, (height, width, 3)) for _ in range(buffers)]
+    pending = [[] for _ in selectors]
+    turn = 0
+    if buffers == 1:
+        print(f"[Camera] {buffer_mb} MB does not fit {images_per_disposal} frames per disposal twice "
+              f"at {width}x{height}, capturing single-buffered")
+    print(f"[Camera] Keeping {images_per_disposal} frames per disposal "
+          f"({sum(s.nbytes for s in selectors) / 1e6:.0f} MB {'double' if buffers == 2 else 'single'}-buffered)")
+    
+    encoder = ImageEncoder(workers=encoder_workers, quality=jpeg_quality)
+    sequence = ImageSequence(tmp_dir)
 
     try:
         while True:
-            data = input_queue.get()
+            try:
+                data = input_queue.get(timeout=background_interval)
+            except queue.Empty:
+                # Track lighting changes while idle so detection does not drift
+                _update_background(acquirer, background)
+                continue
+            
             print(f"[Camera] Trigger #{data.get('trigger', '?')}")
+            mark(data, 'camera_start')
             
+            selector = selectors[turn]
+            wait_futures(pending[turn])
             result = _capture_object_pass(
-                camera, ref_gray, duration, ignore_duration
+                acquirer, background.reference, selector, duration, ignore_duration
             )
             
             if result is not None:
-                mid_frame, enter_time, exit_time = result
-                filename = _save_image(mid_frame, tmp_dir)
-                data['image'] = filename
+                selected, enter_time, exit_time = result
                 data['enter_time'] = enter_time
                 data['exit_time'] = exit_time
                 data['transit_duration'] = exit_time - enter_time
-                output_queue.put(data)
-                print(f"[Camera] Saved {filename} (transit: {exit_time - enter_time:.3f}s)")
+                mark(data, 'camera_enter', _wall_to_monotonic(enter_time))
+                mark(data, 'camera_exit', _wall_to_monotonic(exit_time))
+                
+                filenames = sequence.next_paths(len(selected))
+                best = max(range(len(selected)), key=lambda i: selected[i][2])
+                items = [(frame, filename) for (_, frame, _), filename in zip(selected, filenames)]
+                on_done = lambda saved, data=data, best=best: _forward_saved(saved, best, data, output_queue)
+                if transport is not None:
+                    # Images go to the store through shared memory; the
+                    # filenames are only used if a slot cannot be had
+                    pending[turn] = encoder.publish_batch(items, transport, on_done)
+                else:
+                    pending[turn] = encoder.save_batch(items, on_done)
+                turn = (turn + 1) % len(selectors)
             else:
                 print(f"[Camera] No object detected in {duration}s window")
+                data['stage'] = 'camera'
+                data['image'] = None
+                mark(data, 'camera_exit')
+                output_queue.put(data)
                 
     except KeyboardInterrupt:
         print("[Camera] Shutting down")
     finally:
+        encoder.close(wait=True)
         camera.stop()
 
 
-def _initialize_camera():
-    camera = Picamera2()
-    config = camera.create_still_configuration(main={"size": (3840, 2160)})
+def _initialize_camera(detect_mode, geometry, picamera2_cls, mapped_array):
+    camera = picamera2_cls()
+    acquirer = FrameAcquirer(camera, geometry, detect_mode, mapped_array)
+    config = camera.create_still_configuration(**acquirer.stream_config())
     camera.configure(config) 
     
     camera.set_controls({
@@ -54,139 +143,94 @@ def _initialize_camera():
     })
     
     camera.start()
-    return camera
+    return camera, acquirer
 
 
-def _setup_temp_directory():
-    script_dir = Path(__file__).parent
-    tmp_dir = script_dir.parent / "data" / "tmp"
+def _setup_temp_directory(data_root=None):
+    # Next to the store's images, like DataStore's `root`, so they can be renamed into place
+    data_dir = Path(__file__).parent.parent / "data"
+    tmp_dir = data_dir / (data_root or "") / "tmp"
     tmp_dir.mkdir(parents=True, exist_ok=True)
     
     print(f"[Camera] Temp directory: {tmp_dir}")
     return tmp_dir
 
 
-def _capture_reference_background(camera):
+def _capture_reference_background(acquirer, alpha):
     print("[Camera] Calibrating background...")
     time.sleep(1)
     
-    ref_request = camera.capture_request()
-    ref_frame = np.ascontiguousarray(ref_request.make_array('main'))
-    ref_request.release()
-    
-    ref_gray = cv2.cvtColor(ref_frame, cv2.COLOR_RGB2GRAY)
-    return cv2.GaussianBlur(ref_gray, (21, 21), 0)
+    background = BackgroundModel(acquirer.geometry, alpha=alpha)
+    _update_background(acquirer, background)
+    return background
+
 
+def _update_background(acquirer, background):
+    with acquirer.capture() as (_, gray_frame):
+        background.update(gray_frame)
 
-def _capture_object_pass(camera, ref_gray, duration, ignore_duration,
-                         min_contour_area=2000, exit_grace=0.3):
-    frames = [] 
+
+def _capture_object_pass(acquirer, ref_gray, selector, duration, ignore_duration,
+                         exit_grace=0.3):
+    selector.reset()
     enter_time = None
     last_detected_time = None
     start_time = time.time()
     
     while (time.time() - start_time) < duration:
-        bgr_frame = _capture_frame(camera)
-        now = time.time()
-        elapsed = now - start_time
-        
-        if elapsed < ignore_duration:
-            continue
-        
-        detected = _object_detected_contiguous(bgr_frame, ref_gray, min_contour_area)
-        
-        if detected:
-            if enter_time is None:
-                enter_time = now
-                print(f"[Camera] Object entered at +{elapsed:.3f}s")
+        with acquirer.capture() as (main_frame, gray_frame):
+            now = time.time()
+            elapsed = now - start_time
+            
+            if elapsed < ignore_duration:
+                continue
+            
+            detected = object_detected_contiguous(gray_frame, ref_gray, acquirer.geometry)
             
-            last_detected_time = now
-            frames.append((now, bgr_frame.copy()))
+            if detected:
+                if enter_time is None:
+                    enter_time = now
+                    print(f"[Camera] Object entered at +{elapsed:.3f}s")
+                
+                last_detected_time = now
+                # Only kept candidates are copied out of the camera buffer
+                slot = selector.offer(now, laplacian_sharpness(gray_frame))
+                if slot is not None:
+                    np.copyto(slot, main_frame)
         
-        else:
-            if enter_time is not None:
-                time_since_last = now - last_detected_time
-                if time_since_last >= exit_grace:
-                    exit_time = last_detected_time
-                    print(f"[Camera] Object exited at +{exit_time - start_time:.3f}s")
-                    
-                    mid_frame = _select_middle_frame(frames, enter_time, exit_time)
-                    return mid_frame, enter_time, exit_time
+        if not detected and enter_time is not None:
+            time_since_last = now - last_detected_time
+            if time_since_last >= exit_grace:
+                exit_time = last_detected_time
+                print(f"[Camera] Object exited at +{exit_time - start_time:.3f}s")
+                
+                return selector.selected(exit_time), enter_time, exit_time
     
     # Duration expired — if we saw an object but it never "exited", use what we have
-    if enter_time is not None and frames:
+    if enter_time is not None and len(selector):
         exit_time = last_detected_time
         print(f"[Camera] Duration expired, using last detection as exit at +{exit_time - start_time:.3f}s")
-        mid_frame = _select_middle_frame(frames, enter_time, exit_time)
-        return mid_frame, enter_time, exit_time
+        return selector.selected(exit_time), enter_time, exit_time
     
     return None
 
 
-def _capture_frame(camera):
-    request = camera.capture_request()
-    array_data = request.make_array('main')
-    request.release()
-    
-    return cv2.cvtColor(np.ascontiguousarray(array_data), cv2.COLOR_RGB2BGR)
-
-
-def _object_detected_contiguous(bgr_frame, ref_gray, min_contour_area=2000):
-    
-    gray_frame = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
-    gray_frame = cv2.GaussianBlur(gray_frame, (21, 21), 0)
-    
-    frame_delta = cv2.absdiff(ref_gray, gray_frame)
-    thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
-    
-    # Dilate to close small gaps in contiguous regions
-    thresh = cv2.dilate(thresh, None, iterations=2)
-    
-    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    for contour in contours:
-        if cv2.contourArea(contour) >= min_contour_area:
-            return True
-    
-    return False
+def _wall_to_monotonic(t):
+    return time.monotonic() - (time.time() - t)
 
 
-def _select_middle_frame(frames, enter_time, exit_time):
-    mid_time = (enter_time + exit_time) / (2**0.5)
-    
-    best_frame = None
-    best_diff = float('inf')
-    
-    for timestamp, frame in frames:
-        diff = abs(timestamp - mid_time)
-        if diff < best_diff:
-            best_diff = diff
-            best_frame = frame
-    
-    return best_frame
-
-
-def _save_image(image, tmp_dir):
-    img_id = _get_next_image_number(tmp_dir)
-    filename = tmp_dir / f"image_{img_id}.jpg"
-    cv2.imwrite(str(filename), image)
-    return str(filename)
-
-
-def _get_next_image_number(tmp_dir):
-    if not tmp_dir.exists():
-        return 1
-    
-    files = [f for f in tmp_dir.iterdir() 
-             if f.name.startswith("image_") and f.name.endswith(".jpg")]
-    
-    if not files:
-        return 1
-    
-    nums = []
-    for f in files:
-        num_str = f.stem.replace("image_", "")
-        if num_str.isdigit():
-            nums.append(int(num_str))
+def _forward_saved(saved, best, data, output_queue):
+    data['stage'] = 'camera'
+    mark(data, 'camera_saved')
+    filenames = [f for f in saved if f is not None]
+    if not filenames:
+        print(f"[Camera] Trigger #{data.get('trigger', '?')}: no images could be saved")
+        data['image'] = None
+        output_queue.put(data)
+        return
     
-    return max(nums) + 1 if nums else 1
\ No newline at end of file
+    filename = saved[best] if saved[best] is not None else filenames[0]
+    data['image'] = filename
+    data['images'] = filenames
+    output_queue.put(data)
+    print(f"[Camera] Saved {len(filenames)} images, best {filename} (transit: {data['transit_duration']:.3f}s)")
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from functools import partial
+from pathlib import Path
+
+
+class HardwareBackend:
+    """The real Raspberry Pi libraries, imported only when a stage asks for them."""
+
+    name = "hw"
+
+    def gpio(self):
+        import RPi.GPIO as GPIO
+        return GPIO
+
+    def pigpio(self):
+        import pigpio
+        return pigpio
+
+    def camera(self):
+        """Returns (Picamera2 class, MappedArray class)."""
+        from picamera2 import MappedArray, Picamera2
+        return Picamera2, MappedArray
+
+    def hx711(self, dt_gpio, sck_gpio):
+        """An HX711 driver, or None to let WeightSensor pick one itself."""
+        return None
+
+    def calibration_file(self, bin_id):
+        from sensors.weight_sensor import default_calibration_path
+        return default_calibration_path(bin_id)
+
+
+class SimBackend:
+    """Simulated sensors driven by one SimScenario.
+
+    Each process builds its own fakes from the (picklable) scenario, so the
+    backend can be passed to mp.Process like any other argument.
+    """
+
+    name = "sim"
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+
+    def gpio(self):
+        from sim import SimGPIO
+
+        gpio = SimGPIO()
+        gpio.play(self.scenario.ir_pin, self.scenario.beam_script(), start=self.scenario.start)
+        return gpio
+
+    def pigpio(self):
+        from sim import EchoModel, FakePi
+        from sim import pigpio as sim_pigpio
+
+        scenario = self.scenario
+
+        def _pi():
+            pi = FakePi()
+            pi.attach_echo(scenario.trig_pin, scenario.echo_pin, EchoModel(
+                distance_cm=scenario.distance_cm,
+                noise_cm=scenario.echo_noise_cm,
+                timeout_rate=scenario.echo_timeout_rate,
+            ))
+            # IR edges for the pigpio IR mode
+            pi.set_pull_up_down(scenario.ir_pin, sim_pigpio.PUD_UP)
+            for offset, level in scenario.beam_script():
+                pi._schedule(scenario.start + offset, scenario.ir_pin, level)
+            return pi
+
+        return sim_pigpio.module(_pi)
+
+    def camera(self):
+        from sim import FakeMappedArray, FakePicamera2
+
+        scenario = self.scenario
+        return partial(FakePicamera2, source=scenario.frame_source(), fps=scenario.fps,
+                       size=tuple(scenario.frame_size)), FakeMappedArray
+
+    def hx711(self, dt_gpio, sck_gpio):
+        from sim import SimHX711
+
+        s = self.scenario
+        return SimHX711(offset=s.hx_offset, scale=s.hx_scale, load_g=s.load_g,
+                        drift_per_s=s.hx_drift_per_s, noise=s.hx_noise,
+                        rate_hz=s.hx_rate_hz, seed=s.seed, t0=s.start)
+
+    def calibration_file(self, bin_id):
+        # The simulated load cell's true calibration, so weights come out in grams
+        path = Path(tempfile.gettempdir()) / f"zotbins-sim-{os.getpid()}" / f"{bin_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"offset": self.scenario.hx_offset, "scale": self.scenario.hx_scale}))
+        return path
+
+
+def get_backend(name="hw", scenario=None):
+    if name == "hw":
+        return HardwareBackend()
+    if name == "sim":
+        if scenario is None:
+            raise ValueError("The sim backend needs a scenario")
+        return SimBackend(scenario)
+    raise ValueError(f"Unknown backend {name!r}")
@@ -1,42 +1,183 @@
 import time
+import queue
 import multiprocessing as mp
-import RPi.GPIO as GPIO
 
-def ir_sensor_process(output_queue, gpio_pin=17, debounce_time=3):
+from metrics.timing import mark
+
+# "edge": RPi.GPIO edge callbacks, "pigpio": pigpio callbacks stamped with the
+# daemon's microsecond tick, "poll": sample the pin every 10 ms
+IR_MODES = ("edge", "pigpio", "poll")
+
+
+def ir_sensor_process(output_queue, gpio_pin=17, debounce_time=3, mode="edge", gpio=None, backend=None,
+                      stop=None):
+    """`output_queue` may be a list of queues; every stage then gets each trigger.
+
+    Runs until interrupted, or until the `stop` event (if given) is set.
+    """
     print("[IR] Started")
-    
-    # Initialize GPIO
-    GPIO.setwarnings(False)
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(gpio_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-    
+
+    if gpio is None and backend is not None:
+        gpio = backend.pigpio() if mode == "pigpio" else backend.gpio()
+
+    output_queues = output_queue if isinstance(output_queue, (list, tuple)) else [output_queue]
+
+    source = _open_source(mode, gpio_pin, gpio)
+    print(f"[IR] Watching GPIO {gpio_pin} ({source.name})")
+
     trigger_count = 0
-    last_trigger_time = 0
-    last_state = GPIO.input(gpio_pin)
+    last_trigger_time = float("-inf")
 
     try:
-        while True:
-            current_state = GPIO.input(gpio_pin)
-            
-            # Determine if beam is triggered
-            if _is_beam_broken(current_state, last_state):
-                current_time = time.time()
-                
-                if _is_debounced(current_time, last_trigger_time, debounce_time):
-                    trigger_count += 1
-                    last_trigger_time = current_time
-                    
-                    output_queue.put({'trigger': trigger_count})
-                    print("--------------------------------Started Cycle--------------------------------")
-                    print(f"[IR] Trigger #{trigger_count}")
-            
-            last_state = current_state
-            time.sleep(0.01)
-            
+        while stop is None or not stop.is_set():
+            edge_time = source.wait_for_break(timeout=1.0)
+            if edge_time is None:
+                continue
+
+            if _is_debounced(edge_time, last_trigger_time, debounce_time):
+                trigger_count += 1
+                last_trigger_time = edge_time
+
+                data = {'trigger': trigger_count, 'trigger_time': edge_time}
+                mark(data, 'ir_edge', edge_time)
+                _fan_out(output_queues, data)
+                print("--------------------------------Started Cycle--------------------------------")
+                print(f"[IR] Trigger #{trigger_count} ({(time.monotonic() - edge_time) * 1000:.1f} ms after edge)")
+
     except KeyboardInterrupt:
         print("[IR] Shutting down")
     finally:
-        GPIO.cleanup()
+        source.close()
+
+
+def _fan_out(output_queues, data):
+    if len(output_queues) == 1:
+        output_queues[0].put(data)
+        return
+    # A stage that has fallen behind misses this trigger (the joiner times it
+    # out) rather than holding back the others
+    for i, q in enumerate(output_queues):
+        try:
+            q.put_nowait({**data, 'ts': dict(data['ts'])})
+        except queue.Full:
+            print(f"[IR] Stage queue {i} full, dropped trigger #{data['trigger']}")
+
+
+def _open_source(mode, gpio_pin, gpio=None):
+    if mode not in IR_MODES:
+        raise ValueError(f"mode must be one of {IR_MODES}")
+
+    if mode == "pigpio":
+        if gpio is None:
+            import pigpio as gpio
+        return _PigpioEdgeSource(gpio, gpio_pin)
+
+    if gpio is None:
+        import RPi.GPIO as gpio
+
+    gpio.setwarnings(False)
+    gpio.setmode(gpio.BCM)
+    gpio.setup(gpio_pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+
+    if mode == "edge":
+        try:
+            return _EdgeSource(gpio, gpio_pin)
+        except RuntimeError as e:
+            print(f"[IR] Edge detection unavailable ({e}), falling back to polling")
+
+    return _PollingSource(gpio, gpio_pin)
+
+
+class _PollingSource:
+    name = "polling"
+
+    def __init__(self, gpio, pin, interval=0.01):
+        self.gpio = gpio
+        self.pin = pin
+        self.interval = interval
+        self.last_state = gpio.input(pin)
+
+    def wait_for_break(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            current_state = self.gpio.input(self.pin)
+            broken = _is_beam_broken(current_state, self.last_state)
+            self.last_state = current_state
+            if broken:
+                return time.monotonic()
+            time.sleep(self.interval)
+        return None
+
+    def close(self):
+        self.gpio.cleanup()
+
+
+class _EdgeSource:
+    name = "edge callbacks"
+
+    def __init__(self, gpio, pin):
+        self.gpio = gpio
+        self.pin = pin
+        self._edges = queue.Queue()
+        # Stamp in the callback thread, before any queueing delay
+        gpio.add_event_detect(pin, gpio.FALLING,
+                              callback=lambda channel: self._edges.put(time.monotonic()))
+
+    def wait_for_break(self, timeout):
+        try:
+            return self._edges.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        try:
+            self.gpio.remove_event_detect(self.pin)
+        finally:
+            self.gpio.cleanup()
+
+
+class _PigpioEdgeSource:
+    name = "pigpio tick callbacks"
+
+    def __init__(self, pigpio, pin):
+        self.pigpio = pigpio
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("Failed to connect to pigpio daemon")
+
+        self.pi.set_mode(pin, pigpio.INPUT)
+        self.pi.set_pull_up_down(pin, pigpio.PUD_UP)
+        self._edges = queue.Queue()
+        self._anchor()
+        self._callback = self.pi.callback(pin, pigpio.FALLING_EDGE, self._on_edge)
+
+    def _anchor(self):
+        # Ticks are microseconds since daemon start and wrap every ~72 minutes,
+        # so re-anchor against the monotonic clock on every idle timeout
+        self._anchor_tick = self.pi.get_current_tick()
+        self._anchor_time = time.monotonic()
+
+    def _on_edge(self, gpio, level, tick):
+        self._edges.put(tick)
+
+    def _tick_to_monotonic(self, tick):
+        delta = self.pigpio.tickDiff(self._anchor_tick, tick)
+        if delta > 0x7FFFFFFF:
+            # Edge happened just before the anchor was taken
+            delta -= 1 << 32
+        return self._anchor_time + delta / 1e6
+
+    def wait_for_break(self, timeout):
+        try:
+            tick = self._edges.get(timeout=timeout)
+        except queue.Empty:
+            self._anchor()
+            return None
+        return self._tick_to_monotonic(tick)
+
+    def close(self):
+        self._callback.cancel()
+        self.pi.stop()
 
 
 def _is_beam_broken(current_state, last_state):
@@ -44,4 +185,4 @@ def _is_beam_broken(current_state, last_state):
 
 
 def _is_debounced(current_time, last_trigger_time, debounce_time):
-    return current_time - last_trigger_time >= debounce_time
\ No newline at end of file
+    return current_time - last_trigger_time >= debounce_time
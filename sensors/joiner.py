@@ -0,0 +1,68 @@
+import time
+from collections import deque
+
+
+class StageJoiner:
+    """Merges the partial results the stages report for each trigger.
+
+    Every stage gets the IR trigger at the same time and reports a dict tagged
+    with its 'stage'. A record is released once all stages have reported, or
+    once every stage still missing is past its timeout (seconds after the
+    trigger); the missing stages are then listed under 'missing'.
+    """
+
+    def __init__(self, timeouts: dict[str, float], remember: int = 64, on_drop=None):
+        self.timeouts = dict(timeouts)
+        self.on_drop = on_drop
+        self._pending: dict[int, dict] = {}
+        self._reported: dict[int, set[str]] = {}
+        self._done: deque[int] = deque(maxlen=remember)
+        self.last_trigger = 0  # Highest trigger number seen, i.e. the IR stage's trigger count so far
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, partial: dict) -> dict | None:
+        """Folds in one stage's result; returns the merged record if it is now complete."""
+        trigger = partial.get('trigger')
+        stage = partial.get('stage')
+        if isinstance(trigger, int):
+            self.last_trigger = max(self.last_trigger, trigger)
+        if trigger in self._done:
+            print(f"[Join] Late {stage} result for trigger #{trigger} dropped")
+            if self.on_drop:
+                self.on_drop(partial)
+            return None
+
+        record = self._pending.setdefault(trigger, {})
+        reported = self._reported.setdefault(trigger, set())
+        record.setdefault('trigger_time', time.monotonic())
+        for key, value in partial.items():
+            if key == 'ts':
+                record.setdefault('ts', {}).update(value)
+            elif key != 'stage':
+                record[key] = value
+        reported.add(stage)
+
+        if reported.issuperset(self.timeouts):
+            return self._release(trigger)
+        return None
+
+    def expire(self, now: float | None = None) -> list[dict]:
+        """Releases the records whose missing stages have all timed out."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        for trigger, record in list(self._pending.items()):
+            missing = set(self.timeouts) - self._reported[trigger]
+            if all(now >= record['trigger_time'] + self.timeouts[s] for s in missing):
+                expired.append(self._release(trigger, sorted(missing)))
+        return expired
+
+    def _release(self, trigger, missing=()) -> dict:
+        record = self._pending.pop(trigger)
+        del self._reported[trigger]
+        self._done.append(trigger)
+        record['missing'] = list(missing)
+        if missing:
+            print(f"[Join] Trigger #{trigger}: timed out waiting for {', '.join(missing)}")
+        return record
@@ -2,7 +2,15 @@ import argparse
 import json
 import time
 
-from weight_sensor import CalibrationError, HX711NotReadyError, HX711ReadError, WeightSensor, default_calibration_path
+from weight_sensor import (
+    CalibrationError,
+    Ema,
+    HX711NotReadyError,
+    HX711ReadError,
+    RobustWindow,
+    WeightSensor,
+    default_calibration_path,
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -17,6 +25,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--no-pigpio", action="store_true")
     p.add_argument("--raw", action="store_true")
     p.add_argument("--include-raw", action="store_true")
+    p.add_argument("--ema", type=float, default=None, help="smooth output with an EMA of this alpha")
     return p.parse_args()
 
 
@@ -25,6 +34,8 @@ def main() -> int:
     cal_file = args.calibration_file or str(default_calibration_path(args.bin_id))
     ws = WeightSensor(dt_gpio=args.dt, sck_gpio=args.sck, gain=args.gain, use_pigpio=not args.no_pigpio, calibration_file=cal_file)
     period = 1.0 / max(args.hz, 0.1)
+    window = RobustWindow(max(1, args.samples))
+    ema = Ema(args.ema) if args.ema else None
 
     boot = {
         "status": "boot",
@@ -35,6 +46,7 @@ def main() -> int:
         "samples": args.samples,
         "hz": args.hz,
         "use_pigpio": (not args.no_pigpio),
+        "ema": args.ema,
         "calibration_file": str(ws.calibration_file),
         "offset": ws.offset,
         "scale": ws.scale,
@@ -43,19 +55,32 @@ def main() -> int:
     }
     print(json.dumps(boot), flush=True)
 
+    # The sampler keeps the HX711 busy at its own rate; each tick only folds
+    # the readings that arrived since the last one into the sliding window
+    ws.start_sampling()
+    last_sample = None
     try:
         next_t = time.monotonic()
         while True:
             ts = time.time()
             try:
+                fresh = [(t, r) for t, r in ws.samples_since(last_sample) if t != last_sample]
+                if fresh:
+                    last_sample = fresh[-1][0]
+                    window.extend(r for _, r in fresh)
+                if not len(window):
+                    raise HX711NotReadyError("No samples yet")
+
+                raw = window.robust_mean()
+                if ema is not None:
+                    raw = ema.update(raw)
                 if args.raw:
-                    raw = ws.read_raw_avg(samples=args.samples, settle_ms=2)
                     out = {"status": "ok", "bin_id": args.bin_id, "ts": ts, "raw": raw}
                 else:
-                    grams = ws.read_grams(samples=args.samples)
+                    grams = ws.to_grams(raw)
                     out = {"status": "ok", "bin_id": args.bin_id, "ts": ts, "weight_grams": grams}
                     if args.include_raw:
-                        out["raw"] = ws.read_raw_avg(samples=max(3, min(args.samples, 8)), settle_ms=0)
+                        out["raw"] = raw
                 print(json.dumps(out), flush=True)
             except (HX711NotReadyError, HX711ReadError) as e:
                 print(json.dumps({"status": "not_ready", "bin_id": args.bin_id, "ts": ts, "error": str(e)}), flush=True)
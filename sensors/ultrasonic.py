@@ -1,51 +1,159 @@
-import pigpio
 import time
+import threading
+from dataclasses import dataclass
+from statistics import median
 
+from metrics.timing import mark
 
-def ultrasonic_process(input_queue, output_queue, trig_pin, echo_pin, samples):
+
+SPEED_OF_SOUND_CM_S = 34300
+MIN_PING_INTERVAL_S = 0.06  # HC-SR04 needs ~60 ms between measurement cycles
+ECHO_TIMEOUT_S = 0.04  # Longer than the echo from the 400 cm maximum range
+MIN_RANGE_CM = 2.0
+MAX_RANGE_CM = 400.0
+
+
+@dataclass
+class RangeResult:
+    distance: float
+    status: str  # "ok", "timeout" (no echo) or "invalid" (out of range / inconsistent)
+    valid: int
+    samples: int
+    spread: float = 0.0
+
+
+def ultrasonic_process(input_queue, output_queue, trig_pin, echo_pin, samples, pigpio=None, backend=None):
     print("[Ultrasonic] Started")
-    
-    pi = _initialize_pigpio(trig_pin, echo_pin)
-    if not pi:
+
+    if pigpio is None and backend is not None:
+        pigpio = backend.pigpio()
+
+    ranger = _initialize_ranger(trig_pin, echo_pin, pigpio)
+    if not ranger:
         return
-    
+
     try:
         while True:
-            data = input_queue.get()            
-            distance = _measure_distance(pi, trig_pin, echo_pin)
-            data['distance'] = distance
+            data = input_queue.get()
+            mark(data, 'ultrasonic_start')
+            result = ranger.measure(samples)
+            data['distance'] = result.distance
+            data['distance_status'] = result.status
+            data['stage'] = 'ultrasonic'
+            mark(data, 'ultrasonic_done')
             output_queue.put(data)
-            print(f"[Ultrasonic] Distance: {distance:.2f} cm")
-            
+            print(f"[Ultrasonic] Distance: {result.distance:.2f} cm "
+                  f"({result.status}, {result.valid}/{result.samples} valid, spread {result.spread:.2f} cm)")
+
     except KeyboardInterrupt:
         print("[Ultrasonic] Shutting down")
     finally:
-        pi.stop()
+        ranger.close()
+
 
+def _initialize_ranger(trig_pin, echo_pin, pigpio=None):
+    if pigpio is None:
+        import pigpio
 
-def _initialize_pigpio(trig_pin, echo_pin):
     pi = pigpio.pi()
-    
+
     if not pi.connected:
         print("[Ultrasonic] Failed to connect to pigpio daemon")
-    
-    pi.set_mode(trig_pin, pigpio.OUTPUT)
-    pi.set_mode(echo_pin, pigpio.INPUT)
-    
-    return pi
-
-
-def _measure_distance(pi, trig_pin, echo_pin, timeout=0.1):
-    pi.gpio_trigger(trig_pin, 10, 1)  
-    pulse_start = _wait_for_pin_state(pi, echo_pin, 1, timeout)
-    pulse_end = _wait_for_pin_state(pi, echo_pin, 0, timeout)
-    pulse_duration = pulse_end - pulse_start
-    return (pulse_duration * 34300) / 2
-
-
-def _wait_for_pin_state(pi, pin, target_state, timeout):
-    start = time.time()
-    while pi.read(pin) != target_state:
-        if time.time() - start > timeout:
-            break
-    return time.time()
\ No newline at end of file
+        return None
+
+    return EchoRanger(pi, pigpio, trig_pin, echo_pin)
+
+
+class EchoRanger:
+    """Measures echo pulses from pigpio edge callbacks.
+
+    The pulse width comes from the daemon's microsecond ticks, so it does not
+    depend on how quickly Python gets scheduled, and nothing spins while
+    waiting for the echo.
+    """
+
+    def __init__(self, pi, pigpio, trig_pin, echo_pin,
+                 interval=MIN_PING_INTERVAL_S, timeout=ECHO_TIMEOUT_S):
+        self.pi = pi
+        self.pigpio = pigpio
+        self.trig_pin = trig_pin
+        self.echo_pin = echo_pin
+        self.interval = interval
+        self.timeout = timeout
+
+        pi.set_mode(trig_pin, pigpio.OUTPUT)
+        pi.set_mode(echo_pin, pigpio.INPUT)
+        pi.write(trig_pin, 0)
+
+        self._rise_tick = None
+        self._pulse_us = None
+        self._echo_done = threading.Event()
+        self._callback = pi.callback(echo_pin, pigpio.EITHER_EDGE, self._on_edge)
+
+    def close(self):
+        self._callback.cancel()
+        self.pi.stop()
+
+    def _on_edge(self, gpio, level, tick):
+        if level == 1:
+            self._rise_tick = tick
+        elif level == 0 and self._rise_tick is not None:
+            self._pulse_us = self.pigpio.tickDiff(self._rise_tick, tick)
+            self._rise_tick = None
+            self._echo_done.set()
+
+    def ping(self):
+        """Returns the echo pulse width in microseconds, or None on timeout."""
+        self._rise_tick = None
+        self._pulse_us = None
+        self._echo_done.clear()
+
+        self.pi.gpio_trigger(self.trig_pin, 10, 1)
+        if not self._echo_done.wait(self.timeout):
+            return None
+        return self._pulse_us
+
+    def measure(self, samples=5):
+        samples = max(1, int(samples))
+        distances = []
+        timeouts = 0
+
+        for i in range(samples):
+            start = time.monotonic()
+            pulse_us = self.ping()
+            if pulse_us is None:
+                timeouts += 1
+            else:
+                distance = (pulse_us / 1e6) * SPEED_OF_SOUND_CM_S / 2
+                if MIN_RANGE_CM <= distance <= MAX_RANGE_CM:
+                    distances.append(distance)
+
+            if i < samples - 1:
+                remaining = self.interval - (time.monotonic() - start)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+        return _aggregate(distances, samples, timeouts)
+
+
+def _aggregate(distances, samples, timeouts, mad_limit=3.0, min_tolerance_cm=2.0):
+    failure = "timeout" if timeouts * 2 >= samples else "invalid"
+    if not distances:
+        return RangeResult(distance=0.0, status=failure, valid=0, samples=samples)
+
+    # Reject outliers by median absolute deviation, then take the median. With
+    # only a handful of pings the MAD can be tiny, so never cut tighter than
+    # the sensor's own resolution allows
+    center = median(distances)
+    mad = median(abs(d - center) for d in distances)
+    tolerance = max(mad_limit * 1.4826 * mad, min_tolerance_cm)
+    kept = [d for d in distances if abs(d - center) <= tolerance]
+
+    status = "ok" if len(kept) * 2 > samples else failure
+    return RangeResult(
+        distance=float(median(kept)),
+        status=status,
+        valid=len(kept),
+        samples=samples,
+        spread=float(max(kept) - min(kept)),
+    )
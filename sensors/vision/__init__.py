@@ -0,0 +1,26 @@
+from .acquisition import FrameAcquirer
+from .background import BackgroundModel
+from .detection import (
+    DetectionGeometry,
+    blur_reference,
+    decimate_gray,
+    object_detected_contiguous,
+)
+from .encoder import ImageEncoder
+from .frame_buffer import FrameBuffer
+from .sequence import ImageSequence
+from .selector import FrameSelector, laplacian_sharpness
+
+__all__ = [
+    "BackgroundModel",
+    "DetectionGeometry",
+    "FrameAcquirer",
+    "FrameBuffer",
+    "FrameSelector",
+    "ImageEncoder",
+    "ImageSequence",
+    "blur_reference",
+    "decimate_gray",
+    "laplacian_sharpness",
+    "object_detected_contiguous",
+]
@@ -0,0 +1,65 @@
+from contextlib import ExitStack, contextmanager
+
+import cv2
+import numpy as np
+
+from .detection import DetectionGeometry
+
+
+class FrameAcquirer:
+    """Maps camera buffers in place instead of copying them out per frame.
+
+    The main stream is configured as RGB888, which libcamera lays out as
+    B, G, R bytes, i.e. already OpenCV's BGR order. `capture()` yields views
+    straight into the request's buffers; callers copy out only the frames they
+    keep. In lores mode detection reads the Y plane of the YUV420 stream, the
+    other modes convert into buffers preallocated here.
+    """
+
+    MAIN_FORMAT = "RGB888"
+    LORES_FORMAT = "YUV420"
+
+    def __init__(self, camera, geometry: DetectionGeometry, detect_mode: str, mapped_array):
+        self.camera = camera
+        self.geometry = geometry
+        self.detect_mode = detect_mode
+        self._mapped_array = mapped_array
+
+        width, height = geometry.detect_size
+        self._gray = None
+        self._small = None
+        if detect_mode != "lores":
+            self._gray = np.empty((height, width), dtype=np.uint8)
+        if detect_mode == "decimate":
+            self._small = np.empty((height, width, 3), dtype=np.uint8)
+
+    def stream_config(self) -> dict:
+        config = {"main": {"size": self.geometry.full_size, "format": self.MAIN_FORMAT}}
+        if self.detect_mode == "lores":
+            config["lores"] = {"size": self.geometry.detect_size, "format": self.LORES_FORMAT}
+        return config
+
+    def _detection_gray(self, main):
+        if self._small is not None:
+            cv2.resize(main, self.geometry.detect_size, dst=self._small, interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return cv2.cvtColor(main, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    @contextmanager
+    def capture(self):
+        """Yields (main_bgr_view, detection_gray) valid until the block exits."""
+        full_w, full_h = self.geometry.full_size
+        request = self.camera.capture_request()
+        try:
+            with ExitStack() as stack:
+                main = stack.enter_context(self._mapped_array(request, "main")).array[:full_h, :full_w]
+                if self.detect_mode == "lores":
+                    width, height = self.geometry.detect_size
+                    # YUV420 is planar: the first `height` rows are the luminance plane
+                    lores = stack.enter_context(self._mapped_array(request, "lores")).array
+                    gray = lores[:height, :width]
+                else:
+                    gray = self._detection_gray(main)
+                yield main, gray
+        finally:
+            request.release()
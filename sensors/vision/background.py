@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+from .detection import DIFF_THRESHOLD, DetectionGeometry
+
+
+class BackgroundModel:
+    """Running weighted average of the blurred detection frame.
+
+    All work happens in buffers allocated once at construction. Pixels that
+    currently differ from the model are blended in at only `foreground_rate`
+    times the normal rate, so a passing object is not absorbed but a lasting
+    local change (a bag left in the bin, a shifted liner) fades into the
+    background. If most of the frame differs at once (lights switched on)
+    the whole frame is blended in at the normal rate instead.
+    """
+
+    def __init__(self, geometry: DetectionGeometry, alpha: float = 0.05,
+                 max_foreground: float = 0.5, foreground_rate: float = 0.1):
+        width, height = geometry.detect_size
+        self.geometry = geometry
+        self.alpha = float(alpha)
+        self.max_foreground = float(max_foreground)
+        self.foreground_rate = float(foreground_rate)
+        self._acc = np.zeros((height, width), dtype=np.float32)
+        self._reference = np.zeros((height, width), dtype=np.uint8)
+        self._blurred = np.empty((height, width), dtype=np.uint8)
+        self._delta = np.empty((height, width), dtype=np.uint8)
+        self._mask = np.empty((height, width), dtype=np.uint8)
+        self._foreground_mask = np.empty((height, width), dtype=np.uint8)
+        self._seeded = False
+        self.updates = 0
+
+    @property
+    def reference(self):
+        return self._reference
+
+    def _blur(self, gray_frame):
+        k = self.geometry.blur_ksize
+        cv2.GaussianBlur(gray_frame, (k, k), 0, dst=self._blurred)
+
+    def seed(self, gray_frame):
+        self._blur(gray_frame)
+        self._acc[...] = self._blurred
+        self._reference[...] = self._blurred
+        self._seeded = True
+
+    def update(self, gray_frame) -> float:
+        """Blends a frame into the model and returns its foreground fraction."""
+        if not self._seeded:
+            self.seed(gray_frame)
+            return 0.0
+
+        self._blur(gray_frame)
+        cv2.absdiff(self._reference, self._blurred, dst=self._delta)
+        cv2.threshold(self._delta, DIFF_THRESHOLD, 255, cv2.THRESH_BINARY_INV, dst=self._mask)
+        foreground = 1.0 - cv2.countNonZero(self._mask) / float(self._mask.size)
+
+        if foreground > self.max_foreground:
+            cv2.accumulateWeighted(self._blurred, self._acc, self.alpha)
+        else:
+            cv2.accumulateWeighted(self._blurred, self._acc, self.alpha, mask=self._mask)
+            if self.foreground_rate > 0 and foreground > 0:
+                cv2.bitwise_not(self._mask, dst=self._foreground_mask)
+                cv2.accumulateWeighted(self._blurred, self._acc, self.alpha * self.foreground_rate,
+                                       mask=self._foreground_mask)
+
+        cv2.convertScaleAbs(self._acc, dst=self._reference)
+        self.updates += 1
+        return foreground
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+import cv2
+
+
+BLUR_KSIZE = 21
+DIFF_THRESHOLD = 25
+
+
+@dataclass(frozen=True)
+class DetectionGeometry:
+    full_size: tuple[int, int]
+    detect_size: tuple[int, int]
+    min_contour_area: float = 2000.0
+
+    @property
+    def scale(self) -> float:
+        return self.full_size[0] / float(self.detect_size[0])
+
+    @property
+    def blur_ksize(self) -> int:
+        k = max(3, int(round(BLUR_KSIZE / self.scale)))
+        return k if k % 2 else k + 1
+
+    @property
+    def min_area(self) -> float:
+        # min_contour_area is specified in full-resolution pixels
+        return self.min_contour_area / (self.scale * self.scale)
+
+
+def decimate_gray(bgr_frame, size):
+    gray = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
+    if (gray.shape[1], gray.shape[0]) == tuple(size):
+        return gray
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def blur_reference(gray_frame, geometry: DetectionGeometry):
+    k = geometry.blur_ksize
+    return cv2.GaussianBlur(gray_frame, (k, k), 0)
+
+
+def object_detected_contiguous(gray_frame, ref_gray, geometry: DetectionGeometry) -> bool:
+    k = geometry.blur_ksize
+    gray_frame = cv2.GaussianBlur(gray_frame, (k, k), 0)
+
+    frame_delta = cv2.absdiff(ref_gray, gray_frame)
+    thresh = cv2.threshold(frame_delta, DIFF_THRESHOLD, 255, cv2.THRESH_BINARY)[1]
+
+    # Dilate to close small gaps in contiguous regions
+    thresh = cv2.dilate(thresh, None, iterations=2)
+
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = geometry.min_area
+    for contour in contours:
+        if cv2.contourArea(contour) >= min_area:
+            return True
+
+    return False
@@ -0,0 +1,95 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+
+class ImageEncoder:
+    """JPEG encoding and file writes on a small thread pool.
+
+    OpenCV releases the GIL while encoding, so a couple of threads keep the
+    camera loop free. Callers must not modify a frame until its future is done.
+    """
+
+    def __init__(self, workers: int = 2, quality: int = 90):
+        if not 0 <= quality <= 100:
+            raise ValueError("quality must be between 0 and 100")
+        self.quality = int(quality)
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encoder")
+
+    def close(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def _encode(self, frame):
+        ok, buf = cv2.imencode(".jpg", frame, self._params)
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return buf
+
+    def _write(self, frame, path: str) -> str:
+        return self._write_buf(self._encode(frame), path)
+
+    @staticmethod
+    def _write_buf(buf, path: str) -> str:
+        # Write under a temporary name so readers never see a partial JPEG
+        part = f"{path}.part"
+        with open(part, "wb") as f:
+            f.write(buf)
+        os.replace(part, path)
+        return path
+
+    def encode(self, frame):
+        """Returns a future resolving to the encoded JPEG as a uint8 array."""
+        return self._pool.submit(self._encode, frame)
+
+    def save(self, frame, path: str):
+        """Returns a future resolving to `path` once the JPEG is on disk."""
+        return self._pool.submit(self._write, frame, str(path))
+
+    def _publish(self, frame, transport, path: str):
+        buf = self._encode(frame)
+        ref = transport.put(buf)
+        if ref is not None:
+            return ref
+        # No free slot in time, or an unusually large JPEG: fall back to a file
+        return self._write_buf(buf, path)
+
+    def publish(self, frame, transport, path: str):
+        """Returns a future resolving to an ImageRef in `transport`, or `path` if it had to be written."""
+        return self._pool.submit(self._publish, frame, transport, str(path))
+
+    def save_batch(self, items, on_done):
+        """Saves (frame, path) pairs and calls on_done with the saved paths, None for failures."""
+        return self._when_all([self.save(frame, path) for frame, path in items], on_done)
+
+    def publish_batch(self, items, transport, on_done):
+        """Like save_batch, but hands images over through `transport` where possible."""
+        return self._when_all([self.publish(frame, transport, path) for frame, path in items], on_done)
+
+    @staticmethod
+    def _when_all(futures, on_done):
+        if not futures:
+            on_done([])
+            return futures
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def _finished(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[Encoder] Failed to save image: {e}")
+                    results.append(None)
+            on_done(results)
+
+        for future in futures:
+            future.add_done_callback(_finished)
+        return futures
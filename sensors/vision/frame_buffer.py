@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class FrameBuffer:
+    """Fixed-capacity store of preallocated frames.
+
+    Frames are written in place into reserved slots, so memory stays at
+    `nbytes` however long the pass. Once every slot is reserved, which
+    frames to keep is up to the caller (FrameSelector), which overwrites
+    slots instead.
+    """
+
+    def __init__(self, capacity: int, frame_shape: tuple[int, ...], dtype=np.uint8):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = int(capacity)
+        self._frames = np.empty((self.capacity, *frame_shape), dtype=dtype)
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._count = 0
+
+    @classmethod
+    def for_budget(cls, max_bytes: int, frame_shape: tuple[int, ...], dtype=np.uint8):
+        frame_bytes = int(np.prod(frame_shape)) * np.dtype(dtype).itemsize
+        return cls(max(1, int(max_bytes) // frame_bytes), frame_shape, dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self._frames.nbytes + self._timestamps.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self._count = 0
+
+    def reserve(self, timestamp: float):
+        """Returns the next free slot to write into, or None if all are taken."""
+        if self._count == self.capacity:
+            return None
+
+        slot = self._count
+        self._timestamps[slot] = timestamp
+        self._count += 1
+        return self._frames[slot]
+
+    def overwrite(self, slot: int, timestamp: float):
+        if not 0 <= slot < self._count:
+            raise IndexError(slot)
+        self._timestamps[slot] = timestamp
+        return self._frames[slot]
+
+    def frame(self, slot: int):
+        return self._frames[slot]
+
+    def push(self, timestamp: float, frame) -> bool:
+        slot = self.reserve(timestamp)
+        if slot is None:
+            return False
+        np.copyto(slot, frame)
+        return True
+
+    def items(self):
+        for i in range(self._count):
+            yield float(self._timestamps[i]), self._frames[i]
+
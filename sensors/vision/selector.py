@@ -0,0 +1,103 @@
+import cv2
+
+from .frame_buffer import FrameBuffer
+
+
+def laplacian_sharpness(gray_frame) -> float:
+    lap = cv2.Laplacian(gray_frame, cv2.CV_32F)
+    _, std = cv2.meanStdDev(lap)
+    return float(std[0][0]) ** 2
+
+
+class FrameSelector:
+    """Streaming top-k frame selection for one object pass.
+
+    Keeps at most `k` full-resolution frames. When a new candidate arrives and
+    all slots are taken, the two frames closest together in time compete and
+    the lower-scoring one is dropped, or the later one if their sharpness
+    is within `tie_rtol` of each other. This keeps the survivors spread
+    across the transit; the score is sharpness weighted by nearness to the
+    running midpoint of the transit.
+    """
+
+    def __init__(self, k: int, frame_shape: tuple[int, ...], centrality_weight: float = 1.0,
+                 tie_rtol: float = 0.1):
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        self.k = int(k)
+        self.centrality_weight = float(centrality_weight)
+        self.tie_rtol = float(tie_rtol)
+        self._frames = FrameBuffer(self.k, frame_shape)
+        # Parallel lists in time order; _slots maps each entry to its buffer slot
+        self._slots: list[int] = []
+        self._timestamps: list[float] = []
+        self._sharpness: list[float] = []
+        self._enter_time = None
+
+    @property
+    def nbytes(self) -> int:
+        return self._frames.nbytes
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def reset(self):
+        self._frames.clear()
+        self._slots.clear()
+        self._timestamps.clear()
+        self._sharpness.clear()
+        self._enter_time = None
+
+    def score(self, timestamp: float, sharpness: float, end_time: float) -> float:
+        if self._enter_time is None:
+            return sharpness
+        half_span = (end_time - self._enter_time) / 2
+        if half_span <= 0:
+            return sharpness
+        mid = self._enter_time + half_span
+        centrality = 1.0 - min(1.0, abs(timestamp - mid) / half_span)
+        return sharpness * (1.0 + self.centrality_weight * centrality)
+
+    def offer(self, timestamp: float, sharpness: float):
+        """Returns the slot to write the candidate frame into, or None if it is dropped."""
+        if self._enter_time is None:
+            self._enter_time = timestamp
+
+        if len(self._slots) < self.k:
+            self._slots.append(len(self._slots))
+            self._timestamps.append(timestamp)
+            self._sharpness.append(sharpness)
+            return self._frames.reserve(timestamp)
+
+        # Entries are in time order, so the candidate is always last
+        times = self._timestamps + [timestamp]
+        sharp = self._sharpness + [sharpness]
+        _, i = min((times[j + 1] - times[j], j) for j in range(self.k))
+        if abs(sharp[i] - sharp[i + 1]) <= self.tie_rtol * max(sharp[i], sharp[i + 1]):
+            # Centrality always favours the later frame as the midpoint moves on;
+            # keeping the earlier one instead keeps the survivors spread out.
+            # Laplacian variance of consecutive frames is never exactly equal,
+            # so near-equal counts as a tie
+            victim = i + 1
+        else:
+            left = self.score(times[i], sharp[i], timestamp)
+            right = self.score(times[i + 1], sharp[i + 1], timestamp)
+            victim = i if left < right else i + 1
+
+        if victim == self.k:
+            return None
+
+        slot = self._slots.pop(victim)
+        del self._timestamps[victim]
+        del self._sharpness[victim]
+        self._slots.append(slot)
+        self._timestamps.append(timestamp)
+        self._sharpness.append(sharpness)
+        return self._frames.overwrite(slot, timestamp)
+
+    def selected(self, exit_time: float):
+        """Returns (timestamp, frame, score) for the kept frames in time order."""
+        return [
+            (ts, self._frames.frame(slot), self.score(ts, sh, exit_time))
+            for slot, ts, sh in zip(self._slots, self._timestamps, self._sharpness)
+        ]
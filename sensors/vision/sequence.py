@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+
+class ImageSequence:
+    """Monotonic image ids for a directory that survive restarts.
+
+    Ids are reserved in blocks and only the end of the reserved block is
+    persisted, so allocating an id touches the disk once per `block` images
+    and never lists the directory. After a crash the unused part of the last
+    block is skipped.
+    """
+
+    STATE_FILE = ".image_seq"
+
+    def __init__(self, directory, prefix: str = "image_", suffix: str = ".jpg", block: int = 256):
+        if block < 1:
+            raise ValueError("block must be >= 1")
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.suffix = suffix
+        self.block = int(block)
+        self._state = self.directory / self.STATE_FILE
+
+        reserved = self._load()
+        if reserved is None:
+            # First start in this directory: seed past any files named by the old scheme
+            reserved = self.scan_max(self.directory, prefix, suffix)
+        self._next = reserved + 1
+        self._reserved = reserved
+
+    @staticmethod
+    def scan_max(directory, prefix: str = "image_", suffix: str = ".jpg") -> int:
+        directory = Path(directory)
+        if not directory.exists():
+            return 0
+        highest = 0
+        for f in directory.iterdir():
+            if f.name.startswith(prefix) and f.name.endswith(suffix):
+                num = f.name[len(prefix):-len(suffix)]
+                if num.isdigit():
+                    highest = max(highest, int(num))
+        return highest
+
+    def _load(self):
+        try:
+            return int(self._state.read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _persist(self, reserved: int):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._state.with_name(self._state.name + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(f"{reserved}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._state)
+
+    def next_ids(self, count: int = 1) -> range:
+        first = self._next
+        last = first + count - 1
+        if last > self._reserved:
+            self._reserved = last + self.block
+            self._persist(self._reserved)
+        self._next = last + 1
+        return range(first, last + 1)
+
+    def next_paths(self, count: int = 1) -> list[str]:
+        return [str(self.directory / f"{self.prefix}{i}{self.suffix}") for i in self.next_ids(count)]
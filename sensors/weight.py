@@ -1,45 +1,107 @@
-from sensors.weight_sensor import WeightSensor, default_calibration_path
+from sensors.weight_sensor import DriftTracker, WeightSensor
+from sensors.hal import HardwareBackend
+from metrics.timing import mark
 import time
 
 
-def weight_process(input_queue, output_queue, dout_pin, sck_pin, samples):
+WEIGHT_MODES = ("fixed", "settle")
+
+
+def weight_process(input_queue, output_queue, dout_pin, sck_pin, samples, use_pigpio=True,
+                   continuous=True, delay_s=3.0, mode="settle", settle_delay_s=None,
+                   tolerance_g=5.0, max_samples=40, settle_window=5, track_drift=True,
+                   backend=None):
     print("[Weight] Started")
     
-    weight_sensor = _initialize_weight_sensor(dout_pin, sck_pin)
+    weight_sensor = _initialize_weight_sensor(dout_pin, sck_pin, use_pigpio, backend or HardwareBackend())
+    drift = None
+    if weight_sensor and continuous:
+        weight_sensor.start_sampling()
+        if track_drift:
+            drift = DriftTracker(weight_sensor)
+            drift.start()
     
     try:
         while True:
             data = input_queue.get()
-            weight = _measure_weight(weight_sensor, samples)
+            mark(data, 'weight_start')
+            if drift:
+                drift.notify_trigger(data.get('trigger_time'))
+            if mode == "settle":
+                # Same start as a fixed read unless told otherwise: the item may
+                # still be bouncing well after the trigger
+                after = _window_start(data, delay_s if settle_delay_s is None else settle_delay_s)
+                reading = _measure_settled(weight_sensor, settle_window, max_samples, tolerance_g, after)
+                weight = reading.grams if reading else 0.0
+                data['weight_settled'] = bool(reading and reading.settled)
+                data['weight_confidence'] = reading.confidence if reading else 0.0
+            else:
+                after = _window_start(data, delay_s)
+                reading = None
+                weight = _measure_weight(weight_sensor, samples, after)
             data['weight'] = weight
+            data['stage'] = 'weight'
+            mark(data, 'weight_done')
             output_queue.put(data)
-            print(f"[Weight] Weight: {weight:.2f} g")
+            if reading:
+                print(f"[Weight] Weight: {weight:.2f} g ({'settled' if reading.settled else 'unsettled'} "
+                      f"after {reading.samples} samples, {reading.settle_s:.2f} s, confidence {reading.confidence:.2f})")
+            else:
+                print(f"[Weight] Weight: {weight:.2f} g")
             
     except KeyboardInterrupt:
         print("[Weight] Shutting down")
+    finally:
+        if drift:
+            drift.stop()
+        if weight_sensor:
+            weight_sensor.close()
 
 
-def _initialize_weight_sensor(dout_pin, sck_pin):
+def _initialize_weight_sensor(dout_pin, sck_pin, use_pigpio, backend):
     try:
-        cal_file = str(default_calibration_path("zotbin-1"))
+        cal_file = str(backend.calibration_file("zotbin-1"))
         return WeightSensor(
             dt_gpio=dout_pin,
             sck_gpio=sck_pin,
             gain=128,
-            use_pigpio=False,
-            calibration_file=cal_file
+            use_pigpio=use_pigpio,
+            calibration_file=cal_file,
+            hx=backend.hx711(dout_pin, sck_pin)
         )
     except Exception as e:
         print(f"[Weight] Failed to initialize sensor: {e}")
         return None
 
 
-def _measure_weight(weight_sensor, samples):
+def _window_start(data, delay_s):
+    # Weigh the samples taken once the item has had `delay_s` to settle after
+    # the beam break; those are usually already buffered by the time we get here
+    trigger_time = data.get('trigger_time')
+    if trigger_time is None:
+        return None
+    return trigger_time + delay_s
+
+
+def _measure_weight(weight_sensor, samples, after=None):
     if not weight_sensor:
         return 0.0
     
     try:
-        return weight_sensor.read_grams(samples=samples)
+        return weight_sensor.read_grams(samples=samples, after=after)
+    except Exception as e:
+        print(f"[Weight] Failed to read weight: {e}")
+        return 0.0
+
+
+def _measure_settled(weight_sensor, window, max_samples, tolerance_g, after=None):
+    if not weight_sensor:
+        return None
+
+    try:
+        return weight_sensor.read_settled(
+            tolerance_g=tolerance_g, window=window, max_samples=max_samples, after=after
+        )
     except Exception as e:
         print(f"[Weight] Failed to read weight: {e}")
-        return 0.0
\ No newline at end of file
+        return None
@@ -1,8 +1,16 @@
 from .errors import CalibrationError, HX711NotReadyError, HX711ReadError
-from .weight import WeightSensor, default_calibration_path
+from .drift import DriftTracker
+from .estimator import Ema, RobustWindow
+from .sampler import ContinuousSampler
+from .weight import SettledReading, WeightSensor, default_calibration_path
 
 __all__ = [
     "WeightSensor",
+    "SettledReading",
+    "DriftTracker",
+    "ContinuousSampler",
+    "RobustWindow",
+    "Ema",
     "CalibrationError",
     "HX711NotReadyError",
     "HX711ReadError",
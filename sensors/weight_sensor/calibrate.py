@@ -2,14 +2,12 @@ import argparse
 import time
 
 from .errors import CalibrationError, HX711NotReadyError, HX711ReadError
+from .estimator import RobustWindow
 from .weight import WeightSensor, default_calibration_path
 
 
-def _read_stable_window(ws: WeightSensor, samples: int, settle_ms: int):
-    vals = ws.read_raw_samples(target=samples, max_attempts=max(samples * 10, 200), settle_ms=settle_ms)
-    vmin = min(vals)
-    vmax = max(vals)
-    return {"avg": sum(vals) / len(vals), "span": float(vmax - vmin), "min": float(vmin), "max": float(vmax)}
+def _window_stats(window: RobustWindow):
+    return {"avg": window.mean(), "span": float(window.span()), "min": window.min(), "max": window.max()}
 
 
 def _wait_for_stability(
@@ -19,14 +17,18 @@ def _wait_for_stability(
     settle_ms: int,
     timeout_s: float,
 ):
+    # Slide the window one reading at a time, so stability is seen as soon as
+    # the last `window_samples` readings agree rather than a whole window later
     start = time.monotonic()
-    last = None
+    window = RobustWindow(window_samples)
     while time.monotonic() - start < timeout_s:
-        last = _read_stable_window(ws, samples=window_samples, settle_ms=settle_ms)
-        if last["span"] <= float(span_raw):
-            return last
-        time.sleep(0.2)
-    raise CalibrationError(f"Signal not stable (span_raw={last['span'] if last else 'n/a'})")
+        try:
+            window.extend(ws.read_raw_samples(target=1, max_attempts=10, settle_ms=settle_ms))
+        except (HX711NotReadyError, HX711ReadError):
+            continue
+        if window.full and window.span() <= float(span_raw):
+            return _window_stats(window)
+    raise CalibrationError(f"Signal not stable (span_raw={window.span() if len(window) else 'n/a'})")
 
 
 def _warmup(ws: WeightSensor, attempts: int, settle_ms: int):
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from .estimator import RobustWindow
+from .weight import WeightSensor, _write_atomic
+
+
+class DriftTracker:
+    """Follows zero drift of the load cell while the bin is idle.
+
+    The bin is rarely empty, so the offset cannot simply be re-tared. Instead
+    the tracker compares stable idle baselines against an anchor, the level
+    the zero was last set for. Only a deviation of at least `min_step_g`
+    with the same sign in `confirm_windows` windows in a row is drift, and
+    it is folded into the offset only if it built up no faster than
+    `max_rate_g_per_h` since the anchor. Noise therefore never walks the
+    zero around, and a faster change is taken to be real load (liquid
+    draining, waste settling) and only re-anchors. A jump larger than
+    `max_step_g` between two windows (e.g. the bin being emptied) also only
+    re-anchors. A real change slower than the rate cap is still zeroed.
+
+    Needs the sensor to be sampling continuously. Offset changes are written
+    to the calibration file at most every `persist_interval_s`, and each write
+    is appended to a JSON-lines history next to it.
+    """
+
+    def __init__(
+        self,
+        ws: WeightSensor,
+        idle_s: float = 30.0,
+        window: int = 20,
+        span_g: float = 2.0,
+        max_step_g: float = 2.0,
+        min_step_g: float = 1.0,
+        confirm_windows: int = 3,
+        max_rate_g_per_h: float = 10.0,
+        check_interval_s: float = 10.0,
+        persist_interval_s: float = 900.0,
+        history_file: str | Path | None = None,
+        history_max: int = 1000,
+    ):
+        self.ws = ws
+        self.idle_s = idle_s
+        self.window = window
+        self.span_g = span_g
+        self.max_step_g = max_step_g
+        self.min_step_g = min_step_g
+        self.confirm_windows = confirm_windows
+        self.max_rate_g_per_h = max_rate_g_per_h
+        self.check_interval_s = check_interval_s
+        self.persist_interval_s = persist_interval_s
+        self.history_file = (
+            Path(history_file)
+            if history_file is not None
+            else ws.calibration_file.with_suffix(".drift.jsonl")
+        )
+        self.history_max = history_max
+
+        self._last_trigger = time.monotonic()
+        self._baseline: float | None = None
+        self._baseline_t = 0.0
+        self._anchor = 0.0
+        self._anchor_t = 0.0
+        self._deviations: deque[float] = deque(maxlen=confirm_windows)
+        self._pending = 0.0
+        self._last_persist = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def notify_trigger(self, t: float | None = None):
+        """Marks activity at monotonic time `t`; baselines from before it are dropped."""
+        t = time.monotonic() if t is None else t
+        with self._lock:
+            self._last_trigger = max(self._last_trigger, t)
+
+    def update(self, now: float | None = None) -> float | None:
+        """Checks for an idle, stable window; returns the offset step applied, if any."""
+        now = time.monotonic() if now is None else now
+        if self.ws.scale == 0:
+            return None
+
+        with self._lock:
+            idle_since = self._last_trigger + self.idle_s
+            if now < idle_since:
+                return None
+
+            samples = self.ws.samples_since(idle_since)[-self.window:]
+            if len(samples) < self.window:
+                return None
+            window = RobustWindow.from_values(raw for _, raw in samples)
+            if window.span() > abs(self.span_g * self.ws.scale):
+                return None
+
+            level = window.robust_mean()
+            t = samples[-1][0]
+            previous = self._baseline
+            fresh = previous is not None and self._baseline_t >= self._last_trigger
+            self._baseline = level
+            self._baseline_t = t
+            if not fresh:
+                self._reanchor(level, t)
+                return None
+
+            scale = abs(self.ws.scale)
+            step = level - previous
+            if abs(step) > self.max_step_g * scale:
+                print(f"[Drift] Load changed by {step / self.ws.scale:.1f} g while idle, re-baselined")
+                self._reanchor(level, t)
+                return None
+
+            self._deviations.append(level - self._anchor)
+            if len(self._deviations) < self.confirm_windows:
+                return None
+            if not (all(d >= self.min_step_g * scale for d in self._deviations)
+                    or all(d <= -self.min_step_g * scale for d in self._deviations)):
+                return None
+
+            correction = sum(self._deviations) / len(self._deviations)
+            hours = (t - self._anchor_t) / 3600.0
+            if abs(correction) > self.max_rate_g_per_h * hours * scale:
+                print(f"[Drift] Load changed by {correction / self.ws.scale:.1f} g in {hours * 60:.0f} min "
+                      f"while idle, faster than drift; re-baselined")
+                self._reanchor(level, t)
+                return None
+
+            self.ws.adjust_offset(correction)
+            self._pending += correction
+            # Further drift is measured from where the zero now sits
+            self._reanchor(self._anchor + correction, t)
+
+        self._maybe_persist(now)
+        return correction
+
+    def _reanchor(self, level: float, t: float):
+        self._anchor = level
+        self._anchor_t = t
+        self._deviations.clear()
+
+    def _maybe_persist(self, now: float, force: bool = False):
+        if self._pending == 0.0:
+            return
+        if not force and now - self._last_persist < self.persist_interval_s:
+            return
+        self.ws._save_calibration()
+        self._append_history(self._pending)
+        self._pending = 0.0
+        self._last_persist = now
+
+    def _append_history(self, delta: float):
+        entry = {"t": int(time.time()), "offset": round(self.ws.offset, 1), "delta": round(delta, 1)}
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.history_file, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+        # Trim in bulk so the file is rewritten rarely
+        lines = self.history_file.read_text().splitlines(keepends=True)
+        if len(lines) > 2 * self.history_max:
+            _write_atomic(self.history_file, "".join(lines[-self.history_max:]))
+
+    def start(self):
+        if not self.ws.sampling:
+            raise RuntimeError("DriftTracker needs the sensor to be sampling")
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weight-drift", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval_s):
+            try:
+                self.update()
+            except Exception as e:
+                print(f"[Drift] Update failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._maybe_persist(time.monotonic(), force=True)
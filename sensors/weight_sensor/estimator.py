@@ -0,0 +1,121 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+
+class RobustWindow:
+    """Sliding window of raw readings kept in sorted order.
+
+    Each push is a binary search plus an insert/delete in a short list, so
+    the median, quartiles and span are available without re-sorting. The
+    robust mean uses the same IQR filter as WeightSensor._robust_mean; only
+    the outliers are summed separately, the rest comes from a running total.
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self._order: deque[float] = deque()
+        self._sorted: list[float] = []
+        self._total = 0.0
+
+    @classmethod
+    def from_values(cls, values) -> "RobustWindow":
+        values = list(values)
+        window = cls(max(1, len(values)))
+        window._order.extend(values)
+        window._sorted = sorted(values)
+        window._total = float(sum(values))
+        return window
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def full(self) -> bool:
+        return len(self._order) >= self.size
+
+    def clear(self):
+        self._order.clear()
+        self._sorted.clear()
+        self._total = 0.0
+
+    def push(self, value: float):
+        value = float(value)
+        if len(self._order) >= self.size:
+            old = self._order.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+            self._total -= old
+        self._order.append(value)
+        insort(self._sorted, value)
+        self._total += value
+
+    def extend(self, values):
+        for v in values:
+            self.push(v)
+
+    def mean(self) -> float:
+        return self._total / len(self._sorted)
+
+    def median(self) -> float:
+        s = self._sorted
+        n = len(s)
+        mid = n // 2
+        if n % 2:
+            return s[mid]
+        return (s[mid - 1] + s[mid]) / 2.0
+
+    def min(self) -> float:
+        return self._sorted[0]
+
+    def max(self) -> float:
+        return self._sorted[-1]
+
+    def span(self) -> float:
+        return self._sorted[-1] - self._sorted[0]
+
+    def quartiles(self) -> tuple[float, float]:
+        s = self._sorted
+        n = len(s)
+        return s[n // 4], s[(3 * n) // 4]
+
+    def robust_mean(self) -> float:
+        s = self._sorted
+        n = len(s)
+        if n < 4:
+            return float(self.median())
+
+        q1, q3 = self.quartiles()
+        iqr = q3 - q1
+        if iqr == 0:
+            return float(self.median())
+
+        margin = 1.5 * iqr
+        lo = bisect_left(s, q1 - margin)
+        hi = bisect_right(s, q3 + margin)
+        kept = hi - lo
+        if kept < 3:
+            return float(self.median())
+        if kept == n:
+            return self._total / n
+        return (self._total - sum(s[:lo]) - sum(s[hi:])) / kept
+
+
+class Ema:
+    """Exponential moving average; `alpha` is the weight of each new value."""
+
+    def __init__(self, alpha: float = 0.3):
+        if not (0.0 < alpha <= 1.0):
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def reset(self):
+        self.value = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = float(x)
+        else:
+            self.value += self.alpha * (float(x) - self.value)
+        return self.value
@@ -1,8 +1,7 @@
+import threading
 import time
 from dataclasses import dataclass
 
-import RPi.GPIO as GPIO
-
 from .errors import HX711NotReadyError, HX711ReadError
 
 
@@ -20,32 +19,37 @@ class HX711Config:
     ready_timeout_s: float = 0.8
     clock_delay_us: float = 2.0
     max_read_duration_us: float = 5000.0
+    wave_half_period_us: int = 20
 
 
 class HX711:
     _GAIN_PULSES = {128: 1, 64: 3, 32: 2}
 
-    def __init__(self, config: HX711Config):
+    def __init__(self, config: HX711Config, gpio=None):
         if config.gain not in self._GAIN_PULSES:
             raise ValueError("gain must be 128, 64, or 32")
         self.cfg = config
 
-        GPIO.setwarnings(False)
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.cfg.dt_gpio, GPIO.IN)
-        GPIO.setup(self.cfg.sck_gpio, GPIO.OUT, initial=GPIO.LOW)
+        if gpio is None:
+            import RPi.GPIO as gpio
+        self.gpio = gpio
+
+        gpio.setwarnings(False)
+        gpio.setmode(gpio.BCM)
+        gpio.setup(self.cfg.dt_gpio, gpio.IN)
+        gpio.setup(self.cfg.sck_gpio, gpio.OUT, initial=gpio.LOW)
 
         self._ensure_awake()
         self._prime_gain()
 
     def close(self):
         try:
-            GPIO.cleanup([self.cfg.dt_gpio, self.cfg.sck_gpio])
+            self.gpio.cleanup([self.cfg.dt_gpio, self.cfg.sck_gpio])
         except Exception:
             pass
 
     def _ensure_awake(self):
-        GPIO.output(self.cfg.sck_gpio, GPIO.LOW)
+        self.gpio.output(self.cfg.sck_gpio, self.gpio.LOW)
         time.sleep(0.001)
 
     def _prime_gain(self):
@@ -55,7 +59,7 @@ class HX711:
             pass
 
     def is_ready(self) -> bool:
-        return GPIO.input(self.cfg.dt_gpio) == 0
+        return self.gpio.input(self.cfg.dt_gpio) == 0
 
     def _wait_ready(self):
         start = time.monotonic()
@@ -71,11 +75,24 @@ class HX711:
             x -= 1 << 24
         return x
 
+    @classmethod
+    def _decode(cls, value: int) -> int:
+        raw = cls._twos_comp_24(value)
+
+        if raw == -1:
+            raise HX711ReadError("Invalid raw (0xFFFFFF)")
+        if raw == 0x7FFFFF:
+            raise HX711ReadError("Invalid raw (0x7FFFFF)")
+        if raw == -0x800000:
+            raise HX711ReadError("Invalid raw (-0x800000)")
+
+        return raw
+
     def _pulse(self) -> int:
-        GPIO.output(self.cfg.sck_gpio, GPIO.HIGH)
+        self.gpio.output(self.cfg.sck_gpio, self.gpio.HIGH)
         _busy_wait_us(self.cfg.clock_delay_us)
-        bit = GPIO.input(self.cfg.dt_gpio)
-        GPIO.output(self.cfg.sck_gpio, GPIO.LOW)
+        bit = self.gpio.input(self.cfg.dt_gpio)
+        self.gpio.output(self.cfg.sck_gpio, self.gpio.LOW)
         _busy_wait_us(self.cfg.clock_delay_us)
         return bit
 
@@ -89,9 +106,9 @@ class HX711:
             value = (value << 1) | self._pulse()
 
         for _ in range(self._GAIN_PULSES[self.cfg.gain]):
-            GPIO.output(self.cfg.sck_gpio, GPIO.HIGH)
+            self.gpio.output(self.cfg.sck_gpio, self.gpio.HIGH)
             _busy_wait_us(self.cfg.clock_delay_us)
-            GPIO.output(self.cfg.sck_gpio, GPIO.LOW)
+            self.gpio.output(self.cfg.sck_gpio, self.gpio.LOW)
             _busy_wait_us(self.cfg.clock_delay_us)
 
         elapsed_us = (time.perf_counter_ns() - t0) / 1000.0
@@ -100,13 +117,113 @@ class HX711:
                 f"Read took {elapsed_us:.0f} us (limit {self.cfg.max_read_duration_us:.0f} us)"
             )
 
-        raw = self._twos_comp_24(value)
+        return self._decode(value)
 
-        if raw == -1:
-            raise HX711ReadError("Invalid raw (0xFFFFFF)")
-        if raw == 0x7FFFFF:
-            raise HX711ReadError("Invalid raw (0x7FFFFF)")
-        if raw == -0x800000:
-            raise HX711ReadError("Invalid raw (-0x800000)")
 
-        return raw
\ No newline at end of file
+class HX711Pigpio:
+    """HX711 clocked by a pigpio DMA waveform.
+
+    The SCK pulse train is a prebuilt waveform, so its timing does not depend
+    on the Python scheduler and reads never exceed the HX711's 60 us power-down
+    limit. Each bit is the DOUT level at an SCK falling edge, reconstructed
+    from the daemon's edge callbacks, which arrive in tick order.
+    """
+
+    def __init__(self, config: HX711Config, pigpio=None, pi=None):
+        if config.gain not in HX711._GAIN_PULSES:
+            raise ValueError("gain must be 128, 64, or 32")
+        if pigpio is None:
+            import pigpio
+        self.cfg = config
+        self.pigpio = pigpio
+        self.pi = pi if pi is not None else pigpio.pi()
+        if not self.pi.connected:
+            raise HX711NotReadyError("Cannot connect to pigpio daemon")
+
+        self._clocks = 24 + HX711._GAIN_PULSES[config.gain]
+        self._wave_s = self._clocks * 2 * config.wave_half_period_us / 1e6
+
+        self.pi.set_mode(config.dt_gpio, pigpio.INPUT)
+        self.pi.set_mode(config.sck_gpio, pigpio.OUTPUT)
+        self.pi.write(config.sck_gpio, 0)
+
+        self._bits: list[int] = []
+        self._reading = False
+        self._ready = threading.Event()
+        self._done = threading.Event()
+        self._dout_level = self.pi.read(config.dt_gpio)
+        self._callbacks = [
+            self.pi.callback(config.dt_gpio, pigpio.EITHER_EDGE, self._on_edge),
+            self.pi.callback(config.sck_gpio, pigpio.FALLING_EDGE, self._on_edge),
+        ]
+        self._wave_id = self._create_wave()
+
+        self._prime_gain()
+
+    def _create_wave(self) -> int:
+        mask = 1 << self.cfg.sck_gpio
+        half = int(self.cfg.wave_half_period_us)
+        pulses = []
+        for _ in range(self._clocks):
+            pulses.append(self.pigpio.pulse(mask, 0, half))
+            pulses.append(self.pigpio.pulse(0, mask, half))
+        self.pi.wave_add_new()
+        self.pi.wave_add_generic(pulses)
+        return self.pi.wave_create()
+
+    def close(self):
+        try:
+            for cb in self._callbacks:
+                cb.cancel()
+            self.pi.wave_delete(self._wave_id)
+            self.pi.write(self.cfg.sck_gpio, 0)
+            self.pi.stop()
+        except Exception:
+            pass
+
+    def _prime_gain(self):
+        try:
+            self.read_raw()
+        except Exception:
+            pass
+
+    def _on_edge(self, gpio, level, tick):
+        if gpio == self.cfg.dt_gpio:
+            self._dout_level = level
+            if level == 0 and not self._reading:
+                self._ready.set()
+        elif self._reading and level == 0:
+            self._bits.append(self._dout_level)
+            if len(self._bits) == self._clocks:
+                self._done.set()
+
+    def is_ready(self) -> bool:
+        return self.pi.read(self.cfg.dt_gpio) == 0
+
+    def _wait_ready(self):
+        self._ready.clear()
+        if self.is_ready():
+            return
+        if not self._ready.wait(self.cfg.ready_timeout_s):
+            raise HX711NotReadyError("HX711 not ready (DOUT stayed high)")
+
+    def read_raw(self) -> int:
+        self._wait_ready()
+
+        self._bits = []
+        self._done.clear()
+        self._reading = True
+        try:
+            self.pi.wave_send_once(self._wave_id)
+            finished = self._done.wait(self._wave_s + 0.05)
+        finally:
+            self._reading = False
+
+        if not finished:
+            raise HX711ReadError(f"Missed clock edges ({len(self._bits)}/{self._clocks})")
+
+        value = 0
+        for bit in self._bits[:24]:
+            value = (value << 1) | bit
+
+        return HX711._decode(value)
\ No newline at end of file
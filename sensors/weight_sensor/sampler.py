@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import deque
+
+from .errors import HX711NotReadyError, HX711ReadError
+
+
+class ContinuousSampler:
+    """Reads the HX711 on a background thread into a timestamped ring buffer.
+
+    Timestamps are time.monotonic(), which is shared by every process on the
+    host, so a trigger time stamped in another process can select a window.
+    While a sampler runs it is the only thing clocking the HX711.
+    """
+
+    def __init__(self, hx, capacity: int = 256):
+        self._hx = hx
+        self._buf: deque[tuple[float, int]] = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hx711-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        with self._cond:
+            self._cond.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                raw = self._hx.read_raw()
+            except (HX711NotReadyError, HX711ReadError):
+                self.errors += 1
+                continue
+            with self._cond:
+                self._buf.append((time.monotonic(), raw))
+                self._cond.notify_all()
+
+    def snapshot(self, since: float | None = None) -> list[tuple[float, int]]:
+        with self._cond:
+            if since is None:
+                return list(self._buf)
+            return [s for s in self._buf if s[0] >= since]
+
+    def collect(self, count: int, after: float | None = None, timeout: float = 2.0,
+                with_times: bool = False) -> list:
+        """Returns `count` raw values: the latest ones, or the first ones taken at or after `after`.
+
+        Blocks only until enough matching samples exist. With `with_times` the
+        values come back as (monotonic time, raw) pairs.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if after is None:
+                    pairs = list(self._buf)[-count:]
+                else:
+                    pairs = [s for s in self._buf if s[0] >= after][:count]
+                if len(pairs) >= count:
+                    return pairs if with_times else [v for _, v in pairs]
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    raise HX711NotReadyError(
+                        f"Insufficient buffered samples ({len(pairs)}/{count})"
+                    )
+                self._cond.wait(remaining)
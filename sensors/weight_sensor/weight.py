@@ -4,10 +4,14 @@ import time
 import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from statistics import median
 
 from .errors import CalibrationError, HX711NotReadyError, HX711ReadError
-from .hx711 import HX711, HX711Config
+from .estimator import RobustWindow
+from .hx711 import HX711, HX711Config, HX711Pigpio
+from .sampler import ContinuousSampler
+
+# HX711 output rate with RATE tied low
+HX711_PERIOD_S = 0.1
 
 
 def _default_config_dir() -> Path:
@@ -17,6 +21,17 @@ def _default_config_dir() -> Path:
     return Path.home() / ".config"
 
 
+def _write_atomic(path: Path, text: str):
+    # A crash mid-write must never leave a truncated calibration behind
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
 def default_calibration_path(bin_id: str) -> Path:
     safe = "".join(
         ch if ch.isalnum() or ch in ("-", "_") else "_"
@@ -32,6 +47,16 @@ class Calibration:
     updated_at: int = 0
 
 
+@dataclass
+class SettledReading:
+    grams: float
+    raw: float
+    samples: int
+    settle_s: float  # From the start of the read to the last sample used
+    confidence: float  # 1.0 for a flat window, 0.5 at the tolerance, toward 0 beyond it
+    settled: bool
+
+
 class WeightSensor:
     def __init__(
         self,
@@ -40,22 +65,27 @@ class WeightSensor:
         gain: int = 128,
         use_pigpio: bool = False,
         calibration_file: str | Path | None = None,
+        hx=None,
     ):
-        if use_pigpio:
-            warnings.warn(
-                "pigpio backend is not implemented; falling back to RPi.GPIO with busy-wait timing.",
-                stacklevel=2,
-            )
-
-        self.hx = HX711(
-            HX711Config(dt_gpio=dt_gpio, sck_gpio=sck_gpio, gain=gain)
-        )
+        config = HX711Config(dt_gpio=dt_gpio, sck_gpio=sck_gpio, gain=gain)
+        self.hx = hx
+        if self.hx is None and use_pigpio:
+            try:
+                self.hx = HX711Pigpio(config)
+            except (ImportError, HX711NotReadyError) as e:
+                warnings.warn(
+                    f"pigpio backend unavailable ({e}); falling back to RPi.GPIO with busy-wait timing.",
+                    stacklevel=2,
+                )
+        if self.hx is None:
+            self.hx = HX711(config)
         self.cal = Calibration()
         self._cal_file = (
             Path(calibration_file)
             if calibration_file is not None
             else Path(__file__).with_name("default")
         )
+        self._sampler: ContinuousSampler | None = None
         self._load_calibration()
 
     @property
@@ -70,7 +100,23 @@ class WeightSensor:
     def calibration_file(self) -> Path:
         return self._cal_file
 
+    @property
+    def sampling(self) -> bool:
+        return self._sampler is not None
+
+    def start_sampling(self, capacity: int = 256):
+        """Reads continuously in the background; reads are then served from the buffer."""
+        if self._sampler is None:
+            self._sampler = ContinuousSampler(self.hx, capacity=capacity)
+            self._sampler.start()
+
+    def stop_sampling(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
     def close(self):
+        self.stop_sampling()
         self.hx.close()
 
     def _load_calibration(self):
@@ -86,8 +132,8 @@ class WeightSensor:
 
     def _save_calibration(self):
         self.cal.updated_at = int(time.time())
-        self._cal_file.parent.mkdir(parents=True, exist_ok=True)
-        self._cal_file.write_text(
+        _write_atomic(
+            self._cal_file,
             json.dumps(
                 {
                     "offset": float(self.cal.offset),
@@ -97,36 +143,37 @@ class WeightSensor:
                 indent=2,
                 sort_keys=True,
             )
-            + "\n"
+            + "\n",
         )
 
+    def adjust_offset(self, delta: float, persist: bool = False):
+        """Shifts the zero by `delta` raw counts, e.g. to follow drift."""
+        self.cal.offset = float(self.cal.offset) + float(delta)
+        if persist:
+            self._save_calibration()
+
     @staticmethod
     def _robust_mean(values: list[float]) -> float:
-        if len(values) < 4:
-            return float(median(values))
-
-        s = sorted(values)
-        n = len(s)
-        q1 = s[n // 4]
-        q3 = s[(3 * n) // 4]
-        iqr = q3 - q1
-
-        if iqr == 0:
-            return float(median(s))
-
-        margin = 1.5 * iqr
-        lo = q1 - margin
-        hi = q3 + margin
-        filtered = [v for v in s if lo <= v <= hi]
+        return RobustWindow.from_values(values).robust_mean()
 
-        if len(filtered) < 3:
-            return float(median(s))
-
-        return sum(filtered) / len(filtered)
+    def samples_since(self, since: float | None = None) -> list[tuple[float, int]]:
+        """Buffered (monotonic time, raw) pairs; empty unless sampling."""
+        if self._sampler is None:
+            return []
+        return self._sampler.snapshot(since)
 
     def read_raw_samples(
-        self, target: int, max_attempts: int, settle_ms: int = 0
+        self, target: int, max_attempts: int, settle_ms: int = 0,
+        after: float | None = None,
     ) -> list[int]:
+        if self._sampler is not None:
+            wait_s = max(0.0, after - time.monotonic()) if after is not None else 0.0
+            return self._sampler.collect(
+                target, after=after, timeout=wait_s + max_attempts * HX711_PERIOD_S
+            )
+        if after is not None:
+            time.sleep(max(0.0, after - time.monotonic()))
+
         vals: list[int] = []
         attempts = 0
         while len(vals) < target and attempts < max_attempts:
@@ -144,11 +191,13 @@ class WeightSensor:
             )
         return vals
 
-    def read_raw_avg(self, samples: int = 10, settle_ms: int = 2) -> float:
+    def read_raw_avg(self, samples: int = 10, settle_ms: int = 2,
+                     after: float | None = None) -> float:
         vals = self.read_raw_samples(
             target=samples,
             max_attempts=max(samples * 6, 30),
             settle_ms=settle_ms,
+            after=after,
         )
         return self._robust_mean([float(v) for v in vals])
 
@@ -181,9 +230,92 @@ class WeightSensor:
         self.cal.scale = float(scale)
         self._save_calibration()
 
-    def read_grams(self, samples: int = 12) -> float:
+    def read_grams(self, samples: int = 12, after: float | None = None) -> float:
+        """`after` (time.monotonic()) selects the first samples taken at or after that time.
+
+        When sampling, the latest buffered samples are used if `after` is None.
+        """
+        if self.cal.scale == 0:
+            raise CalibrationError("Missing calibration (scale=0)")
+
+        raw = self.read_raw_avg(samples=samples, settle_ms=2, after=after)
+        return self.to_grams(raw)
+
+    def read_settled(
+        self,
+        tolerance_g: float = 5.0,
+        window: int = 5,
+        max_samples: int = 40,
+        after: float | None = None,
+    ) -> SettledReading:
+        """Reads until the last `window` readings span at most `tolerance_g`.
+
+        Stops at `max_samples` otherwise and reports settled=False. `after`
+        (time.monotonic()) is when the read starts; now if None.
+        """
         if self.cal.scale == 0:
             raise CalibrationError("Missing calibration (scale=0)")
 
-        raw = self.read_raw_avg(samples=samples, settle_ms=2)
+        window = max(2, int(window))
+        max_samples = max(window, int(max_samples))
+        tolerance_raw = abs(float(tolerance_g) * float(self.cal.scale))
+        start = time.monotonic() if after is None else after
+
+        recent = RobustWindow(window)
+        count = 0
+        last_t = start
+        for t, raw in self._iter_samples(max_samples, start):
+            recent.push(raw)
+            count += 1
+            last_t = t
+            if recent.full and recent.span() <= tolerance_raw:
+                break
+        if count == 0:
+            raise HX711NotReadyError("No valid samples")
+
+        span = recent.span()
+        settled = recent.full and span <= tolerance_raw
+        if tolerance_raw > 0:
+            confidence = max(0.0, 1.0 - span / (2.0 * tolerance_raw))
+        else:
+            confidence = 1.0 if settled else 0.0
+        raw = recent.robust_mean()
+        return SettledReading(
+            grams=self.to_grams(raw),
+            raw=raw,
+            samples=count,
+            settle_s=max(0.0, last_t - start),
+            confidence=confidence,
+            settled=settled,
+        )
+
+    def _iter_samples(self, max_samples: int, start: float):
+        """Yields up to `max_samples` (monotonic time, raw) readings taken from `start` on."""
+        if self._sampler is not None:
+            for n in range(1, max_samples + 1):
+                wait_s = max(0.0, start - time.monotonic())
+                try:
+                    pairs = self._sampler.collect(
+                        n, after=start, timeout=wait_s + 6 * HX711_PERIOD_S, with_times=True
+                    )
+                except HX711NotReadyError:
+                    return
+                yield pairs[-1]
+            return
+
+        time.sleep(max(0.0, start - time.monotonic()))
+        count = 0
+        for _ in range(max_samples * 6):
+            try:
+                raw = self.hx.read_raw()
+            except (HX711NotReadyError, HX711ReadError):
+                continue
+            yield time.monotonic(), raw
+            count += 1
+            if count >= max_samples:
+                return
+
+    def to_grams(self, raw: float) -> float:
+        if self.cal.scale == 0:
+            raise CalibrationError("Missing calibration (scale=0)")
         return (raw - float(self.cal.offset)) / float(self.cal.scale)
\ No newline at end of file
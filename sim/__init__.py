@@ -0,0 +1,25 @@
+from .api import API_MODES, StubApi
+from .camera import FakeMappedArray, FakePicamera2, FakeRequest, static_source
+from .gpio import SimGPIO, beam_breaks
+from .hx711 import SimHX711
+from .pigpio import EchoModel, FakePi, HX711Device
+from .scenario import WORKLOADS, Disposal, SimScenario, replay_source
+
+__all__ = [
+    "API_MODES",
+    "WORKLOADS",
+    "Disposal",
+    "EchoModel",
+    "FakeMappedArray",
+    "FakePi",
+    "FakePicamera2",
+    "FakeRequest",
+    "HX711Device",
+    "SimGPIO",
+    "SimHX711",
+    "SimScenario",
+    "StubApi",
+    "beam_breaks",
+    "replay_source",
+    "static_source",
+]
@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_MODES = ("ok", "error", "drop")
+
+
+class StubApi:
+    """Local stand-in for the frontend API's POST /record.
+
+    `mode` switches its behaviour at any time: "ok" answers 201 after
+    `latency` seconds (or 503 for a `fail_rate` fraction of requests),
+    "error" answers `error_status`, and "drop" closes the connection without
+    answering, like a Wi-Fi outage. The times of all requests are kept so
+    callers can check how fast a backlog was sent.
+    """
+
+    def __init__(self, latency: float = 0.05, fail_rate: float = 0.0, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.mode = "ok"
+        self.error_status = 503
+        self.requests = 0
+        self.failures = 0
+        self.accepted = 0
+        self.request_times: list[float] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        api = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with api._lock:
+                    api.requests += 1
+                    api.request_times.append(time.monotonic())
+                    mode = api.mode
+                    failed = mode == "ok" and api._rng.random() < api.fail_rate
+                if mode == "drop":
+                    self.close_connection = True
+                    return
+                time.sleep(api.latency)
+                if mode == "error" or failed:
+                    status = api.error_status if mode == "error" else 503
+                    with api._lock:
+                        api.failures += 1
+                else:
+                    status = 201
+                    with api._lock:
+                        api.accepted += 1
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-api", daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_mode(self, mode: str):
+        if mode not in API_MODES:
+            raise ValueError(f"mode must be one of {API_MODES}")
+        self.mode = mode
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
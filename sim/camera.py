@@ -0,0 +1,102 @@
+import time
+
+import cv2
+import numpy as np
+
+
+def static_source(size, level=90):
+    width, height = size
+    frame = np.full((height, width, 3), level, dtype=np.uint8)
+    return lambda index, t: frame
+
+
+class FakeRequest:
+    def __init__(self, buffers):
+        self._buffers = buffers
+        self.released = False
+
+    def make_array(self, name):
+        return self._buffers[name].copy()
+
+    def release(self):
+        self.released = True
+
+
+class FakeMappedArray:
+    """Stand-in for picamera2.MappedArray: exposes the request buffer without copying."""
+
+    def __init__(self, request, stream, reshape=True):
+        self._request = request
+        self._stream = stream
+
+    def __enter__(self):
+        self.array = self._request._buffers[self._stream]
+        return self
+
+    def __exit__(self, *exc):
+        self.array = None
+        return False
+
+
+class FakePicamera2:
+    """Picamera2 stand-in that serves NumPy frames from `source(index, t)`.
+
+    The source returns BGR frames at the main stream size (the byte order
+    Picamera2 uses for RGB888). A lores stream, if configured, is derived from
+    each frame as YUV420.
+    """
+
+    def __init__(self, source=None, fps=None, size=(3840, 2160)):
+        self._source = source
+        self._size = size
+        self.fps = fps
+        self.controls = {}
+        self.config = None
+        self.started = False
+        self.frames_served = 0
+        self._next_frame_at = None
+
+    def create_still_configuration(self, main=None, lores=None, **kwargs):
+        config = {"main": {"size": self._size, "format": "RGB888", **(main or {})}}
+        if lores is not None:
+            config["lores"] = {"format": "YUV420", **lores}
+        return config
+
+    def configure(self, config):
+        self.config = config
+        if self._source is None:
+            self._source = static_source(config["main"]["size"])
+
+    def set_controls(self, controls):
+        self.controls.update(controls)
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.stop()
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_frame_at is None or self._next_frame_at < now:
+            self._next_frame_at = now
+        time.sleep(max(0.0, self._next_frame_at - now))
+        self._next_frame_at += 1.0 / self.fps
+
+    def capture_request(self):
+        if not self.started:
+            raise RuntimeError("camera not started")
+        self._pace()
+        main = self._source(self.frames_served, time.monotonic())
+        buffers = {"main": main}
+        lores = self.config.get("lores")
+        if lores is not None:
+            small = cv2.resize(main, tuple(lores["size"]), interpolation=cv2.INTER_AREA)
+            buffers["lores"] = cv2.cvtColor(small, cv2.COLOR_BGR2YUV_I420)
+        self.frames_served += 1
+        return FakeRequest(buffers)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+
+class SimGPIO:
+    """In-process stand-in for the RPi.GPIO module.
+
+    Pin levels are set with `inject` (immediately) or `play` (a background
+    thread replays a scripted edge sequence). Registered edge callbacks fire
+    from the injecting thread, like RPi.GPIO's own callback thread.
+    """
+
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, edge_detection: bool = True):
+        self.edge_detection = edge_detection
+        self.mode = None
+        self._levels: dict[int, int] = {}
+        self._directions: dict[int, int] = {}
+        self._callbacks: dict[int, tuple[int, object]] = {}
+        self._lock = threading.Lock()
+        self._players: list[threading.Thread] = []
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self._lock:
+            self._directions[pin] = direction
+            if initial is not None:
+                self._levels[pin] = initial
+            elif pin not in self._levels:
+                self._levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+
+    def input(self, pin):
+        with self._lock:
+            return self._levels.get(pin, self.LOW)
+
+    def output(self, pin, value):
+        self.inject(pin, int(bool(value)))
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if not self.edge_detection:
+            raise RuntimeError("Failed to add edge detection")
+        with self._lock:
+            self._callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self._callbacks.pop(pin, None)
+
+    def cleanup(self, pins=None):
+        with self._lock:
+            targets = list(self._directions) if pins is None else list(pins)
+            for pin in targets:
+                self._directions.pop(pin, None)
+                self._callbacks.pop(pin, None)
+
+    def inject(self, pin, level):
+        with self._lock:
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = level
+            edge, callback = self._callbacks.get(pin, (None, None))
+        if callback is None or previous == level:
+            return
+        rising = level == self.HIGH
+        if edge == self.BOTH or (edge == self.RISING) == rising:
+            callback(pin)
+
+    def play(self, pin, script, start=None):
+        """Replays [(offset_s, level), ...] relative to `start` (monotonic) in a thread."""
+        start = time.monotonic() if start is None else start
+
+        def _run():
+            for offset, level in script:
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.inject(pin, level)
+
+        player = threading.Thread(target=_run, name=f"sim-gpio-{pin}", daemon=True)
+        player.start()
+        self._players.append(player)
+        return player
+
+
+def beam_breaks(times, width=0.05):
+    """Edge script for an active-low break beam broken at each time for `width` seconds."""
+    script = []
+    for t in sorted(times):
+        script.append((t, SimGPIO.LOW))
+        script.append((t + width, SimGPIO.HIGH))
+    return script
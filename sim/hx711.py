@@ -0,0 +1,47 @@
+import random
+import time
+
+from sensors.weight_sensor.errors import HX711NotReadyError
+
+
+class SimHX711:
+    """Stand-in for HX711/HX711Pigpio returning modelled raw counts.
+
+    The reading is `offset + drift_per_s * t + scale * load_g(t)` plus gaussian
+    noise, where t is seconds since `t0` (monotonic, default creation) and
+    `load_g` may be a number or a callable of t. Reads are paced at `rate_hz` like the real converter, and
+    `not_ready_rate` of them fail.
+    """
+
+    def __init__(self, offset=142000.0, scale=420.0, load_g=0.0, drift_per_s=0.0,
+                 noise=60.0, rate_hz=10.0, not_ready_rate=0.0, seed=None, t0=None):
+        self.offset = offset
+        self.scale = scale
+        self.load_g = load_g
+        self.drift_per_s = drift_per_s
+        self.noise = noise
+        self.rate_hz = rate_hz
+        self.not_ready_rate = not_ready_rate
+        self._rng = random.Random(seed)
+        self._t0 = time.monotonic() if t0 is None else t0
+        self._next = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._t0
+
+    def expected(self, t: float) -> float:
+        """Noise-free raw value `t` seconds after creation."""
+        load = self.load_g(t) if callable(self.load_g) else self.load_g
+        return self.offset + self.drift_per_s * t + self.scale * load
+
+    def read_raw(self) -> int:
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.monotonic()) + 1.0 / self.rate_hz
+        if self._rng.random() < self.not_ready_rate:
+            raise HX711NotReadyError("Simulated not-ready")
+        return int(round(self.expected(self.elapsed()) + self._rng.gauss(0.0, self.noise)))
+
+    def close(self):
+        pass
@@ -0,0 +1,281 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+INPUT = 0
+OUTPUT = 1
+PUD_OFF = 0
+PUD_DOWN = 1
+PUD_UP = 2
+RISING_EDGE = 0
+FALLING_EDGE = 1
+EITHER_EDGE = 2
+TIMEOUT = 2
+
+
+def tickDiff(t1, t2):
+    return (t2 - t1) & 0xFFFFFFFF
+
+
+class pulse:
+    def __init__(self, gpio_on, gpio_off, delay):
+        self.gpio_on = gpio_on
+        self.gpio_off = gpio_off
+        self.delay = delay
+
+
+class EchoModel:
+    """HC-SR04 style echo: a pulse whose width encodes the distance.
+
+    `distance_cm` may be a number or a callable of the monotonic time, so a
+    scenario can change the fill level over time.
+    """
+
+    SPEED_OF_SOUND_CM_S = 34300.0
+
+    def __init__(self, distance_cm=50.0, noise_cm=0.3, timeout_rate=0.0,
+                 outlier_rate=0.0, echo_delay_s=0.0004, seed=None):
+        self.distance_cm = distance_cm
+        self.noise_cm = noise_cm
+        self.timeout_rate = timeout_rate
+        self.outlier_rate = outlier_rate
+        self.echo_delay_s = echo_delay_s
+        self._rng = random.Random(seed)
+
+    def pulse_s(self, now):
+        """Echo pulse width in seconds, or None if the echo never returns."""
+        if self._rng.random() < self.timeout_rate:
+            return None
+        distance = self.distance_cm(now) if callable(self.distance_cm) else self.distance_cm
+        if self._rng.random() < self.outlier_rate:
+            distance *= self._rng.uniform(0.2, 3.0)
+        distance += self._rng.gauss(0.0, self.noise_cm)
+        return max(distance, 0.5) * 2.0 / self.SPEED_OF_SOUND_CM_S
+
+
+class HX711Device:
+    """Pin-level HX711: shifts out `raw(t)` MSB first on SCK rising edges.
+
+    DOUT goes low when a conversion is ready (every 1/rate seconds) and high
+    again once the 24 data bits have been clocked out.
+    """
+
+    def __init__(self, raw, rate_hz=10.0):
+        self.raw = raw
+        self.rate_hz = rate_hz
+        self._pi = None
+        self._bits = []
+        self._clocks = 0
+        self._ready_at = 0.0
+
+    def attach(self, pi, dt_pin, sck_pin):
+        self._pi = pi
+        self.dt_pin = dt_pin
+        self.sck_pin = sck_pin
+        self._ready_at = time.monotonic()
+        pi.inject(dt_pin, 0)
+
+    def on_sck(self, level, at):
+        if level != 1:
+            return
+        if self._clocks == 0:
+            value = int(self.raw(at)) & 0xFFFFFF
+            self._bits = [(value >> (23 - i)) & 1 for i in range(24)]
+        self._clocks += 1
+        if self._clocks <= 24:
+            self._pi.inject(self.dt_pin, self._bits[self._clocks - 1], at=at)
+        elif self._clocks == 25:
+            self._pi.inject(self.dt_pin, 1, at=at)
+            self._ready_at = at + 1.0 / self.rate_hz
+            self._pi._schedule(self._ready_at, self.dt_pin, 0)
+
+    def end_frame(self):
+        self._clocks = 0
+
+
+class _Callback:
+    def __init__(self, pi, pin, edge, func):
+        self._pi = pi
+        self.pin = pin
+        self.edge = edge
+        self.func = func
+
+    def cancel(self):
+        self._pi._remove_callback(self)
+
+
+class FakePi:
+    """Stand-in for a pigpio.pi() connection.
+
+    Levels change through `inject` (or through attached models reacting to
+    `gpio_trigger`); callbacks receive ticks computed from when an edge was
+    scheduled to happen, as the daemon's sampling thread would report them.
+    """
+
+    def __init__(self, connected=True):
+        self.connected = connected
+        self._t0 = time.monotonic()
+        self._levels: dict[int, int] = {}
+        self._modes: dict[int, int] = {}
+        self._callbacks: list[_Callback] = []
+        self._echoes: dict[int, tuple[int, EchoModel]] = {}
+        self._hx711: dict[int, HX711Device] = {}
+        self._building: list[pulse] = []
+        self._waves: dict[int, list[pulse]] = {}
+        self._wave_busy_until = 0.0
+        self._lock = threading.Lock()
+
+    def _tick_at(self, t):
+        return int((t - self._t0) * 1e6) & 0xFFFFFFFF
+
+    def get_current_tick(self):
+        return self._tick_at(time.monotonic())
+
+    def set_mode(self, pin, mode):
+        self._modes[pin] = mode
+
+    def get_mode(self, pin):
+        return self._modes.get(pin, INPUT)
+
+    def set_pull_up_down(self, pin, pud):
+        with self._lock:
+            if pin not in self._levels:
+                self._levels[pin] = 1 if pud == PUD_UP else 0
+
+    def read(self, pin):
+        with self._lock:
+            return self._levels.get(pin, 0)
+
+    def write(self, pin, level):
+        self.inject(pin, level)
+
+    def callback(self, pin, edge=RISING_EDGE, func=None):
+        cb = _Callback(self, pin, edge, func)
+        with self._lock:
+            self._callbacks.append(cb)
+        return cb
+
+    def _remove_callback(self, cb):
+        with self._lock:
+            if cb in self._callbacks:
+                self._callbacks.remove(cb)
+
+    def inject(self, pin, level, at=None):
+        """Sets a pin level; `at` is the monotonic time the edge is reported to have happened."""
+        at = time.monotonic() if at is None else at
+        with self._lock:
+            previous = self._levels.get(pin, 0)
+            self._levels[pin] = level
+            callbacks = [cb for cb in self._callbacks if cb.pin == pin]
+        if previous == level:
+            return
+        tick = self._tick_at(at)
+        for cb in callbacks:
+            if cb.edge == EITHER_EDGE or (cb.edge == RISING_EDGE) == (level == 1):
+                cb.func(pin, level, tick)
+
+    def _schedule(self, at, pin, level):
+        self._schedule_edges(pin, [(at, level)])
+
+    def _schedule_edges(self, pin, edges):
+        """Injects the (at, level) `edges` on `pin` at their times, in order, from one timer thread."""
+        def fire():
+            for at, level in edges:
+                time.sleep(max(0.0, at - time.monotonic()))
+                self.inject(pin, level, at)
+
+        timer = threading.Timer(max(0.0, edges[0][0] - time.monotonic()), fire)
+        timer.daemon = True
+        timer.start()
+
+    def attach_echo(self, trig_pin, echo_pin, model: EchoModel):
+        self._echoes[trig_pin] = (echo_pin, model)
+
+    def gpio_trigger(self, pin, pulse_len=10, level=1):
+        echo = self._echoes.get(pin)
+        if echo is None:
+            return 0
+        echo_pin, model = echo
+        now = time.monotonic()
+        width = model.pulse_s(now)
+        if width is None:
+            return 0
+        rise = now + pulse_len / 1e6 + model.echo_delay_s
+        # One timer for both edges, so a loaded machine cannot reorder them
+        self._schedule_edges(echo_pin, [(rise, 1), (rise + width, 0)])
+        return 0
+
+    def attach_hx711(self, dt_pin, sck_pin, device: HX711Device):
+        self._hx711[sck_pin] = device
+        device.attach(self, dt_pin, sck_pin)
+
+    def wave_add_new(self):
+        self._building = []
+
+    def wave_clear(self):
+        self._building = []
+        self._waves.clear()
+
+    def wave_add_generic(self, pulses):
+        self._building.extend(pulses)
+        return len(self._building)
+
+    def wave_create(self):
+        wave_id = len(self._waves)
+        self._waves[wave_id] = self._building
+        self._building = []
+        return wave_id
+
+    def wave_delete(self, wave_id):
+        self._waves.pop(wave_id, None)
+
+    def wave_tx_busy(self):
+        return 1 if time.monotonic() < self._wave_busy_until else 0
+
+    def wave_send_once(self, wave_id):
+        pulses = self._waves[wave_id]
+        start = time.monotonic()
+        self._wave_busy_until = start + sum(p.delay for p in pulses) / 1e6
+
+        def _play():
+            t = start
+            for p in pulses:
+                for pin in range(32):
+                    if p.gpio_on & (1 << pin):
+                        self._drive(pin, 1, t)
+                    if p.gpio_off & (1 << pin):
+                        self._drive(pin, 0, t)
+                t += p.delay / 1e6
+            for device in self._hx711.values():
+                device.end_frame()
+
+        threading.Thread(target=_play, name="fake-pigpio-wave", daemon=True).start()
+        return len(pulses)
+
+    def _drive(self, pin, level, at):
+        # Waveforms are DMA-timed on the real daemon; edges are reported at
+        # their scheduled time whatever the host thread's latency
+        self.inject(pin, level, at=at)
+        device = self._hx711.get(pin)
+        if device is not None:
+            device.on_sck(level, at)
+
+    def stop(self):
+        self.connected = False
+
+
+def pi(*args, **kwargs):
+    return FakePi()
+
+
+def module(pi_factory=FakePi):
+    """A pigpio-module stand-in whose pi() returns `pi_factory()`."""
+    return SimpleNamespace(
+        INPUT=INPUT, OUTPUT=OUTPUT,
+        PUD_OFF=PUD_OFF, PUD_DOWN=PUD_DOWN, PUD_UP=PUD_UP,
+        RISING_EDGE=RISING_EDGE, FALLING_EDGE=FALLING_EDGE, EITHER_EDGE=EITHER_EDGE,
+        TIMEOUT=TIMEOUT, tickDiff=tickDiff, pulse=pulse,
+        pi=lambda *args, **kwargs: pi_factory(),
+    )
@@ -0,0 +1,174 @@
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .gpio import beam_breaks
+
+WORKLOADS = ("steady", "bursty", "overlapping")
+
+
+@dataclass
+class Disposal:
+    at: float  # Seconds after the scenario start that the item breaks the IR beam
+    weight_g: float = 50.0
+    height_cm: float = 0.5  # Rise of the fill level once the item lands
+
+
+@dataclass
+class SimScenario:
+    """One shared script of disposals that drives every simulated sensor.
+
+    The scenario is plain data so it can be passed to each process, where the
+    backends build their fakes from it. All of them read time.monotonic()
+    against the same `start`, so the IR edge, the item in the camera view, the
+    weight change and the fill level line up across processes.
+    """
+
+    disposals: list = field(default_factory=list)
+    start: float = 0.0
+    ir_pin: int = 5
+    trig_pin: int = 23
+    echo_pin: int = 24
+    bin_depth_cm: float = 80.0
+    fall_s: float = 0.3  # IR beam to landing on the load cell
+    visible_s: float = 0.5  # How long the item is in the camera view
+    bounce: float = 0.4  # Load cell overshoot, as a fraction of the item weight
+    frame_size: tuple = (3840, 2160)
+    fps: float = 15.0
+    replay: str | None = None  # .npy stack, video file or image directory to loop instead
+    hx_offset: float = 142000.0
+    hx_scale: float = 420.0
+    hx_noise: float = 60.0
+    hx_drift_per_s: float = 0.0
+    hx_rate_hz: float = 10.0
+    echo_noise_cm: float = 0.3
+    echo_timeout_rate: float = 0.0
+    seed: int = 0
+
+    @classmethod
+    def steady(cls, count: int, interval: float, lead: float = 3.0, **kwargs) -> "SimScenario":
+        return cls(disposals=[Disposal(lead + i * interval) for i in range(count)], **kwargs)
+
+    @classmethod
+    def bursty(cls, count: int, interval: float, burst: int = 4, spacing: float = 1.0,
+               lead: float = 3.0, **kwargs) -> "SimScenario":
+        """Groups of `burst` items `spacing` s apart, one group every `interval` s."""
+        times = [lead + (i // burst) * interval + (i % burst) * spacing for i in range(count)]
+        return cls(disposals=[Disposal(t) for t in times], **kwargs)
+
+    @classmethod
+    def overlapping(cls, count: int, interval: float, lead: float = 3.0, **kwargs) -> "SimScenario":
+        """Pairs of items, the second falling while the first is still in view."""
+        scenario = cls(**kwargs)
+        gap = scenario.visible_s / 2
+        scenario.disposals = [Disposal(lead + (i // 2) * interval + (i % 2) * gap) for i in range(count)]
+        return scenario
+
+    @classmethod
+    def workload(cls, name: str, count: int, interval: float, **kwargs) -> "SimScenario":
+        if name not in WORKLOADS:
+            raise ValueError(f"workload must be one of {WORKLOADS}")
+        return getattr(cls, name)(count, interval, **kwargs)
+
+    def begin(self, lead: float = 0.0) -> "SimScenario":
+        """Anchors the script at now + `lead` seconds; call before starting the processes."""
+        self.start = time.monotonic() + lead
+        return self
+
+    def elapsed(self, now: float | None = None) -> float:
+        return (time.monotonic() if now is None else now) - self.start
+
+    @property
+    def end(self) -> float:
+        """Seconds after the start when the last item has landed."""
+        return max((d.at for d in self.disposals), default=0.0) + self.fall_s
+
+    def beam_script(self, width: float = 0.05):
+        return beam_breaks([d.at for d in self.disposals], width)
+
+    def load_g(self, t: float) -> float:
+        """Weight on the load cell `t` seconds after the start, with a damped bounce on landing."""
+        load = 0.0
+        for d in self.disposals:
+            since = t - d.at - self.fall_s
+            if since < 0:
+                continue
+            load += d.weight_g * (1.0 + self.bounce * math.exp(-since / 0.15) * math.cos(since * 40.0))
+        return load
+
+    def distance_cm(self, now: float) -> float:
+        """Ultrasonic distance to the fill surface at monotonic time `now`."""
+        t = self.elapsed(now)
+        filled = sum(d.height_cm for d in self.disposals if t >= d.at + self.fall_s)
+        return max(2.0, self.bin_depth_cm - filled)
+
+    def frame_source(self):
+        """`source(index, t)` for FakePicamera2: items falling through the view, or a replay."""
+        if self.replay:
+            return replay_source(self.replay, self.frame_size)
+
+        width, height = self.frame_size
+        rng = np.random.default_rng(self.seed)
+        base = np.full((height, width, 3), 90, dtype=np.uint8)
+        base += rng.integers(0, 8, size=(height, 1, 1), dtype=np.uint8)
+        frame = np.empty_like(base)
+        item_w, item_h = width // 10, height // 8
+
+        def source(index, now):
+            np.copyto(frame, base)
+            t = self.elapsed(now)
+            for d in self.disposals:
+                progress = (t - d.at) / self.visible_s
+                if 0.0 <= progress <= 1.0:
+                    y = int(progress * (height - item_h))
+                    x = width // 2 - item_w // 2
+                    frame[y:y + item_h, x:x + item_w] = 230
+            return frame
+
+        return source
+
+
+def replay_source(path, size):
+    """Loops recorded frames from a .npy stack, a video file or a directory of images.
+
+    Frames are read lazily and resized to `size` (BGR), so long recordings do
+    not have to fit in memory.
+    """
+    path = Path(path)
+    width, height = size
+
+    def _fit(frame):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        if frame.shape[1] != width or frame.shape[0] != height:
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+        return frame
+
+    if path.suffix == ".npy":
+        stack = np.load(path, mmap_mode="r")
+        return lambda index, t: _fit(np.asarray(stack[index % len(stack)]))
+
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        if not files:
+            raise ValueError(f"No images in {path}")
+        return lambda index, t: _fit(cv2.imread(str(files[index % len(files)])))
+
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open {path}")
+
+    def source(index, t):
+        ok, frame = cap.read()
+        if not ok:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = cap.read()
+            if not ok:
+                raise RuntimeError(f"Cannot read frames from {path}")
+        return _fit(frame)
+
+    return source
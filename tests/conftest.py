@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.data_store import DataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DataStore(root=tmp_path / "store")
+    yield store
+    store.close()
@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+import pytest
+
+from sensors.vision import DetectionGeometry, FrameAcquirer, decimate_gray
+from sim import FakeMappedArray, FakePicamera2
+
+FULL = (320, 180)
+DETECT = (160, 90)
+
+
+class RecordingCamera(FakePicamera2):
+    def capture_request(self):
+        self.last_request = super().capture_request()
+        return self.last_request
+
+
+def _frame():
+    frame = np.zeros((FULL[1], FULL[0], 3), dtype=np.uint8)
+    frame[:, :, 0] = np.linspace(0, 255, FULL[0], dtype=np.uint8)
+    frame[40:120, 100:220] = (30, 200, 90)
+    return frame
+
+
+def _acquirer(mode):
+    frame = _frame()
+    camera = RecordingCamera(source=lambda index, t: frame, size=FULL)
+    geometry = DetectionGeometry(full_size=FULL, detect_size=FULL if mode == "main" else DETECT)
+    acquirer = FrameAcquirer(camera, geometry, mode, FakeMappedArray)
+    camera.configure(camera.create_still_configuration(**acquirer.stream_config()))
+    camera.start()
+    return acquirer, camera, frame
+
+
+def test_lores_mode_detects_on_the_luminance_plane():
+    acquirer, camera, frame = _acquirer("lores")
+    assert camera.config["lores"] == {"format": "YUV420", "size": DETECT}
+    assert camera.config["main"]["format"] == "RGB888"
+
+    with acquirer.capture() as (main, gray):
+        # Views into the request's buffers, not copies
+        assert np.shares_memory(main, frame)
+        assert np.shares_memory(gray, camera.last_request._buffers["lores"])
+        assert gray.shape == (DETECT[1], DETECT[0])
+        # Limited-range luminance of the same scene
+        expected = 16 + decimate_gray(frame, DETECT) * (219 / 255)
+        assert np.abs(gray - expected).max() <= 3
+        assert not camera.last_request.released
+    assert camera.last_request.released
+
+
+@pytest.mark.parametrize("mode, size", [("decimate", DETECT), ("main", FULL)])
+def test_other_modes_convert_the_main_stream(mode, size):
+    acquirer, camera, frame = _acquirer(mode)
+    assert "lores" not in camera.config
+
+    with acquirer.capture() as (main, gray):
+        assert np.shares_memory(main, frame)
+        assert gray.shape == (size[1], size[0])
+        if mode == "main":
+            assert np.array_equal(gray, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        else:
+            small = cv2.resize(frame, DETECT, interpolation=cv2.INTER_AREA)
+            assert np.array_equal(gray, cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        first = gray
+    # Conversion reuses the buffers preallocated for the detection frame
+    with acquirer.capture() as (_, gray):
+        assert gray is first or np.shares_memory(gray, first)
+
+
+def test_request_is_released_when_the_block_raises():
+    acquirer, camera, _ = _acquirer("lores")
+    with pytest.raises(RuntimeError):
+        with acquirer.capture():
+            raise RuntimeError("detector failed")
+    assert camera.last_request.released
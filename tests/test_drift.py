@@ -0,0 +1,109 @@
+import json
+import random
+import time
+
+from sensors.weight_sensor import DriftTracker, WeightSensor
+from sim import SimHX711
+
+SCALE = 420.0
+OFFSET = 142000.0
+
+
+class FakeSensor:
+    """WeightSensor stand-in whose buffered samples come from `raw(t)`."""
+
+    def __init__(self, tmp_path, raw, rate_hz=10.0):
+        self.raw = raw
+        self.rate_hz = rate_hz
+        self.scale = SCALE
+        self.offset = OFFSET
+        self.calibration_file = tmp_path / "bin.json"
+        self.sampling = True
+        self.now = 0.0
+
+    def samples_since(self, since=None):
+        step = 1.0 / self.rate_hz
+        t = max(since or 0.0, self.now - 25.0)
+        samples = []
+        while t <= self.now:
+            samples.append((t, self.raw(t)))
+            t += step
+        return samples
+
+    def adjust_offset(self, delta, persist=False):
+        self.offset += delta
+
+    def _save_calibration(self):
+        pass
+
+
+def _run(tmp_path, raw, hours, check_s=10.0):
+    # Simulated time starts now, after the tracker's own start
+    start = time.monotonic() + 1.0
+    ws = FakeSensor(tmp_path, lambda t: raw(t - start))
+    tracker = DriftTracker(ws, idle_s=0.0, check_interval_s=check_s, persist_interval_s=10**9)
+    tracker.notify_trigger(start)
+    steps = []
+    t = 30.0
+    while t <= hours * 3600:
+        ws.now = start + t
+        step = tracker.update(start + t)
+        if step:
+            steps.append(step)
+        t += check_s
+    return ws, steps
+
+
+def test_noise_does_not_move_the_zero(tmp_path):
+    rng = random.Random(1)
+    # 200 g of load with ±0.5 g of sample noise and no drift
+    ws, steps = _run(tmp_path, lambda t: OFFSET + SCALE * (200 + rng.gauss(0, 0.5)), hours=2)
+    assert steps == []
+    assert ws.offset == OFFSET
+
+
+def test_slow_drift_is_followed(tmp_path):
+    rng = random.Random(2)
+    drift_g_per_h = 4.0
+    ws, steps = _run(tmp_path, lambda t: OFFSET + SCALE * (200 + drift_g_per_h * t / 3600 + rng.gauss(0, 0.3)),
+                     hours=3)
+    assert steps
+    followed_g = (ws.offset - OFFSET) / SCALE
+    assert abs(followed_g - 3 * drift_g_per_h) <= 2.0
+
+
+def test_load_change_faster_than_drift_is_kept(tmp_path):
+    rng = random.Random(3)
+    # Liquid draining at 60 g/h, well within max_step_g per check
+    ws, steps = _run(tmp_path, lambda t: OFFSET + SCALE * (200 - 60 * t / 3600 + rng.gauss(0, 0.3)), hours=1)
+    assert steps == []
+    assert ws.offset == OFFSET
+
+
+def test_hx711_drift_is_followed_and_saved(tmp_path):
+    calibration = tmp_path / "bin.json"
+    calibration.write_text(json.dumps({"offset": OFFSET, "scale": SCALE}))
+    # Drift fast enough to see in seconds; the tracker lags it by its confirm windows
+    drift_g_per_s = 2.0
+    hx = SimHX711(offset=OFFSET, scale=SCALE, load_g=200.0, drift_per_s=drift_g_per_s * SCALE,
+                  noise=20.0, rate_hz=200.0, seed=4)
+    ws = WeightSensor(calibration_file=calibration, hx=hx)
+    ws.start_sampling()
+    tracker = DriftTracker(ws, idle_s=0.0, check_interval_s=0.25, max_rate_g_per_h=10**5,
+                           persist_interval_s=10**9)
+    try:
+        tracker.start()
+        time.sleep(4.0)
+    finally:
+        tracker.stop()
+        ws.close()
+
+    drifted_g = drift_g_per_s * hx.elapsed()
+    followed_g = (ws.offset - OFFSET) / SCALE
+    assert drifted_g - 4.0 <= followed_g <= drifted_g
+
+    # Stopping writes the pending correction to the calibration and its history
+    assert json.loads(calibration.read_text())["offset"] == ws.offset
+    history = [json.loads(line) for line in tracker.history_file.read_text().splitlines()]
+    assert history[-1]["offset"] == round(ws.offset, 1)
+    assert tracker.history_file == tmp_path / "bin.drift.jsonl"
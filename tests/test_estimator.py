@@ -0,0 +1,56 @@
+import random
+from collections import deque
+from statistics import median
+
+import pytest
+
+from sensors.weight_sensor import RobustWindow
+
+
+def _sorted_robust_mean(values):
+    # The sort-per-call WeightSensor._robust_mean that RobustWindow replaced
+    if len(values) < 4:
+        return float(median(values))
+    s = sorted(values)
+    n = len(s)
+    q1 = s[n // 4]
+    q3 = s[(3 * n) // 4]
+    iqr = q3 - q1
+    if iqr == 0:
+        return float(median(s))
+    lo = q1 - 1.5 * iqr
+    hi = q3 + 1.5 * iqr
+    filtered = [v for v in s if lo <= v <= hi]
+    if len(filtered) < 3:
+        return float(median(s))
+    return sum(filtered) / len(filtered)
+
+
+def _readings(n, seed):
+    rng = random.Random(seed)
+    for _ in range(n):
+        if rng.random() < 0.05:
+            yield 142000 + rng.choice((-1, 1)) * rng.randint(5000, 200000)
+        elif rng.random() < 0.2:
+            yield 142000  # Repeats, so ties and a zero IQR come up
+        else:
+            yield 142000 + int(rng.gauss(0, 150))
+
+
+@pytest.mark.parametrize("size", [1, 3, 4, 5, 10, 40])
+def test_sliding_window_matches_sorted_robust_mean(size):
+    window = RobustWindow(size)
+    recent = deque(maxlen=size)
+    for raw in _readings(2000, seed=size):
+        window.push(raw)
+        recent.append(float(raw))
+        assert window.robust_mean() == pytest.approx(_sorted_robust_mean(list(recent)), abs=1e-6)
+        assert window.median() == median(recent)
+
+
+def test_from_values_matches_pushes():
+    values = list(_readings(25, seed=1))
+    window = RobustWindow(len(values))
+    window.extend(values)
+    assert RobustWindow.from_values(values).robust_mean() == pytest.approx(window.robust_mean())
+    assert RobustWindow.from_values(values).robust_mean() == pytest.approx(_sorted_robust_mean(values))
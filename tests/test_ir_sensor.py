@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from sensors.ir_sensor import ir_sensor_process
+from sim import FakePi, SimGPIO, beam_breaks
+from sim import pigpio as sim_pigpio
+
+PIN = 5
+# The second break falls inside the first one's debounce window
+BREAKS = (0.2, 0.4, 1.0)
+
+
+def _run(gpio, mode, start, debounce=0.5, stages=2):
+    outputs = [queue.Queue() for _ in range(stages)]
+    stop = threading.Event()
+    thread = threading.Thread(target=ir_sensor_process, args=(outputs, PIN, debounce, mode, gpio),
+                              kwargs={"stop": stop}, daemon=True)
+    thread.start()
+    time.sleep(max(0.0, start + max(BREAKS) + 0.3 - time.monotonic()))
+    stop.set()
+    thread.join(3.0)
+    assert not thread.is_alive()
+    return [[q.get_nowait() for _ in range(q.qsize())] for q in outputs]
+
+
+def _check(outputs, start, tolerance):
+    for triggers in outputs:
+        assert [t['trigger'] for t in triggers] == [1, 2]
+        for trigger, at in zip(triggers, (BREAKS[0], BREAKS[2])):
+            assert trigger['trigger_time'] == pytest.approx(start + at, abs=tolerance)
+
+
+def test_edge_callbacks_fan_out_debounced_triggers():
+    gpio = SimGPIO()
+    start = time.monotonic() + 0.2
+    gpio.play(PIN, beam_breaks(BREAKS), start=start)
+    _check(_run(gpio, "edge", start), start, tolerance=0.02)
+
+
+def test_falls_back_to_polling_without_edge_detection(capsys):
+    gpio = SimGPIO(edge_detection=False)
+    start = time.monotonic() + 0.2
+    gpio.play(PIN, beam_breaks(BREAKS), start=start)
+    outputs = _run(gpio, "edge", start)
+    assert "(polling)" in capsys.readouterr().out
+    # Polling sees the break on its next 10 ms sample
+    _check(outputs, start, tolerance=0.05)
+
+
+def test_pigpio_ticks_give_the_edge_time():
+    start = time.monotonic() + 0.2
+
+    def _pi():
+        pi = FakePi()
+        pi.set_pull_up_down(PIN, sim_pigpio.PUD_UP)
+        for offset, level in beam_breaks(BREAKS):
+            pi._schedule(start + offset, PIN, level)
+        return pi
+
+    # Stamped from the daemon's tick, not from when Python got to it
+    _check(_run(sim_pigpio.module(_pi), "pigpio", start), start, tolerance=0.002)
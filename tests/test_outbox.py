@@ -0,0 +1,204 @@
+import os
+import time
+
+import pytest
+
+from client.client import ClientSender
+from client.uploader import Uploader
+from sim.api import StubApi
+
+
+class FakeSender:
+    def __init__(self, **result):
+        self.result = {'success': False, 'status': None, 'error': None, 'reachable': True, 'local': False, **result}
+        self.sent = []
+
+    def send(self, fullness, weight, image_path=None):
+        self.sent.append(fullness)
+        return self.result
+
+
+class ReadingSender:
+    """Reads the image like ClientSender does; the API itself always accepts."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, fullness, weight, image_path=None):
+        try:
+            with open(image_path, 'rb'):
+                pass
+        except OSError as e:
+            return {'success': False, 'status': None, 'error': str(e), 'reachable': True, 'local': True}
+        self.sent.append(fullness)
+        return {'success': True, 'status': 201, 'error': None, 'reachable': True, 'local': False}
+
+
+@pytest.fixture
+def api():
+    api = StubApi(latency=0.0)
+    yield api
+    api.close()
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def _fill(store, tmp_path, n):
+    ids = []
+    for i in range(n):
+        image = tmp_path / f"capture_{i}.jpg"
+        image.write_bytes(b"\xff\xd8" + bytes(64))
+        ids.append(store.store(fullness=float(i), weight=float(i), image_path=str(image)))
+    return ids
+
+
+def _uploader(store, sender, **kwargs):
+    # No first backoff step, so a failed record is due again straight away
+    return Uploader(store.queue, sender, retry_delay=0.0, rate=1000, burst=10, **kwargs)
+
+
+def _attempts(store):
+    """{id: upload_attempts} of the records due now; claims them for 0 s."""
+    return {r[0]: r[5] for r in store.queue.claim(100, lease_s=0)}
+
+
+def test_claim_is_oldest_first_and_exclusive(store, tmp_path):
+    ids = _fill(store, tmp_path, 5)
+    assert [r[0] for r in store.queue.claim(3)] == ids[:3]
+    assert [r[0] for r in store.queue.claim(3)] == ids[3:]
+    assert store.queue.claim(3) == []
+
+
+def test_release_and_expired_lease_make_records_claimable(store, tmp_path):
+    first, second = _fill(store, tmp_path, 2)
+    store.queue.claim(2)
+    store.queue.release([first])
+    assert [(r[0], r[5]) for r in store.queue.claim(2)] == [(first, 0)]
+    # A crashed uploader's claim runs out
+    assert [r[0] for r in store.queue.claim(2, lease_s=0)] == [first, second]
+
+
+def test_ack_marks_uploaded(store, tmp_path):
+    record_id, = _fill(store, tmp_path, 1)
+    store.queue.claim(1)
+    store.queue.ack(record_id)
+    assert store.queue.upload_backlog() == (0, None)
+    assert store.queue.claim(1, lease_s=0) == []
+
+
+def test_nack_backs_off_then_gives_up(store, tmp_path):
+    record_id, = _fill(store, tmp_path, 1)
+    store.queue.claim(1)
+    store.queue.nack(record_id, time.time() + 60, "HTTP 503")
+    assert store.queue.claim(1, lease_s=0) == []
+    assert store.queue.upload_backlog()[0] == 1
+
+    store.queue.nack(record_id, 0, "HTTP 503")
+    assert _attempts(store) == {record_id: 2}
+
+    store.queue.nack(record_id, 0, "HTTP 503", give_up=True)
+    assert store.queue.upload_backlog()[0] == 0
+    assert store.queue.claim(1, lease_s=0) == []
+
+    assert store.queue.requeue_gave_up() == 1
+    assert _attempts(store) == {record_id: 0}
+
+
+def test_unreachable_api_spends_no_attempts(store, tmp_path):
+    ids = _fill(store, tmp_path, 3)
+    uploader = _uploader(store, FakeSender(error="connection error", reachable=False), max_attempts=1)
+    for _ in range(3):
+        assert not uploader.drain()
+    assert _attempts(store) == {i: 0 for i in ids}
+
+
+def test_server_errors_pause_and_are_retried_until_max_attempts(store, tmp_path):
+    first, second = _fill(store, tmp_path, 2)
+    sender = FakeSender(status=503, error="HTTP 503")
+    uploader = _uploader(store, sender, max_attempts=2)
+    assert not uploader.drain()
+    # The pause leaves the rest of the batch for later, unspent
+    assert sender.sent == [0.0]
+    assert _attempts(store) == {first: 1, second: 0}
+    store.queue.release([first, second])
+
+    assert not uploader.drain()
+    assert _attempts(store) == {second: 0}
+    assert uploader.gave_up == 1
+
+
+def test_rejected_record_is_given_up_without_pausing(store, tmp_path):
+    _fill(store, tmp_path, 2)
+    sender = FakeSender(status=400, error="HTTP 400")
+    uploader = _uploader(store, sender)
+    assert uploader.drain()
+    assert sender.sent == [0.0, 1.0]
+    assert uploader.gave_up == 2
+    assert store.queue.upload_backlog()[0] == 0
+
+
+def test_missing_image_gives_up_that_record_only(store, tmp_path):
+    first, second, third = _fill(store, tmp_path, 3)
+    os.remove(store.queue.claim(1)[0][4])
+    store.queue.release([first])
+
+    sender = ReadingSender()
+    uploader = _uploader(store, sender)
+    assert uploader.drain()
+    assert sender.sent == [1.0, 2.0]
+    assert uploader.gave_up == 1
+    assert uploader.consecutive_failures == 0
+    assert store.queue.upload_backlog() == (0, None)
+    assert store.queue.requeue_gave_up() == 1
+
+
+def test_stub_api_outage_spends_no_attempts_then_drains(store, tmp_path, api):
+    ids = _fill(store, tmp_path, 3)
+    uploader = _uploader(store, ClientSender(frontend_api_url=api.url), max_attempts=1)
+    api.set_mode("drop")
+    for _ in range(3):
+        assert not uploader.drain()
+    assert api.requests == 3
+    assert _attempts(store) == {i: 0 for i in ids}
+    store.queue.release(ids)
+
+    api.set_mode("ok")
+    assert uploader.drain()
+    assert uploader.uploaded == api.accepted == 3
+    assert store.queue.upload_backlog() == (0, None)
+
+
+def test_stub_api_rejection_gives_up_without_pausing(store, tmp_path, api):
+    _fill(store, tmp_path, 2)
+    uploader = _uploader(store, ClientSender(frontend_api_url=api.url))
+    api.set_mode("error")
+    api.error_status = 400
+    assert uploader.drain()
+    assert api.requests == uploader.gave_up == 2
+    assert uploader.uploaded == 0
+    assert store.queue.upload_backlog()[0] == 0
+
+
+def test_stub_api_server_errors_back_off_until_it_recovers(store, tmp_path, api):
+    _fill(store, tmp_path, 3)
+    uploader = Uploader(store.queue, ClientSender(frontend_api_url=api.url), poll_interval=0.1,
+                        retry_delay=0.05, max_delay=0.2, max_attempts=100, rate=1000, burst=10)
+    api.set_mode("error")
+    uploader.start()
+    try:
+        # Every 503 pauses the whole uploader, not just the record
+        _wait_for(lambda: uploader.consecutive_failures >= 3)
+        assert api.accepted == 0
+
+        api.set_mode("ok")
+        _wait_for(lambda: store.queue.upload_backlog()[0] == 0)
+    finally:
+        uploader.stop()
+    assert uploader.uploaded == api.accepted == 3
+    assert uploader.gave_up == 0
+    assert uploader.consecutive_failures == 0
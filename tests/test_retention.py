@@ -0,0 +1,167 @@
+import errno
+import os
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+import data.retention
+from data.retention import Retention
+
+
+def _add(store, tmp_path, n, width=640, height=360):
+    rng = np.random.default_rng(n)
+    ids = []
+    for _ in range(n):
+        path = tmp_path / f"capture_{len(ids)}.jpg"
+        cv2.imwrite(str(path), rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+        ids.append(store.store(fullness=1.0, weight=2.0, image_path=str(path)))
+    return ids
+
+
+def _add_small(store, tmp_path, n):
+    path = tmp_path / "capture.jpg"
+    for _ in range(n):
+        path.write_bytes(b"\xff\xd8")
+        store.store(fullness=1.0, weight=2.0, image_path=str(path))
+
+
+def _upload(store, n):
+    for record in store.queue.claim(n):
+        store.queue.ack(record[0])
+
+
+def _pending(store):
+    """{id: image_path} of the records waiting for upload; claims them for 0 s."""
+    return {r[0]: r[4] for r in store.queue.claim(10**6, lease_s=0)}
+
+
+def _image_files(store):
+    return {name: os.path.getsize(os.path.join(store.queue.image_dir, name))
+            for name in os.listdir(store.queue.image_dir)}
+
+
+def _disk(store, capacity):
+    """A filesystem of `capacity` bytes holding only the store."""
+    queue = store.queue
+    return lambda path: SimpleNamespace(free=capacity - queue.database_bytes() - queue.image_bytes())
+
+
+def test_trim_keeps_records_waiting_for_upload(store, tmp_path):
+    ids = _add(store, tmp_path, 6)
+    _upload(store, 4)
+    retention = Retention(store.queue, max_records=2, headroom=0)
+    assert retention.run_once() == 4
+    assert store.queue.row_count() == 2
+    assert sorted(_pending(store)) == ids[4:]
+
+
+def test_uploaded_images_are_dropped_first(store, tmp_path):
+    _add(store, tmp_path, 2)
+    _upload(store, 2)
+    pending = _add(store, tmp_path, 2)
+    retention = Retention(store.queue, byte_budget=int(store.queue.image_bytes() * 0.6))
+    retention.run_once()
+
+    assert retention.stage == "drop_uploaded_images"
+    paths = _pending(store)
+    assert sorted(paths) == pending
+    assert sorted(os.listdir(store.queue.image_dir)) == sorted(os.path.basename(p) for p in paths.values())
+
+
+def test_pending_images_are_downscaled_before_dropped(store, tmp_path):
+    ids = _add(store, tmp_path, 3, width=1280, height=720)
+    retention = Retention(store.queue, byte_budget=store.queue.image_bytes() // 4, downscale_width=320)
+    retention.run_once()
+
+    assert retention.stage == "downscale_pending_images"
+    paths = _pending(store)
+    assert sorted(paths) == ids
+    for path in paths.values():
+        assert cv2.imread(path).shape[1] == 320
+
+
+def test_failed_downscale_keeps_the_original(store, tmp_path, monkeypatch):
+    ids = _add(store, tmp_path, 3, width=1280, height=720)
+    fsync = os.fsync
+    calls = []
+
+    def disk_full_once(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", disk_full_once)
+    retention = Retention(store.queue, byte_budget=store.queue.image_bytes() // 2, downscale_width=320)
+    retention.run_once()
+
+    assert retention.stage == "downscale_pending_images"
+    files = _image_files(store)
+    assert not any(name.endswith(".part") for name in files)
+    assert store.queue.image_bytes() == sum(files.values())
+    widths = {i: cv2.imread(path).shape[1] for i, path in _pending(store).items()}
+    assert widths == {ids[0]: 1280, ids[1]: 320, ids[2]: 320}
+
+
+def test_downscale_leaves_a_record_claimed_meanwhile(store, tmp_path, monkeypatch):
+    _add(store, tmp_path, 2, width=1280, height=720)
+    downscale = data.retention._downscale
+
+    def claim_first(path, *args):
+        store.queue.claim(10)
+        return downscale(path, *args)
+
+    monkeypatch.setattr(data.retention, "_downscale", claim_first)
+    before = _image_files(store)
+    retention = Retention(store.queue, byte_budget=store.queue.image_bytes() // 4, downscale_width=320)
+    retention.run_once()
+
+    assert _image_files(store) == before
+    assert store.queue.image_bytes() == sum(before.values())
+
+
+def test_pending_telemetry_survives_an_exhausted_budget(store, tmp_path):
+    ids = _add(store, tmp_path, 3)
+    retention = Retention(store.queue, byte_budget=0)
+    assert retention.run_once() == 0
+    assert _pending(store) == {i: "" for i in ids}
+    assert store.queue.image_bytes() == 0
+    assert os.listdir(store.queue.image_dir) == []
+
+
+def test_claimed_records_keep_their_images(store, tmp_path):
+    first, second = _add(store, tmp_path, 2)
+    claimed = store.queue.claim(1)[0]
+    retention = Retention(store.queue, byte_budget=0)
+    retention.run_once()
+
+    assert os.path.exists(claimed[4])
+    assert os.listdir(store.queue.image_dir) == [os.path.basename(claimed[4])]
+    # A claim taken after the candidates were picked still wins
+    assert not store.queue.set_images(first, "", [], 2, lease_s=retention.lease_s)
+
+    store.queue.ack(first)
+    retention.run_once()
+    assert os.listdir(store.queue.image_dir) == []
+
+
+def test_records_are_deleted_only_while_that_frees_disk(store, tmp_path):
+    _add_small(store, tmp_path, 1500)
+    _upload(store, 1500)
+    size = store.queue.database_bytes() + store.queue.image_bytes()
+    retention = Retention(store.queue, max_records=10**6, min_free_bytes=100_000, batch_size=100,
+                          disk_usage=_disk(store, size + 60_000))
+    deleted = retention.run_once()
+
+    assert 0 < deleted < 1500
+    assert retention.stats()['free_bytes'] >= 110_000
+
+
+def test_records_are_kept_when_deleting_cannot_reach_the_watermark(store, tmp_path):
+    _add_small(store, tmp_path, 200)
+    _upload(store, 200)
+    retention = Retention(store.queue, max_records=10**6, min_free_bytes=1 << 30,
+                          disk_usage=_disk(store, store.queue.database_bytes()))
+    assert retention.run_once() == 0
+    assert store.queue.row_count() == 200
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from sensors.camera import frame_buffers
+from sensors.vision import FrameSelector
+
+
+def _select(sharpness, n=50, k=5):
+    selector = FrameSelector(k, (2, 2, 3))
+    for t in range(n):
+        selector.offer(float(t), sharpness(t))
+    return [int(ts) for ts, _, _ in selector.selected(float(n - 1))]
+
+
+def test_equally_sharp_frames_stay_spread_over_the_pass():
+    kept = _select(lambda t: 1.0)
+    assert kept[0] == 0 and kept[-1] >= 45
+    assert min(b - a for a, b in zip(kept, kept[1:])) >= 5
+
+
+def test_sharper_frame_wins_its_pair():
+    kept = _select(lambda t: 10.0 if t == 7 else 1.0, n=12, k=5)
+    assert 7 in kept
+
+
+def test_nearly_equal_sharpness_counts_as_a_tie():
+    # Frame-to-frame noise in the Laplacian variance, as with real frames
+    rng = random.Random(0)
+    kept = _select(lambda t: 100.0 * (1 + rng.uniform(-0.02, 0.02)))
+    assert kept[0] == 0 and kept[-1] >= 45
+    assert min(b - a for a, b in zip(kept, kept[1:])) >= 5
+
+
+def test_buffer_falls_back_to_single_then_refuses():
+    frame_bytes = 3840 * 2160 * 3
+    assert frame_buffers(256, 5) == 2
+    assert frame_buffers(-(-5 * frame_bytes // 2**20), 5) == 1
+    with pytest.raises(ValueError):
+        frame_buffers(100, 5)
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+from data.data_queue import DataQueue
+from data.retention import Retention
+
+
+def test_store_moves_the_image_into_place(store, tmp_path):
+    capture = tmp_path / "capture.jpg"
+    capture.write_bytes(b"\xff\xd8" + bytes(1000))
+    record_id = store.store(fullness=1.0, weight=2.0, image_path=str(capture))
+
+    assert not capture.exists()
+    (claimed_id, _, _, _, image_path, _), = store.queue.claim(1)
+    assert claimed_id == record_id
+    assert os.listdir(store.queue.image_dir) == [os.path.basename(image_path)]
+    assert store.queue.image_bytes() == 1002
+
+
+def test_claimed_path_survives_every_retention_stage(store, tmp_path):
+    for i in range(3):
+        capture = tmp_path / f"capture_{i}.jpg"
+        capture.write_bytes(b"\xff\xd8" + bytes(1000))
+        store.store(fullness=1.0, weight=2.0, image_path=str(capture))
+    claimed = store.queue.claim(3)
+
+    # Over both limits, with deleting unuploaded records allowed
+    retention = Retention(store.queue, max_records=0, headroom=0, delete_unuploaded=True, byte_budget=0)
+    retention.run_once()
+
+    assert store.queue.row_count() == 3
+    for record in claimed:
+        with open(record[4], "rb") as image:
+            assert len(image.read()) == 1002
+
+
+def test_unknown_fullness_is_stored_as_null(store, tmp_path):
+    capture = tmp_path / "capture.jpg"
+    capture.write_bytes(b"\xff\xd8")
+    store.store(fullness=None, weight=2.0, image_path=str(capture))
+    assert store.queue.claim(1)[0][2] is None
+
+
+def test_old_databases_accept_unknown_fullness(tmp_path):
+    db = tmp_path / "data.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute("""
+            CREATE TABLE sensor_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                fullness REAL NOT NULL,
+                weight REAL NOT NULL,
+                image_path TEXT NOT NULL,
+                uploaded INTEGER DEFAULT 0,
+                upload_attempts INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany("INSERT INTO sensor_data (timestamp, fullness, weight, image_path) VALUES (?, ?, ?, ?)",
+                         [("2026-01-01T00:00:00", 40.0, 1.0, ""), ("2026-01-01T00:00:01", 41.0, 1.0, "")])
+        conn.execute("DELETE FROM sensor_data WHERE id = 2")
+    conn.close()
+
+    queue = DataQueue(db_path=str(db), image_dir=str(tmp_path / "images"))
+    try:
+        capture = tmp_path / "capture.jpg"
+        capture.write_bytes(b"\xff\xd8")
+        record_id = queue.add_record(None, 2.0, str(capture))
+        # Deleted ids are not reused, and the triggers kept by the store still count
+        assert record_id == 3
+        assert queue.row_count() == 2
+        assert [(r[0], r[2]) for r in queue.claim(2)] == [(1, 40.0), (3, None)]
+    finally:
+        queue.close()
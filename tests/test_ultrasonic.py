@@ -0,0 +1,46 @@
+import pytest
+
+from sensors.ultrasonic import EchoRanger
+from sim import EchoModel, FakePi
+from sim import pigpio as sim_pigpio
+
+TRIG = 23
+ECHO = 24
+
+
+def _measure(samples=5, **model):
+    pi = FakePi()
+    pi.attach_echo(TRIG, ECHO, EchoModel(seed=0, **model))
+    ranger = EchoRanger(pi, sim_pigpio, TRIG, ECHO, interval=0.0)
+    try:
+        return ranger.measure(samples)
+    finally:
+        ranger.close()
+
+
+def test_steady_echo_measures_the_distance():
+    result = _measure(distance_cm=50.0, noise_cm=0.3)
+    assert result.status == "ok"
+    assert result.distance == pytest.approx(50.0, abs=1.5)
+    assert result.valid == result.samples == 5
+
+
+def test_outliers_are_rejected():
+    result = _measure(samples=9, distance_cm=50.0, noise_cm=0.3, outlier_rate=0.3)
+    assert result.status == "ok"
+    assert result.distance == pytest.approx(50.0, abs=1.5)
+    assert result.valid < 9
+    assert result.spread < 3.0
+
+
+def test_missing_echoes_are_a_timeout():
+    result = _measure(distance_cm=50.0, timeout_rate=1.0)
+    assert result.status == "timeout"
+    assert result.valid == 0
+
+
+def test_out_of_range_echoes_are_invalid():
+    # Past the 400 cm maximum, but inside the echo timeout
+    result = _measure(distance_cm=500.0, noise_cm=0.0)
+    assert result.status == "invalid"
+    assert result.valid == 0